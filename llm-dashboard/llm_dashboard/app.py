@@ -1,154 +1,262 @@
 #!/usr/bin/env python3
 import os
-import sqlite3
 import json
 import traceback
-import sys
+import csv
+import io
+import time
+import base64
+import glob
+import re
+import logging
+import sqlite3
+import threading
 from datetime import datetime, timedelta
-from flask import Flask, jsonify, request, render_template, send_from_directory
-import pandas as pd
+from flask import Flask, Response, jsonify, request, send_from_directory
+
+from assets import current_build, pick_encoding
+from dates import format_date
+from db_pool import readonly_connection
+from log import get_logger, log_event, counters
+from pricing import pricing_version, load_price_file, PRICING_PATH
+from query_pool import offload, query_pool, RETRY_AFTER
+from sketches import quantiles, fixed_histogram, merge
+from snapshots import iter_usage_history
+from response_cache import ResponseCache, combined_data_version
+from timing import phase, profiled, render_metrics, start_request, finish_request
+from usage_extract import extract_usage, JSON_PARSER, CHUNK_KIND
+from usage_facts import (
+    sync_usage_facts, top_usage_facts, start_ingestion_thread,
+    usage_summary, overall_usage_stats,
+    PERIOD_EXPRESSIONS, EXPORT_COLUMNS,
+    list_models, kind_time_bounds, count_kinds, first_response_id,
+    latest_fact_rowid, usage_deltas_since, INGEST_POLL_INTERVAL,
+    list_usage_facts, RECORD_SORTS, usage_distribution, HISTOGRAM_METRICS,
+    summarize_latency, usage_distribution_series
+)
 
 app = Flask(__name__, static_folder='static')
 
+logger = get_logger('app')
+
 # Database path
 DB_PATH = '/home/thomas/.config/io.datasette.llm/logs.db'
 
+# Logs databases to aggregate instead of DB_PATH, e.g. copies gathered from
+# several hosts: paths or globs separated by commas or the OS path separator
+DB_PATTERNS = os.environ.get('LLM_DASHBOARD_DBS', '')
+
 # Enable debugging
 app.config['DEBUG'] = True
 
 # Create standalone directory if it doesn't exist
 os.makedirs('standalone', exist_ok=True)
 
-# Helper function to get database connection
-def get_db_connection():
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        # Test if connection works
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        return conn
-    except Exception as e:
-        print(f"Database connection error: {e}", file=sys.stderr)
-        traceback.print_exc()
-        raise
+# Computed /api/token-data bodies, valid until the logs database changes
+token_data_cache = ResponseCache('token-data')
+distribution_cache = ResponseCache('distribution')
+latency_cache = ResponseCache('latency')
 
-# Helper function to format dates for display
-def format_date(date_str):
-    try:
-        # Handle various date formats
-        if date_str is None:
-            return None
-            
-        # Print raw date for debugging
-        print(f"Parsing date: {date_str}")
-            
-        # Try different formats
-        formats_to_try = [
-            '%Y-%m-%dT%H:%M:%S.%f',  # With microseconds
-            '%Y-%m-%dT%H:%M:%S.%f+00:00',  # With timezone
-            '%Y-%m-%dT%H:%M:%S.%fZ',  # With Z timezone
-            '%Y-%m-%dT%H:%M:%S',  # Without microseconds
-            '%Y-%m-%d %H:%M:%S.%f',  # Space separator with microseconds
-            '%Y-%m-%d %H:%M:%S'  # Space separator without microseconds
-        ]
-        
-        # Remove timezone if present (we'll handle it separately)
-        if '+' in date_str:
-            cleaned_date = date_str.split('+')[0]
-        elif 'Z' in date_str:
-            cleaned_date = date_str.replace('Z', '')
-        else:
-            cleaned_date = date_str
-        
-        # Try each format
-        for fmt in formats_to_try:
-            try:
-                dt = datetime.strptime(cleaned_date, fmt)
-                return dt.strftime('%Y-%m-%d')
-            except ValueError:
-                continue
-                
-        # If all formats fail, try to extract just the date part
-        if 'T' in date_str:
-            date_part = date_str.split('T')[0]
-            try:
-                dt = datetime.strptime(date_part, '%Y-%m-%d')
-                return date_part
-            except ValueError:
-                pass
-        
-        # Last resort - match any YYYY-MM-DD pattern
-        import re
-        match = re.search(r'(\d{4}-\d{2}-\d{2})', date_str)
-        if match:
-            return match.group(1)
-        
-        # If all formats fail, return None
-        print(f"Could not parse date: {date_str}")
+# Time every request; the phases handlers record go out in Server-Timing
+# and into the /metrics histograms
+app.before_request(start_request)
+app.after_request(finish_request)
+
+# Largest page /api/sample-records will return
+MAX_RECORDS_LIMIT = 1000
+
+# How long one /api/live connection stays open before the browser is asked
+# to reconnect, and how often an idle stream sends a keep-alive comment
+LIVE_STREAM_SECONDS = float(os.environ.get('LLM_DASHBOARD_LIVE_SECONDS', '60'))
+LIVE_HEARTBEAT_SECONDS = 15
+
+# Each open /api/live stream holds a server thread, so only this many may be
+# open at once; serve.py counts them against the server's threads
+LIVE_STREAMS = int(os.environ.get('LLM_DASHBOARD_LIVE_STREAMS', '2'))
+live_slots = threading.BoundedSemaphore(LIVE_STREAMS)
+
+# Helper function to list the logs databases the dashboard aggregates.
+# Globs are expanded on every call, so newly copied files are picked up.
+def get_db_paths():
+    if not DB_PATTERNS:
+        return [DB_PATH]
+    paths = []
+    for pattern in re.split(f"[,{re.escape(os.pathsep)}]", DB_PATTERNS):
+        pattern = pattern.strip()
+        if pattern:
+            paths.extend(sorted(glob.glob(os.path.expanduser(pattern))))
+    return list(dict.fromkeys(os.path.abspath(path) for path in paths))
+
+# Helper function to read the version the response caches are keyed on.
+# Repricing changes costs without touching the logs databases, so the
+# pricing file's digest is part of it.
+def get_data_version():
+    version, modified_at = combined_data_version(get_db_paths())
+    price_digest, price_modified_at = pricing_version()
+    return f"{version}:{price_digest}", max(modified_at, price_modified_at)
+
+# Helper function to borrow a pooled, read-only database connection.
+# Use it as a with block so the connection goes back to the pool on every path.
+def get_db_connection(path=None):
+    return readonly_connection(path or DB_PATH)
+
+# Helper function to decode a "cost:id" keyset cursor
+def parse_cost_cursor(cursor):
+    if not cursor:
         return None
-    except Exception as e:
-        print(f"Error formatting date {date_str}: {e}")
-        traceback.print_exc()
+    cost, sep, id = cursor.partition(':')
+    if not sep or not id:
+        raise ValueError(f'cursor must look like "cost:id", got {cursor!r}')
+    return float(cost), id
+
+# Helper function to turn a usage fact row into a record for the API
+def format_record(row):
+    datetime_utc = row['datetime_utc']
+    
+    # Format datetime for display
+    formatted_dt = datetime_utc
+    if '+' in datetime_utc:
+        try:
+            dt = datetime.strptime(datetime_utc.split('+')[0], '%Y-%m-%dT%H:%M:%S.%f')
+            formatted_dt = dt.strftime('%Y-%m-%d %H:%M:%S')
+        except:
+            pass
+    
+    return {
+        'id': row['id'],
+        'model': row['model'],
+        'prompt_tokens': row['prompt_tokens'],
+        'completion_tokens': row['completion_tokens'],
+        'total_tokens': row['total_tokens'],
+        'cost': row['cost'],
+        'datetime': formatted_dt
+    }
+
+# Helper functions to encode and decode an opaque (sort value, id) keyset cursor.
+# The cursor names the sort and order it was issued for, since its value
+# means nothing under any other.
+def encode_keyset_cursor(sort, order, value, id):
+    raw = json.dumps([sort, order, value, id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_keyset_cursor(cursor, sort, order):
+    if not cursor:
         return None
+    try:
+        cursor_sort, cursor_order, value, id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError(f'malformed cursor {cursor!r}')
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise ValueError(f'cursor is for sort={cursor_sort}&order={cursor_order}, not sort={sort}&order={order}')
+    return value, id
+
+# Helper function to send a cached JSON body with revalidation headers.
+# Browsers get the body once and then revalidate with If-None-Match /
+# If-Modified-Since, receiving a bodyless 304 while the data is unchanged.
+def cached_json_response(etag, modified_at, body=b''):
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag, weak=True)
+    response.last_modified = modified_at
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+# Helper function to send a built page or bundle in the best encoding the
+# browser accepts. Hashed bundles never change, so they are cached for a
+# year without revalidation; the index page is revalidated by ETag.
+def asset_response(asset, immutable=False):
+    encoding, body = pick_encoding(asset, request.headers.get('Accept-Encoding'))
+    response = app.response_class(body, content_type=asset.mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(f"{asset.etag}-{encoding}" if encoding else asset.etag)
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 @app.route('/api/debug-info', methods=['GET'])
+@profiled
 def get_debug_info():
     """Endpoint to help debug issues with database and date formats"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
+        db_paths = get_db_paths()
+        db_path = db_paths[0] if db_paths else DB_PATH
         debug_info = {
-            "db_path": DB_PATH,
-            "db_exists": os.path.exists(DB_PATH),
+            "db_path": db_path,
+            "db_paths": db_paths,
+            "db_exists": os.path.exists(db_path),
             "tables": [],
             "sample_dates": [],
-            "date_parsing_tests": []
+            "date_parsing_tests": [],
+            "json_parser": JSON_PARSER,
+            "query_pool": query_pool.stats(),
+            "event_counters": counters(),
+            "pricing": {
+                "path": PRICING_PATH,
+                "digest": pricing_version()[0],
+                "entries": len(load_price_file()[1])
+            }
         }
         
-        # Get tables
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        debug_info["tables"] = [row[0] for row in cursor.fetchall()]
+        # A read-only open fails on a missing file rather than creating it
+        if not debug_info["db_exists"]:
+            return jsonify(debug_info)
         
-        # Check if responses table exists
-        if 'responses' in debug_info["tables"]:
-            # Get a few sample dates
-            cursor.execute("SELECT datetime_utc FROM responses LIMIT 5")
-            sample_dates = [row[0] for row in cursor.fetchall()]
-            debug_info["sample_dates"] = sample_dates
-            
-            # Test date parsing
-            for date_str in sample_dates:
-                parsed = format_date(date_str)
-                debug_info["date_parsing_tests"].append({
-                    "original": date_str,
-                    "parsed": parsed,
-                    "success": parsed is not None
-                })
-            
-            # Check for chat.completion.chunk records
-            cursor.execute("SELECT COUNT(*) FROM responses WHERE response_json LIKE '%chat.completion.chunk%'")
-            debug_info["chunk_record_count"] = cursor.fetchone()[0]
+        with get_db_connection(db_path) as conn:
+            cursor = conn.cursor()
             
-            # Get date range for chunk records
-            cursor.execute("SELECT MIN(datetime_utc), MAX(datetime_utc) FROM responses WHERE response_json LIKE '%chat.completion.chunk%'")
-            min_date, max_date = cursor.fetchone()
-            debug_info["chunk_min_date"] = min_date
-            debug_info["chunk_max_date"] = max_date
-            debug_info["chunk_min_date_parsed"] = format_date(min_date)
-            debug_info["chunk_max_date_parsed"] = format_date(max_date)
+            # Get tables
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+            debug_info["tables"] = [row[0] for row in cursor.fetchall()]
             
-            # Check a sample record
-            cursor.execute("SELECT id, model, datetime_utc, response_json FROM responses WHERE response_json LIKE '%chat.completion.chunk%' LIMIT 1")
-            row = cursor.fetchone()
-            if row:
-                sample = dict(row)
-                # Include just the first 500 chars of response_json to avoid huge output
-                sample["response_json"] = sample["response_json"][:500] + "..." if len(sample["response_json"]) > 500 else sample["response_json"]
-                debug_info["sample_record"] = sample
-        
-        conn.close()
+            # Check if responses table exists
+            if 'responses' in debug_info["tables"]:
+                # Get a few sample dates
+                cursor.execute("SELECT datetime_utc FROM responses LIMIT 5")
+                sample_dates = [row[0] for row in cursor.fetchall()]
+                debug_info["sample_dates"] = sample_dates
+                
+                # Test date parsing
+                for date_str in sample_dates:
+                    parsed = format_date(date_str)
+                    debug_info["date_parsing_tests"].append({
+                        "original": date_str,
+                        "parsed": parsed,
+                        "success": parsed is not None
+                    })
+                
+                # Classify any new responses, then count chunk records
+                # from the stored classification; a sync already running
+                # elsewhere is not waited for
+                with phase('sync'):
+                    sync_usage_facts(get_db_paths(), wait=False)
+                debug_info["kind_counts"] = count_kinds()
+                debug_info["chunk_record_count"] = debug_info["kind_counts"].get(CHUNK_KIND, 0)
+                
+                # Get date range for chunk records
+                min_date, max_date = kind_time_bounds(CHUNK_KIND)
+                debug_info["chunk_min_date"] = min_date
+                debug_info["chunk_max_date"] = max_date
+                debug_info["chunk_min_date_parsed"] = format_date(min_date)
+                debug_info["chunk_max_date_parsed"] = format_date(max_date)
+                
+                # Check a sample record
+                cursor.execute("SELECT id, model, datetime_utc, response_json FROM responses WHERE id = ?",
+                               (first_response_id(CHUNK_KIND),))
+                row = cursor.fetchone()
+                if row:
+                    sample = dict(row)
+                    # Show what the shared extraction layer makes of it
+                    usage = extract_usage(sample["id"], sample["model"], sample["response_json"])
+                    debug_info["sample_record_usage"] = usage._asdict() if usage else None
+                    # Include just the first 500 chars of response_json to avoid huge output
+                    sample["response_json"] = sample["response_json"][:500] + "..." if len(sample["response_json"]) > 500 else sample["response_json"]
+                    debug_info["sample_record"] = sample
+        
         return jsonify(debug_info)
         
     except Exception as e:
@@ -159,35 +267,31 @@ def get_debug_info():
 
 # Get available date range in the database
 @app.route('/api/date-range', methods=['GET'])
+@profiled
 def get_date_range():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get the min and max dates
-        query = "SELECT MIN(datetime_utc), MAX(datetime_utc) FROM responses WHERE response_json LIKE '%chat.completion.chunk%'"
-        cursor.execute(query)
-        result = cursor.fetchone()
-        
-        min_date_str = result[0] if result[0] else None
-        max_date_str = result[1] if result[1] else None
+        # Bring the derived usage facts up to date, unless a backlog sync is
+        # already running elsewhere; this endpoint then answers from the
+        # facts stored so far rather than waiting behind it
+        with phase('sync'):
+            sync_usage_facts(get_db_paths(), wait=False)
         
-        print(f"Raw min date: {min_date_str}")
-        print(f"Raw max date: {max_date_str}")
+        # Get the min and max dates from the (kind, ts) index
+        with phase('query'):
+            min_date_str, max_date_str = kind_time_bounds(CHUNK_KIND)
         
-        min_date = format_date(min_date_str)
-        max_date = format_date(max_date_str)
+        with phase('dates'):
+            min_date = format_date(min_date_str)
+            max_date = format_date(max_date_str)
         
-        print(f"Formatted min date: {min_date}")
-        print(f"Formatted max date: {max_date}")
+        log_event(logger, logging.DEBUG, 'date range', raw_min_date=min_date_str, raw_max_date=max_date_str,
+                  min_date=min_date, max_date=max_date)
         
         # If we couldn't parse the dates, fall back to reasonable defaults
         if not min_date or not max_date:
             today = datetime.now()
             min_date = (today - timedelta(days=30)).strftime('%Y-%m-%d')
             max_date = today.strftime('%Y-%m-%d')
-            
-        conn.close()
         
         return jsonify({
             'min_date': min_date,
@@ -197,7 +301,7 @@ def get_date_range():
             'raw_max_date': max_date_str
         })
     except Exception as e:
-        traceback.print_exc()
+        log_event(logger, logging.ERROR, 'date range request failed', exc_info=True)
         return jsonify({
             'error': str(e),
             'traceback': traceback.format_exc(),
@@ -206,26 +310,26 @@ def get_date_range():
 
 # Get all available models
 @app.route('/api/models', methods=['GET'])
+@profiled
 def get_models():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get distinct models from filtered responses
-        query = "SELECT DISTINCT model FROM responses WHERE response_json LIKE '%chat.completion.chunk%' ORDER BY model"
-        cursor.execute(query)
-        models = [row[0] for row in cursor.fetchall()]
+        # Bring the derived usage facts up to date, unless a backlog sync is
+        # already running elsewhere (see get_date_range)
+        with phase('sync'):
+            sync_usage_facts(get_db_paths(), wait=False)
         
-        conn.close()
+        # Get distinct models of chunk responses from the (kind, model) index
+        with phase('query'):
+            models = list_models(CHUNK_KIND)
         
-        print(f"Found {len(models)} models")
+        log_event(logger, logging.DEBUG, 'listed models', models=len(models))
         
         return jsonify({
             'models': models,
             'success': True
         })
     except Exception as e:
-        traceback.print_exc()
+        log_event(logger, logging.ERROR, 'models request failed', exc_info=True)
         return jsonify({
             'error': str(e),
             'traceback': traceback.format_exc(),
@@ -234,14 +338,18 @@ def get_models():
 
 # Get token usage data based on filters
 @app.route('/api/token-data', methods=['GET'])
+@offload
+@profiled
 def get_token_data():
     try:
         # Get filters from request
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         model = request.args.get('model', 'all')
+        granularity = request.args.get('granularity', 'day')
         
-        print(f"Request params: start_date={start_date}, end_date={end_date}, model={model}")
+        log_event(logger, logging.DEBUG, 'token data requested', start_date=start_date, end_date=end_date,
+                  model=model, granularity=granularity)
         
         # Validate dates
         if not start_date or not end_date:
@@ -250,6 +358,12 @@ def get_token_data():
                 'success': False
             }), 400
         
+        if granularity not in PERIOD_EXPRESSIONS:
+            return jsonify({
+                'error': f'Invalid granularity: {granularity}. Expected one of: {", ".join(PERIOD_EXPRESSIONS)}.',
+                'success': False
+            }), 400
+        
         # Add one day to end_date for inclusive filtering
         try:
             end_date_obj = datetime.strptime(end_date, '%Y-%m-%d')
@@ -261,169 +375,251 @@ def get_token_data():
                 'success': False
             }), 400
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Check if database exists and has the required table
+        # Check that the databases exist and at least one has the required table.
+        # A glob that matches no files yet just gives an empty dashboard.
+        db_paths = get_db_paths()
         try:
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='responses'")
-            if not cursor.fetchone():
-                return jsonify({
-                    'error': 'The database does not contain a "responses" table',
-                    'success': False
-                }), 500
+            has_responses = not db_paths
+            for path in db_paths:
+                try:
+                    with get_db_connection(path) as conn:
+                        if conn.execute(
+                            "SELECT name FROM sqlite_master WHERE type='table' AND name='responses'"
+                        ).fetchone():
+                            has_responses = True
+                except sqlite3.DatabaseError:
+                    # Not an SQLite file or half copied: the sync logs it
+                    # once and leaves it out, so only a lone database that
+                    # can't be read is an error
+                    if len(db_paths) == 1:
+                        raise
         except Exception as e:
             return jsonify({
                 'error': f'Error accessing database: {str(e)}',
                 'success': False
             }), 500
         
-        # More flexible date query
-        # First fetch all matching records and filter dates in Python
-        # This approach is more flexible with different date formats
-        base_query = """
-        SELECT id, model, response_json, datetime_utc
-        FROM responses 
-        WHERE response_json LIKE '%chat.completion.chunk%'
-        """
+        if not has_responses:
+            return jsonify({
+                'error': 'The database does not contain a "responses" table',
+                'success': False
+            }), 500
+        
+        # The version is read before syncing, so a cached body is never
+        # older than the version it is filed under
+        cache_key = (start_date, end_date, model, granularity)
+        with phase('version'):
+            version, modified_at = get_data_version()
+        etag = token_data_cache.etag(cache_key, version)
+        
+        # The browser already has this exact body, so skip straight to a 304
+        if request.if_none_match.contains_weak(etag):
+            return cached_json_response(etag, modified_at)
+        
+        entry = token_data_cache.get(cache_key, version)
+        if entry is None:
+            # Bring the derived usage facts up to date with the logs database
+            with phase('sync'):
+                sync_usage_facts(db_paths)
+            
+            # Sum only the daily rollup rows inside the window, so the cost does
+            # not depend on how many raw responses the range covers
+            with phase('query'):
+                cursor, model_data, date_data = usage_summary(start_date, end_date, model, granularity)
+                overall_stats = overall_usage_stats(model_data)
+            
+            log_event(logger, logging.DEBUG, 'aggregated records', records=overall_stats['total_requests'])
+            
+            with phase('serialize'):
+                body = jsonify({
+                    'model_data': model_data,
+                    'overall_stats': overall_stats,
+                    'date_data': date_data,
+                    'cursor': cursor,
+                    'success': True
+                }).get_data()
+            entry = token_data_cache.put(cache_key, version, body, modified_at)
+        
+        return cached_json_response(etag, entry.modified_at, entry.body)
+            
+    except Exception as e:
+        log_event(logger, logging.ERROR, 'token data request failed', exc_info=True)
+        return jsonify({
+            'error': str(e),
+            'traceback': traceback.format_exc(),
+            'success': False
+        }), 500
+
+# Helper function to summarise one distribution sketch for the API
+def describe_sketch(sketch, percentiles):
+    values = quantiles(sketch, percentiles)
+    return {
+        'count': sum(count for _, count in sketch),
+        'percentiles': {f"p{p:g}": values[p] for p in percentiles},
+        'histogram': fixed_histogram(sketch)
+    }
+
+# Percentiles and histograms of cost or tokens per model or per period
+@app.route('/api/distribution', methods=['GET'])
+@offload
+@profiled
+def get_distribution():
+    try:
+        # Get filters from request
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        model = request.args.get('model', 'all')
+        metric = request.args.get('metric', 'cost')
+        by = request.args.get('by', 'model')
+        
+        # Validate dates
+        if not start_date or not end_date:
+            return jsonify({
+                'error': 'Start date and end date are required',
+                'success': False
+            }), 400
         
-        params = []
+        if metric not in HISTOGRAM_METRICS:
+            return jsonify({
+                'error': f'Invalid metric: {metric}. Expected one of: {", ".join(HISTOGRAM_METRICS)}.',
+                'success': False
+            }), 400
         
-        if model != 'all':
-            base_query += " AND model = ?"
-            params.append(model)
+        if by != 'model' and by not in PERIOD_EXPRESSIONS:
+            return jsonify({
+                'error': f'Invalid by: {by}. Expected model or one of: {", ".join(PERIOD_EXPRESSIONS)}.',
+                'success': False
+            }), 400
         
-        print(f"Executing query: {base_query}")
-        print(f"With params: {params}")
+        try:
+            percentiles = [float(p) for p in request.args.get('percentiles', '50,95,99').split(',')]
+        except ValueError:
+            percentiles = None
+        if not percentiles or not all(0 <= p <= 100 for p in percentiles):
+            return jsonify({
+                'error': 'percentiles must be a comma-separated list of numbers between 0 and 100',
+                'success': False
+            }), 400
         
-        cursor.execute(base_query, params)
-        rows = cursor.fetchall()
+        # Same versioned caching as /api/token-data
+        cache_key = (start_date, end_date, model, metric, by, ','.join(f"{p:g}" for p in percentiles))
+        with phase('version'):
+            version, modified_at = get_data_version()
+        etag = distribution_cache.etag(cache_key, version)
         
-        print(f"Found {len(rows)} matching records")
+        if request.if_none_match.contains_weak(etag):
+            return cached_json_response(etag, modified_at)
         
-        # Process the data and filter by dates in Python
-        data = []
-        for row in rows:
-            id, model, response_json_str, datetime_utc = row
+        entry = distribution_cache.get(cache_key, version)
+        if entry is None:
+            # Bring the derived usage facts up to date with the logs database
+            with phase('sync'):
+                sync_usage_facts(get_db_paths())
             
-            try:
-                # Parse date
-                record_date = format_date(datetime_utc)
-                
-                # Skip if date couldn't be parsed or is outside our range
-                if not record_date:
-                    continue
-                    
-                if record_date < start_date or record_date > end_date:
-                    continue
-                
-                # Parse JSON
-                response_json = json.loads(response_json_str)
-                
-                # Extract usage data
-                usage = response_json.get('usage', {})
-                completion_tokens = usage.get('completion_tokens', 0)
-                prompt_tokens = usage.get('prompt_tokens', 0)
-                total_tokens = usage.get('total_tokens', 0)
-                cost = usage.get('cost', 0)
-                
-                # Add to dataset
-                data.append({
-                    'id': id,
-                    'model': model,
-                    'date': record_date,
-                    'completion_tokens': completion_tokens,
-                    'prompt_tokens': prompt_tokens,
-                    'total_tokens': total_tokens,
-                    'cost': cost
-                })
-            except json.JSONDecodeError:
-                print(f"Failed to parse JSON for ID: {id}")
-            except Exception as e:
-                print(f"Error processing record {id}: {e}")
-        
-        conn.close()
-        
-        print(f"Processed {len(data)} valid records")
-        
-        # Group by model
-        if data:
-            df = pd.DataFrame(data)
-            
-            # Group by model
-            model_summary = df.groupby('model').agg({
-                'id': 'count',
-                'prompt_tokens': 'sum',
-                'completion_tokens': 'sum',
-                'total_tokens': 'sum',
-                'cost': 'sum'
-            }).reset_index()
+            # Merge the stored daily sketches; raw facts are never read
+            with phase('query'):
+                sketches = usage_distribution(start_date, end_date, metric, model, by)
+            with phase('sketches'):
+                group_field = 'model' if by == 'model' else 'date'
+                groups = []
+                for group, sketch in sketches.items():
+                    summary = describe_sketch(sketch, percentiles)
+                    summary[group_field] = group
+                    groups.append(summary)
+                overall = describe_sketch(merge(sketches.values()), percentiles)
             
-            model_summary.columns = ['model', 'requests', 'prompt_tokens', 'completion_tokens', 'total_tokens', 'total_cost']
+            with phase('serialize'):
+                body = jsonify({
+                    'metric': metric,
+                    'by': by,
+                    'groups': groups,
+                    'overall': overall,
+                    'success': True
+                }).get_data()
+            entry = distribution_cache.put(cache_key, version, body, modified_at)
+        
+        return cached_json_response(etag, entry.modified_at, entry.body)
             
-            # Calculate additional metrics
-            model_summary['avg_cost_per_request'] = model_summary['total_cost'] / model_summary['requests']
-            # Avoid division by zero
-            model_summary['cost_per_1k_tokens'] = model_summary.apply(
-                lambda row: (row['total_cost'] / row['total_tokens']) * 1000 if row['total_tokens'] > 0 else 0, 
-                axis=1
-            )
-            model_summary = model_summary.fillna(0)  # Replace NaN with 0
-            
-            # Convert to dictionary for serialization
-            result = model_summary.to_dict(orient='records')
+    except Exception as e:
+        log_event(logger, logging.ERROR, 'distribution request failed', exc_info=True)
+        return jsonify({
+            'error': str(e),
+            'traceback': traceback.format_exc(),
+            'success': False
+        }), 500
+
+# Latency percentiles and throughput per model, overall and over time
+@app.route('/api/latency', methods=['GET'])
+@offload
+@profiled
+def get_latency():
+    try:
+        # Get filters from request
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        model = request.args.get('model', 'all')
+        granularity = request.args.get('granularity', 'day')
+        
+        # Validate dates
+        if not start_date or not end_date:
+            return jsonify({
+                'error': 'Start date and end date are required',
+                'success': False
+            }), 400
+        
+        if granularity not in PERIOD_EXPRESSIONS:
+            return jsonify({
+                'error': f'Invalid granularity: {granularity}. Expected one of: {", ".join(PERIOD_EXPRESSIONS)}.',
+                'success': False
+            }), 400
+        
+        cache_key = (start_date, end_date, model, granularity)
+        with phase('version'):
+            version, modified_at = get_data_version()
+        etag = latency_cache.etag(cache_key, version)
+        
+        if request.if_none_match.contains_weak(etag):
+            return cached_json_response(etag, modified_at)
+        
+        entry = latency_cache.get(cache_key, version)
+        if entry is None:
+            # Bring the derived usage facts up to date with the logs database
+            with phase('sync'):
+                sync_usage_facts(get_db_paths())
             
-            # Overall stats
-            overall_stats = {
-                'total_requests': int(df['id'].count()),
-                'total_prompt_tokens': int(df['prompt_tokens'].sum()),
-                'total_completion_tokens': int(df['completion_tokens'].sum()),
-                'total_tokens': int(df['total_tokens'].sum()),
-                'total_cost': float(df['cost'].sum()),
-                'avg_cost_per_request': float(df['cost'].mean()) if len(df) > 0 else 0
-            }
+            # Averages come from the daily rollups and percentiles from the
+            # stored duration sketches, so the cost follows days, not requests
+            percentiles = [50, 95, 99]
+            with phase('query'):
+                model_data = summarize_latency(start_date, end_date, model)
+                model_sketches = usage_distribution(start_date, end_date, 'duration_ms', model, 'model')
+            with phase('sketches'):
+                for row in model_data:
+                    row['duration_percentiles'] = describe_sketch(
+                        model_sketches.get(row['model'], []), percentiles
+                    )['percentiles']
             
-            # Group by date
-            if 'date' in df.columns and not df['date'].isna().all():
-                date_summary = df.groupby('date').agg({
-                    'id': 'count',
-                    'prompt_tokens': 'sum',
-                    'completion_tokens': 'sum',
-                    'total_tokens': 'sum',
-                    'cost': 'sum'
-                }).reset_index()
-                
-                date_summary.columns = ['date', 'requests', 'prompt_tokens', 'completion_tokens', 'total_tokens', 'total_cost']
-                date_summary = date_summary.sort_values('date')
-                
-                # Convert to dictionary for serialization
-                date_data = date_summary.to_dict(orient='records')
-            else:
-                date_data = []
+            with phase('query'):
+                series = summarize_latency(start_date, end_date, model, granularity)
+                series_sketches = usage_distribution_series(start_date, end_date, 'duration_ms', model, granularity)
+            with phase('sketches'):
+                for row in series:
+                    row['duration_percentiles'] = describe_sketch(
+                        series_sketches.get((row['date'], row['model']), []), percentiles
+                    )['percentiles']
             
-            return jsonify({
-                'model_data': result,
-                'overall_stats': overall_stats,
-                'date_data': date_data,
-                'success': True
-            })
-        else:
-            return jsonify({
-                'model_data': [],
-                'overall_stats': {
-                    'total_requests': 0,
-                    'total_prompt_tokens': 0,
-                    'total_completion_tokens': 0,
-                    'total_tokens': 0,
-                    'total_cost': 0,
-                    'avg_cost_per_request': 0
-                },
-                'date_data': [],
-                'success': True
-            })
+            with phase('serialize'):
+                body = jsonify({
+                    'model_data': model_data,
+                    'series': series,
+                    'success': True
+                }).get_data()
+            entry = latency_cache.put(cache_key, version, body, modified_at)
+        
+        return cached_json_response(etag, entry.modified_at, entry.body)
             
     except Exception as e:
-        traceback.print_exc()
+        log_event(logger, logging.ERROR, 'latency request failed', exc_info=True)
         return jsonify({
             'error': str(e),
             'traceback': traceback.format_exc(),
@@ -432,6 +628,8 @@ def get_token_data():
 
 # Sample daily data API
 @app.route('/api/sample-records', methods=['GET'])
+@offload
+@profiled
 def get_sample_records():
     try:
         # Get filters from request
@@ -446,364 +644,344 @@ def get_sample_records():
                 'success': False
             }), 400
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Similar to token-data, pull all records and filter dates in Python
-        base_query = """
-        SELECT id, model, response_json, datetime_utc
-        FROM responses 
-        WHERE response_json LIKE '%chat.completion.chunk%'
-        """
+        # Page size and position: an offset, or a keyset cursor from next_cursor
+        try:
+            limit = int(request.args.get('limit', 10))
+            offset = int(request.args.get('offset', 0))
+            after = parse_cost_cursor(request.args.get('cursor'))
+        except ValueError as e:
+            return jsonify({
+                'error': f'Invalid paging parameter: {e}',
+                'success': False
+            }), 400
         
-        params = []
+        if not 1 <= limit <= MAX_RECORDS_LIMIT or offset < 0:
+            return jsonify({
+                'error': f'limit must be between 1 and {MAX_RECORDS_LIMIT} and offset must not be negative',
+                'success': False
+            }), 400
         
-        if model != 'all':
-            base_query += " AND model = ?"
-            params.append(model)
+        # Bring the derived usage facts up to date with the logs database
+        with phase('sync'):
+            sync_usage_facts(get_db_paths())
         
-        cursor.execute(base_query, params)
-        rows = cursor.fetchall()
+        # ORDER BY cost DESC LIMIT n over the usage facts; only one page of
+        # rows is ever held in memory
+        with phase('query'):
+            rows = top_usage_facts(start_date, end_date, model, limit, offset, after)
         
         # Process the data
-        data = []
-        for row in rows:
-            id, model, response_json_str, datetime_utc = row
-            
-            try:
-                # Parse date
-                record_date = format_date(datetime_utc)
-                
-                # Skip if date couldn't be parsed or is outside our range
-                if not record_date:
-                    continue
-                    
-                if record_date < start_date or record_date > end_date:
-                    continue
-                
-                # Parse JSON
-                response_json = json.loads(response_json_str)
-                
-                # Extract usage data
-                usage = response_json.get('usage', {})
-                completion_tokens = usage.get('completion_tokens', 0)
-                prompt_tokens = usage.get('prompt_tokens', 0)
-                total_tokens = usage.get('total_tokens', 0)
-                cost = usage.get('cost', 0)
-                
-                # Format datetime for display
-                formatted_dt = datetime_utc
-                if '+' in datetime_utc:
-                    try:
-                        dt = datetime.strptime(datetime_utc.split('+')[0], '%Y-%m-%dT%H:%M:%S.%f')
-                        formatted_dt = dt.strftime('%Y-%m-%d %H:%M:%S')
-                    except:
-                        pass
-                
-                # Add to dataset
-                data.append({
-                    'id': id,
-                    'model': model,
-                    'prompt_tokens': prompt_tokens,
-                    'completion_tokens': completion_tokens,
-                    'total_tokens': total_tokens,
-                    'cost': cost,
-                    'datetime': formatted_dt
-                })
-            except Exception as e:
-                print(f"Error processing record {id}: {e}")
-        
-        conn.close()
-        
-        # Sort by cost and take top 10
-        if data:
-            sorted_data = sorted(data, key=lambda x: x['cost'], reverse=True)
-            top_data = sorted_data[:10]
+        with phase('serialize'):
+            data = [format_record(row) for row in rows]
+        
+        # A full page means there may be more; hand back where it ended
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = f"{rows[-1]['cost']!r}:{rows[-1]['id']}"
+        
+        return jsonify({
+            'records': data,
+            'next_cursor': next_cursor,
+            'success': True
+        })
             
+    except Exception as e:
+        log_event(logger, logging.ERROR, 'sample records request failed', exc_info=True)
+        return jsonify({
+            'error': str(e),
+            'traceback': traceback.format_exc(),
+            'success': False
+        }), 500
+
+# Page through individual requests, sorted by time, cost or tokens
+@app.route('/api/records', methods=['GET'])
+@offload
+@profiled
+def get_records():
+    try:
+        # Get filters from request
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        model = request.args.get('model', 'all')
+        sort = request.args.get('sort', 'time')
+        order = request.args.get('order', 'desc')
+        
+        # Validate dates
+        if not start_date or not end_date:
             return jsonify({
-                'records': top_data,
-                'success': True
-            })
-        else:
+                'error': 'Start date and end date are required',
+                'success': False
+            }), 400
+        
+        if sort not in RECORD_SORTS or order not in ('asc', 'desc'):
+            return jsonify({
+                'error': f'sort must be one of {", ".join(RECORD_SORTS)} and order must be asc or desc',
+                'success': False
+            }), 400
+        
+        try:
+            min_cost = request.args.get('min_cost')
+            min_cost = float(min_cost) if min_cost else None
+            limit = int(request.args.get('limit', 50))
+            after = decode_keyset_cursor(request.args.get('cursor'), sort, order)
+        except ValueError as e:
+            return jsonify({
+                'error': f'Invalid parameter: {e}',
+                'success': False
+            }), 400
+        
+        if not 1 <= limit <= MAX_RECORDS_LIMIT:
             return jsonify({
-                'records': [],
-                'success': True
-            })
+                'error': f'limit must be between 1 and {MAX_RECORDS_LIMIT}',
+                'success': False
+            }), 400
+        
+        # Bring the derived usage facts up to date with the logs database
+        with phase('sync'):
+            sync_usage_facts(get_db_paths())
+        
+        # One indexed LIMIT query per page, seeking past the cursor
+        with phase('query'):
+            rows = list_usage_facts(start_date, end_date, model, min_cost, sort,
+                                    order == 'desc', limit, after)
+        
+        # A full page means there may be more; hand back where it ended
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = encode_keyset_cursor(sort, order, rows[-1][RECORD_SORTS[sort]], rows[-1]['id'])
+        
+        with phase('serialize'):
+            records = [format_record(row) for row in rows]
+        
+        return jsonify({
+            'records': records,
+            'sort': sort,
+            'order': order,
+            'next_cursor': next_cursor,
+            'success': True
+        })
             
     except Exception as e:
-        traceback.print_exc()
+        log_event(logger, logging.ERROR, 'records request failed', exc_info=True)
         return jsonify({
             'error': str(e),
             'traceback': traceback.format_exc(),
             'success': False
         }), 500
 
-# Serve the main page
-@app.route('/')
-def index():
-    return send_from_directory('static', 'index.html')
-
-# Serve the standalone page
-@app.route('/standalone')
-def standalone():
-    return send_from_directory('standalone', 'index.html')
-
-@app.route('/standalone/<path:filename>')
-def standalone_files(filename):
-    return send_from_directory('standalone', filename)
-
-# Create a simple fix to update the frontend when model filter changes
-@app.route('/js-fix')
-def js_fix():
-    js_fix_content = """
-// Direct script to fix model filtering
-document.addEventListener('DOMContentLoaded', function() {
-    console.log('Model filtering fix loaded');
-    
-    const applyFiltersBtn = document.getElementById('applyFilters');
-    
-    if (applyFiltersBtn) {
-        console.log('Apply Filters button found, replacing event handler');
+# Stream raw per-request usage rows for offline analysis
+@app.route('/api/export', methods=['GET'])
+def export_usage():
+    try:
+        # Get filters from request
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        model = request.args.get('model', 'all')
+        export_format = request.args.get('format', 'ndjson')
         
-        // Clone to remove old handlers
-        const newBtn = applyFiltersBtn.cloneNode(true);
-        applyFiltersBtn.parentNode.replaceChild(newBtn, applyFiltersBtn);
+        # Validate dates
+        if not start_date or not end_date:
+            return jsonify({
+                'error': 'Start date and end date are required',
+                'success': False
+            }), 400
         
-        // Add new handler
-        newBtn.addEventListener('click', function() {
-            console.log('Apply Filters clicked (fixed handler)');
-            
-            // Get filters
-            const dateRange = $('#dateRangePicker').data('daterangepicker');
-            const modelFilter = document.getElementById('modelFilter');
-            
-            if (dateRange && modelFilter) {
-                const startDate = dateRange.startDate.format('YYYY-MM-DD');
-                const endDate = dateRange.endDate.format('YYYY-MM-DD');
-                const modelValue = modelFilter.value;
-                
-                console.log('Filters:', { startDate, endDate, model: modelValue });
-                
-                // Clear all visualizations
-                clearVisualizations();
-                
-                // Load data with new filters
-                loadFilteredData(startDate, endDate, modelValue);
-            }
-        });
-    }
-    
-    function clearVisualizations() {
-        // Clear stats
-        document.getElementById('totalRequests').textContent = '0';
-        document.getElementById('totalTokens').textContent = '0';
-        document.getElementById('totalCost').textContent = '$0.00';
-        document.getElementById('avgCost').textContent = '$0.00';
-        
-        // Clear tables
-        document.getElementById('tableBody').innerHTML = '';
-        document.getElementById('highCostTableBody').innerHTML = '';
-        
-        // Clear charts
-        if (window.tokenUsageChart) {
-            window.tokenUsageChart.data.labels = [];
-            window.tokenUsageChart.data.datasets[0].data = [];
-            window.tokenUsageChart.data.datasets[1].data = [];
-            window.tokenUsageChart.update();
-        }
+        if export_format not in ('ndjson', 'csv'):
+            return jsonify({
+                'error': f'Invalid format: {export_format}. Expected ndjson or csv.',
+                'success': False
+            }), 400
         
-        if (window.costChart) {
-            window.costChart.data.labels = [];
-            window.costChart.data.datasets[0].data = [];
-            window.costChart.update();
-        }
+        # Checked before the stream starts: once the 200 is sent, a bad
+        # range could only cut the download short
+        try:
+            start = datetime.strptime(start_date, '%Y-%m-%d')
+            end = datetime.strptime(end_date, '%Y-%m-%d')
+        except ValueError:
+            return jsonify({
+                'error': f'Invalid date: {start_date} to {end_date}. Expected YYYY-MM-DD.',
+                'success': False
+            }), 400
         
-        if (window.tokenDistributionChart) {
-            window.tokenDistributionChart.data.datasets[0].data = [0, 0];
-            window.tokenDistributionChart.update();
-        }
+        if start > end:
+            return jsonify({
+                'error': f'start_date {start_date} is after end_date {end_date}',
+                'success': False
+            }), 400
+        start_date, end_date = start.date().isoformat(), end.date().isoformat()
+        
+        # Bring the derived usage facts up to date with the logs database
+        with phase('sync'):
+            sync_usage_facts(get_db_paths())
+        
+        # Months with a current snapshot are read from memory-mapped Arrow
+        # files, the rest (including the recent tail) from SQLite
+        batches = iter_usage_history(start_date, end_date, model)
+        
+        # Each batch is encoded and sent before the next is fetched, so the
+        # worker's memory stays flat no matter how many rows are exported
+        def generate_ndjson():
+            for batch in batches:
+                yield ''.join(json.dumps(dict(zip(EXPORT_COLUMNS, row))) + '\n' for row in batch)
+        
+        def generate_csv():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS)
+            for batch in batches:
+                writer.writerows(batch)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            # Header only, when the range is empty
+            if buffer.tell():
+                yield buffer.getvalue()
+        
+        if export_format == 'csv':
+            body, mimetype = generate_csv(), 'text/csv'
+        else:
+            body, mimetype = generate_ndjson(), 'application/x-ndjson'
         
-        if (window.costEfficiencyChart) {
-            window.costEfficiencyChart.data.labels = [];
-            window.costEfficiencyChart.data.datasets[0].data = [];
-            window.costEfficiencyChart.update();
-        }
-    }
+        filename = f"llm-usage-{start_date}-to-{end_date}.{export_format}"
+        return Response(body, mimetype=mimetype, headers={
+            'Content-Disposition': f'attachment; filename="{filename}"'
+        })
+            
+    except Exception as e:
+        log_event(logger, logging.ERROR, 'export request failed', exc_info=True)
+        return jsonify({
+            'error': str(e),
+            'traceback': traceback.format_exc(),
+            'success': False
+        }), 500
+
+# Helper function to encode one Server-Sent Events message
+def sse_message(event, data, id=None):
+    lines = [f"event: {event}"]
+    if id is not None:
+        lines.append(f"id: {id}")
+    lines.append(f"data: {json.dumps(data)}")
+    return '\n'.join(lines) + '\n\n'
+
+# Push usage deltas to the dashboard as new responses are logged
+@app.route('/api/live', methods=['GET'])
+def live_usage():
+    try:
+        # EventSource resends the id of the last event it saw on reconnect
+        after = request.headers.get('Last-Event-ID') or request.args.get('after')
+        after = int(after) if after else None
+    except ValueError:
+        return jsonify({
+            'error': 'after must be an integer cursor',
+            'success': False
+        }), 400
     
-    function loadFilteredData(startDate, endDate, model) {
-        // Show loading
-        document.getElementById('loadingOverlay').style.display = 'flex';
-        
-        // Load data
-        $.ajax({
-            url: `/api/token-data?start_date=${startDate}&end_date=${endDate}&model=${encodeURIComponent(model)}`,
-            method: 'GET',
-            success: function(data) {
-                console.log('Data loaded successfully:', data);
-                
-                if (data.success) {
-                    // Update stats
-                    document.getElementById('totalRequests').textContent = formatNumber(data.overall_stats.total_requests);
-                    document.getElementById('totalTokens').textContent = formatNumber(data.overall_stats.total_tokens);
-                    document.getElementById('totalCost').textContent = formatCurrency(data.overall_stats.total_cost);
-                    document.getElementById('avgCost').textContent = formatCurrency(data.overall_stats.avg_cost_per_request);
-                    
-                    // Update charts
-                    updateCharts(data);
-                    
-                    // Update table
-                    updateTable(data.model_data);
-                    
-                    // Load high-cost records
-                    loadHighCostRecords(startDate, endDate, model);
-                } else {
-                    console.error('API returned error:', data.error);
-                    hideLoading();
-                }
-            },
-            error: function(xhr, status, error) {
-                console.error('API request failed:', error);
-                hideLoading();
-            }
-        });
-    }
+    try:
+        with phase('sync'):
+            sync_usage_facts(get_db_paths())
+        latest = latest_fact_rowid()
+        cursor = latest if after is None else after
+    except Exception as e:
+        log_event(logger, logging.ERROR, 'live stream setup failed', exc_info=True)
+        return jsonify({
+            'error': str(e),
+            'traceback': traceback.format_exc(),
+            'success': False
+        }), 500
     
-    function loadHighCostRecords(startDate, endDate, model) {
-        $.ajax({
-            url: `/api/sample-records?start_date=${startDate}&end_date=${endDate}&model=${encodeURIComponent(model)}`,
-            method: 'GET',
-            success: function(data) {
-                hideLoading();
-                
-                if (data.success) {
-                    // Update high-cost table
-                    updateHighCostTable(data.records);
-                } else {
-                    console.error('API returned error:', data.error);
-                }
-            },
-            error: function(xhr, status, error) {
-                console.error('High-cost records request failed:', error);
-                hideLoading();
-            }
-        });
-    }
+    if not live_slots.acquire(blocking=False):
+        response = jsonify({
+            'error': 'Too many live streams open, try again shortly',
+            'success': False
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = str(RETRY_AFTER)
+        return response
     
-    function updateCharts(data) {
-        // Update token usage chart
-        if (window.tokenUsageChart) {
-            const models = data.model_data.map(item => {
-                const parts = item.model.split('/');
-                return parts.length > 1 ? parts[parts.length - 1] : item.model;
-            });
-            const promptTokens = data.model_data.map(item => parseInt(item.prompt_tokens) || 0);
-            const completionTokens = data.model_data.map(item => parseInt(item.completion_tokens) || 0);
-            
-            window.tokenUsageChart.data.labels = models;
-            window.tokenUsageChart.data.datasets[0].data = promptTokens;
-            window.tokenUsageChart.data.datasets[1].data = completionTokens;
-            window.tokenUsageChart.update();
-        }
+    def generate(cursor, latest):
+        version, _ = combined_data_version(get_db_paths())
+        deadline = time.monotonic() + LIVE_STREAM_SECONDS
+        last_sent = time.monotonic()
         
-        // Update cost chart
-        if (window.costChart) {
-            const models = data.model_data.map(item => {
-                const parts = item.model.split('/');
-                return parts.length > 1 ? parts[parts.length - 1] : item.model;
-            });
-            const costs = data.model_data.map(item => parseFloat(item.total_cost) || 0);
-            
-            window.costChart.data.labels = models;
-            window.costChart.data.datasets[0].data = costs;
-            window.costChart.update();
-        }
+        # Tell the browser how long to wait before reconnecting
+        yield f"retry: {int(INGEST_POLL_INTERVAL * 1000)}\n"
+        yield sse_message('ready', {'cursor': cursor}, id=cursor)
         
-        // Update token distribution chart
-        if (window.tokenDistributionChart) {
-            window.tokenDistributionChart.data.datasets[0].data = [
-                parseInt(data.overall_stats.total_prompt_tokens) || 0,
-                parseInt(data.overall_stats.total_completion_tokens) || 0
-            ];
-            window.tokenDistributionChart.update();
-        }
-        
-        // Update cost efficiency chart
-        if (window.costEfficiencyChart) {
-            const models = data.model_data.map(item => {
-                const parts = item.model.split('/');
-                return parts.length > 1 ? parts[parts.length - 1] : item.model;
-            });
-            const costPer1kTokens = data.model_data.map(item => parseFloat(item.cost_per_1k_tokens) || 0);
+        try:
+            while time.monotonic() < deadline:
+                if cursor > latest:
+                    # The facts database was rebuilt since this cursor was
+                    # issued; the browser has to reload the full aggregates
+                    cursor = latest
+                    yield sse_message('reset', {'cursor': cursor}, id=cursor)
+                    last_sent = time.monotonic()
+                elif cursor < latest:
+                    cursor, deltas = usage_deltas_since(cursor)
+                    yield sse_message('usage', {'cursor': cursor, 'deltas': deltas}, id=cursor)
+                    last_sent = time.monotonic()
+                elif time.monotonic() - last_sent >= LIVE_HEARTBEAT_SECONDS:
+                    yield ": keep-alive\n\n"
+                    last_sent = time.monotonic()
             
-            window.costEfficiencyChart.data.labels = models;
-            window.costEfficiencyChart.data.datasets[0].data = costPer1kTokens;
-            window.costEfficiencyChart.update();
-        }
-    }
-    
-    function updateTable(data) {
-        const tableBody = document.getElementById('tableBody');
-        
-        if (tableBody) {
-            tableBody.innerHTML = '';
+                time.sleep(INGEST_POLL_INTERVAL)
             
-            data.forEach(item => {
-                const row = document.createElement('tr');
-                
-                row.innerHTML = `
-                    <td>${item.model}</td>
-                    <td>${formatNumber(item.requests)}</td>
-                    <td>${formatNumber(item.prompt_tokens)}</td>
-                    <td>${formatNumber(item.completion_tokens)}</td>
-                    <td>${formatNumber(item.total_tokens)}</td>
-                    <td>${formatCurrency(item.total_cost)}</td>
-                    <td>${formatCurrency(item.avg_cost_per_request)}</td>
-                    <td>${formatCurrency(item.cost_per_1k_tokens)}</td>
-                `;
-                
-                tableBody.appendChild(row);
-            });
-        }
-    }
+                # Only touch the facts database once the logs database changed
+                new_version, _ = combined_data_version(get_db_paths())
+                if new_version != version:
+                    version = new_version
+                    sync_usage_facts(get_db_paths())
+                latest = latest_fact_rowid()
+        except Exception:
+            # Ends the stream; the browser reconnects from its last event id
+            log_event(logger, logging.ERROR, 'live stream failed', exc_info=True)
     
-    function updateHighCostTable(data) {
-        const highCostTableBody = document.getElementById('highCostTableBody');
-        
-        if (highCostTableBody) {
-            highCostTableBody.innerHTML = '';
-            
-            data.forEach(item => {
-                const row = document.createElement('tr');
-                
-                row.innerHTML = `
-                    <td>${item.id}</td>
-                    <td>${item.model}</td>
-                    <td>${formatNumber(item.prompt_tokens)}</td>
-                    <td>${formatNumber(item.completion_tokens)}</td>
-                    <td>${formatNumber(item.total_tokens)}</td>
-                    <td>${formatCurrency(item.cost)}</td>
-                    <td>${item.datetime}</td>
-                `;
-                
-                highCostTableBody.appendChild(row);
-            });
-        }
-    }
-    
-    function hideLoading() {
-        document.getElementById('loadingOverlay').style.display = 'none';
-    }
-    
-    function formatNumber(num) {
-        return new Intl.NumberFormat().format(Math.round(num || 0));
-    }
-    
-    function formatCurrency(num) {
-        return '$' + (parseFloat(num) || 0).toFixed(2);
-    }
-});
-    """
-    return js_fix_content, 200, {'Content-Type': 'application/javascript'}
+    response = Response(generate(cursor, latest), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # Runs when the server closes the stream, including on disconnect
+    response.call_on_close(live_slots.release)
+    return response
+
+# Request and phase latency histograms in the Prometheus text format
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    pool = query_pool.stats()
+    body = render_metrics([
+        ('llm_dashboard_query_workers', 'Worker threads in the query pool.', pool['workers']),
+        ('llm_dashboard_query_running', 'Offloaded requests running now.', pool['running']),
+        ('llm_dashboard_query_queued', 'Offloaded requests waiting for a worker.', pool['queued'])
+    ], counters())
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+# Serve the main page, pointing at the current bundles
+@app.route('/')
+def index():
+    return asset_response(current_build().index)
+
+# Serve the content-hashed JS/CSS bundles built from static/src/
+@app.route('/assets/<name>')
+def bundled_asset(name):
+    build = current_build()
+    if name in build.assets:
+        return asset_response(build.assets[name], immutable=True)
+    # A logical name (dashboard.js) gets whatever is current, revalidated
+    if name in build.manifest:
+        return asset_response(build.assets[build.manifest[name]])
+    return jsonify({'error': f'unknown asset {name}', 'success': False}), 404
+
+# Serve the standalone page
+@app.route('/standalone')
+def standalone():
+    return send_from_directory('standalone', 'index.html')
+
+@app.route('/standalone/<path:filename>')
+def standalone_files(filename):
+    return send_from_directory('standalone', filename)
 
 if __name__ == '__main__':
+    # Tail new responses in the background; with the debug reloader only the
+    # child process that actually serves requests needs the thread
+    if not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_ingestion_thread(get_db_paths)
     app.run(debug=True, host='0.0.0.0', port=5000)
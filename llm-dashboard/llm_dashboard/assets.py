@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""Build step for the dashboard's own JavaScript and CSS.
+
+The page's script and styles live as plain sources in static/src/. build()
+concatenates them into one JS and one CSS bundle, minifies each, names it
+after a hash of its content (dashboard.<hash>.js) and precompresses it with
+gzip, and with brotli when the brotli module is installed. The page itself
+refers to the logical names (/assets/dashboard.js); the hashed names are
+substituted when index.html is served.
+
+The server builds in memory on the first request and again whenever a
+source file changes, so editing a file under static/src/ is enough during
+development. Hashed assets never change, so they are served with a year-long
+immutable Cache-Control; only the small index page is revalidated.
+
+    python assets.py [out_dir]
+
+writes the bundles, their .gz/.br files, the rendered index.html and a
+manifest.json to static/dist/ (or out_dir), for serving from a proxy.
+rjsmin and rcssmin are used for minifying when installed; otherwise a
+built-in minifier strips comments and whitespace outside string literals.
+"""
+import os
+import re
+import sys
+import gzip
+import json
+import hashlib
+import logging
+import threading
+from collections import namedtuple
+
+from log import get_logger, log_event
+
+logger = get_logger('assets')
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+# Bundle name -> sources under static/, in load order. The inspector comes
+# after the dashboard so its globals exist by the time it is used.
+BUNDLES = {
+    'dashboard.js': ['src/dashboard.js', 'src/inspector.js'],
+    'dashboard.css': ['src/dashboard.css'],
+}
+
+# Page that refers to the bundles by their logical names
+INDEX_PAGE = 'index.html'
+
+# URL prefix the bundles are served under
+ASSET_PREFIX = '/assets/'
+
+MIMETYPES = {
+    '.js': 'application/javascript; charset=utf-8',
+    '.css': 'text/css; charset=utf-8',
+    '.html': 'text/html; charset=utf-8',
+}
+
+# A built file: raw content and its precompressed forms (br is None
+# without the brotli module)
+Asset = namedtuple('Asset', ['name', 'mimetype', 'body', 'gzip', 'br', 'etag'])
+
+# Built bundles: hashed name -> Asset, the rendered index page, and the
+# logical -> hashed name manifest
+Build = namedtuple('Build', ['assets', 'index', 'manifest'])
+
+
+# Characters after which a '/' starts a regular expression, not a division
+_REGEX_AFTER = set('(,=:[!&|?{};+-*%<>~^')
+# Keywords after which a '/' starts a regular expression
+_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'delete', 'throw'}
+# A line break after these, or before the closing ones, can't end a
+# statement; '+' and '-' are left out because of postfix ++ and --
+_CONTINUES = set('{([,;=:?&|<>*%!~^')
+_CLOSERS = set('})],.;?:')
+
+
+def _is_word(c):
+    return c.isalnum() or c in '_$'
+
+
+def minify_js(source):
+    """Strip comments and redundant whitespace from JavaScript.
+
+    Strings, template literals and regular expressions are copied verbatim.
+    Line breaks are kept wherever automatic semicolon insertion could
+    depend on them.
+    """
+    if rjsmin is not None:
+        return rjsmin.jsmin(source)
+
+    out = []
+    pending = ''  # whitespace seen since the last token: '', ' ' or '\n'
+    i = 0
+    n = len(source)
+
+    def emit(token):
+        nonlocal pending
+        if pending and out:
+            before, after = out[-1][-1], token[0]
+            if pending == '\n' and before not in _CONTINUES and after not in _CLOSERS:
+                out.append('\n')
+            elif (_is_word(before) and _is_word(after)) or (before in '+-/' and after in '+-/'):
+                # Keep 'return x' and 'a - -b' apart
+                out.append(' ')
+        pending = ''
+        out.append(token)
+
+    while i < n:
+        c = source[i]
+        if c in ' \t\r\n':
+            j = i
+            while j < n and source[j] in ' \t\r\n':
+                j += 1
+            if '\n' in source[i:j]:
+                pending = '\n'
+            elif not pending:
+                pending = ' '
+            i = j
+        elif source.startswith('//', i):
+            j = source.find('\n', i)
+            i = n if j == -1 else j
+        elif source.startswith('/*', i):
+            j = source.find('*/', i + 2)
+            j = n if j == -1 else j + 2
+            pending = '\n' if '\n' in source[i:j] else pending or ' '
+            i = j
+        elif c in '\'"`' or (c == '/' and (
+            not out or out[-1] in _REGEX_KEYWORDS
+            or (not _is_word(out[-1][-1]) and out[-1][-1] in _REGEX_AFTER)
+        )):
+            j = _skip_literal(source, i)
+            emit(source[i:j])
+            i = j
+        elif _is_word(c):
+            j = i + 1
+            while j < n and (_is_word(source[j]) or source[j] == '.'):
+                j += 1
+            emit(source[i:j])
+            i = j
+        else:
+            emit(c)
+            i += 1
+    return ''.join(out) + '\n'
+
+
+def _skip_literal(source, i):
+    """Return the index just past the string, template or regex starting at i."""
+    quote = source[i]
+    n = len(source)
+    j = i + 1
+    depth = 0  # nesting of ${ ... } inside a template literal
+    in_class = False
+    while j < n:
+        c = source[j]
+        if c == '\\':
+            j += 2
+            continue
+        if quote == '`' and source.startswith('${', j):
+            # Skip the embedded expression, including any nested literals
+            depth = 1
+            j += 2
+            while j < n and depth:
+                if source[j] in '\'"`':
+                    j = _skip_literal(source, j)
+                    continue
+                depth += {'{': 1, '}': -1}.get(source[j], 0)
+                j += 1
+            continue
+        if quote == '/':
+            if c == '[':
+                in_class = True
+            elif c == ']':
+                in_class = False
+            elif c == '/' and not in_class:
+                j += 1
+                while j < n and source[j].isalpha():
+                    j += 1
+                return j
+        elif c == quote:
+            return j + 1
+        j += 1
+    return j
+
+
+def minify_css(source):
+    """Strip comments and redundant whitespace from CSS."""
+    if rcssmin is not None:
+        return rcssmin.cssmin(source)
+    css = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}')
+    return css.strip() + '\n'
+
+
+def _asset(name, body):
+    """Return the Asset for a built file, with its compressed forms."""
+    mimetype = MIMETYPES[os.path.splitext(name)[1]]
+    # mtime=0 keeps the .gz bytes identical between builds
+    compressed = gzip.compress(body, compresslevel=9, mtime=0)
+    br = brotli.compress(body, quality=11) if BROTLI_AVAILABLE else None
+    etag = hashlib.sha256(body).hexdigest()[:16]
+    return Asset(name, mimetype, body, compressed, br, etag)
+
+
+def build(static_dir=STATIC_DIR):
+    """Build every bundle and the index page that refers to them."""
+    assets = {}
+    manifest = {}
+    for name, sources in BUNDLES.items():
+        parts = []
+        for source in sources:
+            with open(os.path.join(static_dir, source), 'r', encoding='utf-8') as f:
+                parts.append(f.read())
+        if name.endswith('.js'):
+            # Each source ends its last statement, so they can't run together
+            body = ';\n'.join(minify_js(part) for part in parts)
+        else:
+            body = ''.join(minify_css(part) for part in parts)
+        body = body.encode('utf-8')
+        stem, ext = os.path.splitext(name)
+        hashed = f"{stem}.{hashlib.sha256(body).hexdigest()[:12]}{ext}"
+        assets[hashed] = _asset(hashed, body)
+        manifest[name] = hashed
+
+    with open(os.path.join(static_dir, INDEX_PAGE), 'r', encoding='utf-8') as f:
+        page = f.read()
+    for name, hashed in manifest.items():
+        page = page.replace(ASSET_PREFIX + name, ASSET_PREFIX + hashed)
+    index = _asset(INDEX_PAGE, page.encode('utf-8'))
+
+    return Build(assets, index, manifest)
+
+
+def _signature(static_dir):
+    """Return the (path, mtime, size) of every input of build()."""
+    paths = [INDEX_PAGE] + [source for sources in BUNDLES.values() for source in sources]
+    signature = []
+    for path in paths:
+        stat = os.stat(os.path.join(static_dir, path))
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+_current = {}
+_current_lock = threading.Lock()
+
+
+def current_build(static_dir=STATIC_DIR):
+    """Return the Build for the sources as they are now, rebuilding on change.
+
+    Hashed assets of earlier builds stay servable, so a page loaded just
+    before a rebuild can still fetch the bundle it refers to.
+    """
+    signature = _signature(static_dir)
+    with _current_lock:
+        cached = _current.get(static_dir)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        result = build(static_dir)
+        if cached:
+            result = Build({**cached[1].assets, **result.assets}, result.index, result.manifest)
+        _current[static_dir] = (signature, result)
+
+    log_event(logger, logging.INFO, 'built frontend bundles', **{
+        name: f"{hashed} ({len(result.assets[hashed].body)} bytes)"
+        for name, hashed in result.manifest.items()
+    })
+    return result
+
+
+def pick_encoding(asset, accept_encoding):
+    """Return (encoding, body) of the best form of asset for an Accept-Encoding header."""
+    accepted = {
+        part.split(';')[0].strip()
+        for part in (accept_encoding or '').lower().split(',')
+        if not part.strip().endswith(';q=0')
+    }
+    if asset.br is not None and 'br' in accepted:
+        return 'br', asset.br
+    if 'gzip' in accepted:
+        return 'gzip', asset.gzip
+    return None, asset.body
+
+
+def write_build(result, out_dir):
+    """Write a Build to out_dir, with .gz and .br files next to each asset."""
+    os.makedirs(out_dir, exist_ok=True)
+    for asset in list(result.assets.values()) + [result.index]:
+        path = os.path.join(out_dir, asset.name)
+        for suffix, body in (('', asset.body), ('.gz', asset.gzip), ('.br', asset.br)):
+            if body is not None:
+                with open(path + suffix, 'wb') as f:
+                    f.write(body)
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump(result.manifest, f, indent=2)
+
+
+if __name__ == '__main__':
+    out_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(STATIC_DIR, 'dist')
+    result = build()
+    write_build(result, out_dir)
+    for name, hashed in result.manifest.items():
+        asset = result.assets[hashed]
+        sizes = f"{len(asset.body)} bytes, {len(asset.gzip)} gzip"
+        if asset.br is not None:
+            sizes += f", {len(asset.br)} brotli"
+        print(f"{name} -> {hashed} ({sizes})")
+    print(f"written to {out_dir}")
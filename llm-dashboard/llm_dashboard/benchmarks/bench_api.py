@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""End-to-end benchmark of the dashboard API over a synthetic logs.db.
+
+Generates a logs database with make_logs_db (or uses --db), points the app
+at it with a fresh usage facts file, and times the first sync followed by
+repeated requests to /api/token-data, /api/sample-records, /api/models and
+/api/date-range through Flask's test client. /api/token-data is measured
+twice: with its response cache cleared before every request, and warm.
+
+Each endpoint reports mean, p50, p95 and max latency, requests per second
+and the peak Python memory allocated while serving one request, measured
+with tracemalloc on an extra, untimed request. SQLite's page cache is
+allocated outside Python and isn't counted there; the first sync reports
+the process's peak RSS instead. --out saves the results as
+JSON; --compare prints the change against an earlier results file, so runs
+before and after a change can be set side by side.
+
+Usage: python benchmarks/bench_api.py [--rows 10k|1m|10m|N | --db logs.db] [--repeat 20] [--out results.json] [--compare baseline.json]
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+sys.path.insert(0, HERE)
+
+from make_logs_db import SCALES, generate, parse_rows
+
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))]
+
+
+def time_requests(client, url, repeat, before=None):
+    """Request url repeat times and return its latency summary."""
+    timings = []
+    for _ in range(repeat):
+        if before:
+            before()
+        started = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    timings.sort()
+    return {
+        'mean_ms': sum(timings) / len(timings),
+        'p50_ms': percentile(timings, 50),
+        'p95_ms': percentile(timings, 95),
+        'max_ms': timings[-1],
+        'requests_per_second': len(timings) / (sum(timings) / 1000),
+        'peak_alloc_mb': peak_alloc_mb(client, url, before),
+    }
+
+
+def peak_alloc_mb(client, url, before=None):
+    """Return the peak Python memory allocated while serving url once, in MB.
+
+    Tracing slows every allocation, so it is only on for this one request
+    and never while timing. The peak starts from zero for each endpoint,
+    whatever ran before it.
+    """
+    if before:
+        before()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        client.get(url)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (peak - baseline) / (1024 * 1024)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(db_path, repeat, workdir):
+    # The facts file and module settings are read at import time, so the
+    # environment has to be in place before app is imported
+    os.environ['LLM_DASHBOARD_FACTS_DB'] = os.path.join(workdir, 'usage_facts.db')
+    os.environ.pop('LLM_DASHBOARD_CACHE_DIR', None)
+    os.environ.pop('LLM_DASHBOARD_DBS', None)
+    import app
+    from usage_facts import sync_usage_facts
+
+    app.DB_PATH = db_path
+    app.app.config['DEBUG'] = False
+    client = app.app.test_client()
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        first_day, last_day = conn.execute(
+            "SELECT substr(MIN(datetime_utc), 1, 10), substr(MAX(datetime_utc), 1, 10) FROM responses"
+        ).fetchone()
+
+    started = time.perf_counter()
+    sync_usage_facts(app.get_db_paths())
+    ingest_seconds = time.perf_counter() - started
+
+    window = f"start_date={first_day}&end_date={last_day}"
+    endpoints = {
+        'token-data (uncached)': (f"/api/token-data?{window}", app.token_data_cache.clear),
+        'token-data (cached)': (f"/api/token-data?{window}", None),
+        'token-data by month': (f"/api/token-data?{window}&granularity=month", app.token_data_cache.clear),
+        'sample-records': (f"/api/sample-records?{window}&limit=100", None),
+        'models': ('/api/models', None),
+        'date-range': ('/api/date-range', None),
+    }
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'rows': rows,
+            'repeat': repeat,
+            'run_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        },
+        'ingest': {
+            'seconds': ingest_seconds,
+            'rows_per_second': rows / ingest_seconds if ingest_seconds else None,
+            'peak_rss_mb': peak_rss_mb(),
+        },
+        'endpoints': {},
+    }
+    for name, (url, before) in endpoints.items():
+        results['endpoints'][name] = time_requests(client, url, repeat, before)
+    return results
+
+
+def print_results(results, baseline=None):
+    meta = results['meta']
+    ingest = results['ingest']
+    print(f"{meta['rows']:,} responses, commit {meta['commit']}, "
+          f"Python {meta['python']}, SQLite {meta['sqlite']}")
+    print(f"first sync: {ingest['seconds']:.2f} s ({ingest['rows_per_second']:,.0f} rows/s), "
+          f"peak RSS {ingest['peak_rss_mb']:.0f} MB")
+    print(f"{'endpoint':<24} {'mean':>9} {'p50':>9} {'p95':>9} {'max':>9} {'req/s':>9} {'heap MB':>8}")
+    for name, stats in results['endpoints'].items():
+        line = (f"{name:<24} {stats['mean_ms']:>7.2f}ms {stats['p50_ms']:>7.2f}ms {stats['p95_ms']:>7.2f}ms "
+                f"{stats['max_ms']:>7.2f}ms {stats['requests_per_second']:>9,.0f} {stats['peak_alloc_mb']:>8.2f}")
+        previous = (baseline or {}).get('endpoints', {}).get(name)
+        if previous:
+            line += f"  p50 {(stats['p50_ms'] / previous['p50_ms'] - 1) * 100:+.0f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the dashboard API over a synthetic logs.db')
+    parser.add_argument('--rows', type=parse_rows, default=SCALES['10k'],
+                        help='responses to generate, or one of: ' + ', '.join(SCALES))
+    parser.add_argument('--db', help='benchmark an existing logs.db instead of generating one')
+    parser.add_argument('--repeat', type=int, default=20, help='requests per endpoint')
+    parser.add_argument('--out', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='results JSON of an earlier run to compare against')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='llm-dashboard-bench-') as workdir:
+        db_path = args.db
+        if not db_path:
+            db_path = os.path.join(workdir, 'logs.db')
+            started = time.perf_counter()
+            generate(db_path, args.rows)
+            print(f"Generated {args.rows:,} responses in {time.perf_counter() - started:.1f} s")
+        results = run(os.path.abspath(db_path), args.repeat, workdir)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for format_date on a synthetic datetime_utc column.
+
+Compares the original strptime-loop implementation (kept below verbatim,
+including its per-call print, with stdout sent to /dev/null) against the
+current dates.format_date, and reports rows per second for each.
+
+Usage: python benchmarks/bench_format_date.py [rows]
+"""
+import os
+import sys
+import time
+import random
+import contextlib
+import traceback
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from dates import format_date, normalize_timestamp
+
+
+# The implementation format_date replaced, for the "before" numbers
+def legacy_format_date(date_str):
+    try:
+        if date_str is None:
+            return None
+        print(f"Parsing date: {date_str}")
+        formats_to_try = [
+            '%Y-%m-%dT%H:%M:%S.%f',
+            '%Y-%m-%dT%H:%M:%S.%f+00:00',
+            '%Y-%m-%dT%H:%M:%S.%fZ',
+            '%Y-%m-%dT%H:%M:%S',
+            '%Y-%m-%d %H:%M:%S.%f',
+            '%Y-%m-%d %H:%M:%S'
+        ]
+        if '+' in date_str:
+            cleaned_date = date_str.split('+')[0]
+        elif 'Z' in date_str:
+            cleaned_date = date_str.replace('Z', '')
+        else:
+            cleaned_date = date_str
+        for fmt in formats_to_try:
+            try:
+                dt = datetime.strptime(cleaned_date, fmt)
+                return dt.strftime('%Y-%m-%d')
+            except ValueError:
+                continue
+        if 'T' in date_str:
+            date_part = date_str.split('T')[0]
+            try:
+                dt = datetime.strptime(date_part, '%Y-%m-%d')
+                return date_part
+            except ValueError:
+                pass
+        import re
+        match = re.search(r'(\d{4}-\d{2}-\d{2})', date_str)
+        if match:
+            return match.group(1)
+        print(f"Could not parse date: {date_str}")
+        return None
+    except Exception as e:
+        print(f"Error formatting date {date_str}: {e}")
+        traceback.print_exc()
+        return None
+
+
+def make_column(rows, seed=0):
+    """Build a datetime_utc column shaped like a real logs.db.
+
+    Most values use llm's isoformat() with +00:00; a minority use the other
+    layouts format_date has to cope with.
+    """
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 1)
+    column = []
+    for _ in range(rows):
+        dt = start + timedelta(seconds=rng.randrange(2 * 365 * 86400), microseconds=rng.randrange(10 ** 6))
+        roll = rng.random()
+        if roll < 0.9:
+            column.append(dt.isoformat() + '+00:00')
+        elif roll < 0.95:
+            column.append(dt.strftime('%Y-%m-%d %H:%M:%S'))
+        elif roll < 0.99:
+            column.append(dt.isoformat() + 'Z')
+        else:
+            column.append(f"{dt.year}-{dt.month}-{dt.day} {dt:%H:%M:%S}")
+    return column
+
+
+def bench(func, column):
+    """Return rows per second for func over column."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        started = time.perf_counter()
+        for value in column:
+            func(value)
+        elapsed = time.perf_counter() - started
+    return len(column) / elapsed
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    column = make_column(rows)
+
+    # Sanity check: both implementations must agree before timing them
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        mismatches = sum(1 for value in column[:10000] if legacy_format_date(value) != format_date(value))
+    if mismatches:
+        print(f"format_date disagrees with the legacy implementation on {mismatches} rows")
+        sys.exit(1)
+
+    print(f"Synthetic datetime_utc column: {rows:,} rows")
+    before = bench(legacy_format_date, column)
+    print(f"legacy format_date:   {before:>14,.0f} rows/s")
+    after = bench(format_date, column)
+    print(f"format_date:          {after:>14,.0f} rows/s  ({after / before:.1f}x)")
+    normalized = bench(normalize_timestamp, column)
+    print(f"normalize_timestamp:  {normalized:>14,.0f} rows/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for per-row logging in the date and usage hot paths.
+
+Calls dates.format_date over a column of ISO timestamps, and decodes usage
+bodies of which one in ten is malformed the way usage_extract.extract_usage
+does (without its id cache), with each kind of per-row output:
+
+  print per row     the old print() on every call or failure
+  log every row     a logger record on every call or failure
+  sampled           log_sampled: the first few rows, then one in
+                    LOG_SAMPLE_EVERY, with every row counted (what
+                    LLM_DASHBOARD_DEBUG_DATES=1 and the default
+                    WARNING level for failures do)
+  off               debug and warnings disabled: the dates hot path
+                    checks one flag, failures are only counted
+
+Output goes to a line-buffered os.devnull, so every line costs a write
+system call the way it does on a terminal, without the terminal itself;
+a real terminal only widens the gap.
+
+Usage: python benchmarks/bench_logging.py [rows]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import log
+import dates
+import usage_extract
+from dates import format_date
+
+
+def make_rows(rows):
+    """Return (timestamps, bodies) with one malformed body in ten."""
+    timestamps = [f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}T10:00:00.{i % 1000000:06d}" for i in range(rows)]
+    body = json.dumps({
+        'object': 'chat.completion.chunk',
+        'usage': {'prompt_tokens': 10, 'completion_tokens': 5, 'total_tokens': 15, 'cost': 0.0001}
+    })
+    bodies = [(f"r{i}", body[:20] if i % 10 == 0 else body) for i in range(rows)]
+    return timestamps, bodies
+
+
+def old_format_date(date_str):
+    print(f"Parsing date: {date_str}")
+    return format_date(date_str)
+
+
+def decoder(on_failure):
+    """Return extract_usage's decode-and-report step with a given failure report."""
+    def decode(id, model, response_json_str):
+        try:
+            return usage_extract.parse_usage(id, model, response_json_str)
+        except (TypeError, AttributeError, ValueError):
+            on_failure(id)
+            return None
+    return decode
+
+
+old_extract_usage = decoder(lambda id: print(f"Failed to parse JSON for ID: {id}"))
+every_row_extract_usage = decoder(lambda id: log.log_event(
+    usage_extract.logger, logging.WARNING, 'could not decode response_json', id=id
+))
+sampled_extract_usage = decoder(lambda id: log.log_sampled(
+    usage_extract.logger, logging.WARNING, 'json_parse_failures', 'could not decode response_json', id=id
+))
+
+
+def every_row_format_date(date_str):
+    log.log_event(dates.logger, logging.DEBUG, 'parsing date', date=date_str)
+    return format_date(date_str)
+
+
+@contextlib.contextmanager
+def logging_mode(stream, level, debug_dates=False):
+    """Point the dashboard loggers at stream, at level, with dates.DEBUG_DATES set."""
+    root = logging.getLogger(log.ROOT_LOGGER)
+    handler = root.handlers[0]
+    previous_stream = handler.setStream(stream)
+    previous_level = root.level
+    root.setLevel(level)
+    dates.logger.setLevel(level)
+    dates.DEBUG_DATES = debug_dates
+    try:
+        yield
+    finally:
+        dates.DEBUG_DATES = False
+        dates.logger.setLevel(logging.NOTSET)
+        root.setLevel(previous_level)
+        handler.setStream(previous_stream)
+
+
+def bench(func, args_list, runs=3):
+    """Return the best rows per second of func over args_list in a few runs."""
+    best = 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        for args in args_list:
+            func(*args)
+        best = max(best, len(args_list) / (time.perf_counter() - started))
+    return best
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    timestamps, bodies = make_rows(rows)
+    date_args = [(t,) for t in timestamps]
+    body_args = [(id, 'gpt-4o', body) for id, body in bodies]
+
+    with open(os.devnull, 'w', buffering=1) as devnull:
+        # Warm up the allocator and parser before anything is timed
+        with logging_mode(devnull, logging.ERROR):
+            bench(format_date, date_args, runs=2)
+            bench(sampled_extract_usage, body_args, runs=2)
+
+        results = []
+        with contextlib.redirect_stdout(devnull):
+            results.append(('print per row', bench(old_format_date, date_args), bench(old_extract_usage, body_args)))
+        with logging_mode(devnull, logging.DEBUG):
+            results.append(('log every row', bench(every_row_format_date, date_args),
+                            bench(every_row_extract_usage, body_args)))
+        with logging_mode(devnull, logging.DEBUG, debug_dates=True):
+            results.append(('sampled', bench(format_date, date_args), bench(sampled_extract_usage, body_args)))
+        with logging_mode(devnull, logging.ERROR):
+            results.append(('off', bench(format_date, date_args), bench(sampled_extract_usage, body_args)))
+
+    print(f"{rows:,} rows, one body in ten malformed")
+    print(f"{'':<16} {'format_date':>16} {'extract_usage':>16}")
+    baseline_dates, baseline_usage = results[0][1], results[0][2]
+    for name, date_rate, usage_rate in results:
+        print(f"{name:<16} {date_rate:>10,.0f} rows/s {usage_rate:>10,.0f} rows/s  "
+              f"({date_rate / baseline_dates:.1f}x, {usage_rate / baseline_usage:.1f}x)")
+    print(f"counters: {log.counters()}")
+
+
+if __name__ == '__main__':
+    main()
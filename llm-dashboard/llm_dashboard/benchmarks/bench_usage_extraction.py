@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for pulling usage numbers out of streamed response bodies.
+
+Builds an in-memory responses table of large chat.completion.chunk bodies
+and compares decoding each body in Python (what ingestion used to do) with
+usage_extract.fetch_usage(), which asks SQLite for usage.* only. Reports
+rows per second and the peak Python allocation measured by tracemalloc.
+
+Usage: python benchmarks/bench_usage_extraction.py [rows] [chunks_per_body]
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from usage_extract import fetch_usage, parse_usage, JSON_PARSER
+from usage_facts import SYNC_BATCH_SIZE
+
+
+def make_database(rows, chunks_per_body):
+    """Return a connection to an in-memory responses table of streamed bodies."""
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE responses (id TEXT PRIMARY KEY, model TEXT, response_json TEXT)")
+    conn.executemany("INSERT INTO responses VALUES (?, ?, ?)", (
+        (f"r{i:08d}", 'gpt-4o', json.dumps({
+            'id': f"chatcmpl-{i}",
+            'object': 'chat.completion.chunk',
+            'model': 'gpt-4o',
+            'choices': [
+                {'index': 0, 'delta': {'content': 'token '}, 'finish_reason': None}
+                for _ in range(chunks_per_body)
+            ],
+            'usage': {'prompt_tokens': i, 'completion_tokens': 7, 'total_tokens': i + 7, 'cost': 0.0001}
+        }))
+        for i in range(rows)
+    ))
+    return conn
+
+
+def python_decode(conn, batch):
+    rowids = [row[0] for row in batch]
+    placeholders = ','.join('?' * len(rowids))
+    return [
+        parse_usage(id, model, response_json)
+        for id, model, response_json in conn.execute(
+            f"SELECT id, model, response_json FROM responses WHERE rowid IN ({placeholders})", rowids
+        )
+    ]
+
+
+def sql_extract(conn, batch):
+    return list(fetch_usage(conn, batch).values())
+
+
+def bench(func, conn, batches):
+    """Return (rows per second, peak traced bytes) for func over batches.
+
+    Timing and memory are measured in separate passes, because tracemalloc
+    slows allocation-heavy code down far more than the rest.
+    """
+    started = time.perf_counter()
+    count = 0
+    for batch in batches:
+        count += len(func(conn, batch))
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    for batch in batches:
+        func(conn, batch)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count / elapsed, peak
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    chunks_per_body = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    conn = make_database(rows, chunks_per_body)
+
+    keys = conn.execute("SELECT rowid, id, model FROM responses ORDER BY rowid").fetchall()
+    batches = [keys[i:i + SYNC_BATCH_SIZE] for i in range(0, len(keys), SYNC_BATCH_SIZE)]
+    body_size = conn.execute("SELECT AVG(LENGTH(response_json)) FROM responses").fetchone()[0]
+
+    print(f"{rows:,} streamed responses, {body_size / 1024:.1f} KB average body")
+    before, before_peak = bench(python_decode, conn, batches)
+    print(f"full decode ({JSON_PARSER}): {before:>10,.0f} rows/s  peak {before_peak / 1024:,.0f} KB")
+    after, after_peak = bench(sql_extract, conn, batches)
+    print(f"json_extract usage.*:  {after:>10,.0f} rows/s  peak {after_peak / 1024:,.0f} KB  "
+          f"({after / before:.1f}x faster, {before_peak / max(after_peak, 1):.0f}x less memory)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Generate a synthetic llm logs.db for benchmarks.
+
+The responses table has the llm CLI's layout. About four in five rows are
+streamed chat.completion.chunk bodies carrying a usage block, the rest plain
+chat.completion or embedding bodies. Timestamps cycle through every layout
+dates.py understands (ISO with and without microseconds or timezone, space
+separated), and are spread over the requested number of days. Generation is
+seeded, so the same arguments always produce the same database.
+
+Usage: python benchmarks/make_logs_db.py OUT.db [--rows 10k|1m|10m|N] [--days 365] [--seed 0]
+"""
+import os
+import json
+import random
+import sqlite3
+import argparse
+from datetime import datetime, timedelta
+
+# Named scales accepted by --rows
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+
+# Rows written per transaction
+WRITE_BATCH = 20_000
+
+RESPONSES_SCHEMA = """
+CREATE TABLE responses (
+    id TEXT PRIMARY KEY,
+    model TEXT,
+    prompt TEXT,
+    system TEXT,
+    prompt_json TEXT,
+    options_json TEXT,
+    response TEXT,
+    response_json TEXT,
+    conversation_id TEXT,
+    duration_ms INTEGER,
+    datetime_utc TEXT,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    token_details TEXT
+)
+"""
+
+# (model, prompt price, completion price) per million tokens
+MODELS = [
+    ('gpt-4o', 2.5, 10.0),
+    ('gpt-4o-mini', 0.15, 0.6),
+    ('openrouter/anthropic/claude-3.5-sonnet', 3.0, 15.0),
+    ('openrouter/google/gemini-pro-1.5', 1.25, 5.0),
+    ('openrouter/meta-llama/llama-3.1-70b-instruct', 0.4, 0.4),
+]
+
+# Every timestamp layout dates.py has to cope with
+DATE_LAYOUTS = [
+    lambda t: t.isoformat(timespec='microseconds'),
+    lambda t: t.isoformat(timespec='microseconds') + '+00:00',
+    lambda t: t.isoformat(timespec='microseconds') + 'Z',
+    lambda t: t.isoformat(timespec='seconds'),
+    lambda t: t.strftime('%Y-%m-%d %H:%M:%S.%f'),
+    lambda t: t.strftime('%Y-%m-%d %H:%M:%S'),
+]
+
+
+def parse_rows(value):
+    return SCALES.get(value.lower()) or int(value)
+
+
+def make_body(rng, i, model, prompt_price, completion_price):
+    """Return (response_json, prompt_tokens, completion_tokens) for one row."""
+    roll = rng.random()
+    prompt_tokens = int(rng.lognormvariate(6.5, 1.2)) + 1
+    completion_tokens = int(rng.lognormvariate(5.0, 1.0)) + 1
+
+    if roll < 0.8:
+        # A streamed reply: one choices entry per content delta, then usage
+        deltas = rng.randint(5, 60)
+        body = {
+            'id': f"chatcmpl-{i:x}",
+            'object': 'chat.completion.chunk',
+            'created': 1700000000 + i,
+            'model': model,
+            'choices': [
+                {'index': 0, 'delta': {'content': 'lorem ipsum '}, 'finish_reason': None}
+                for _ in range(deltas)
+            ] + [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+            }
+        }
+        # Some providers report cost, some don't
+        if rng.random() < 0.7:
+            body['usage']['cost'] = round(
+                (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6, 8
+            )
+    elif roll < 0.95:
+        body = {
+            'id': f"chatcmpl-{i:x}",
+            'object': 'chat.completion',
+            'model': model,
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': 'lorem ipsum'}}],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+            }
+        }
+    else:
+        body = {'object': 'list', 'data': [{'object': 'embedding', 'index': 0}], 'model': model}
+    return json.dumps(body), prompt_tokens, completion_tokens
+
+
+def generate(path, rows, days=365, seed=0):
+    """Write a responses table of rows synthetic responses to path."""
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute(RESPONSES_SCHEMA)
+
+    start = datetime(2024, 1, 1)
+    step = timedelta(days=days) / rows
+    batch = []
+    for i in range(rows):
+        model, prompt_price, completion_price = MODELS[rng.randrange(len(MODELS))]
+        response_json, prompt_tokens, completion_tokens = make_body(
+            rng, i, model, prompt_price, completion_price
+        )
+        timestamp = start + step * i + timedelta(seconds=rng.random())
+        batch.append((
+            f"01SYN{i:020d}",
+            model,
+            response_json,
+            int(rng.lognormvariate(7.8, 0.6)),
+            DATE_LAYOUTS[i % len(DATE_LAYOUTS)](timestamp),
+            prompt_tokens,
+            completion_tokens,
+        ))
+        if len(batch) == WRITE_BATCH:
+            _write(conn, batch)
+            batch = []
+    if batch:
+        _write(conn, batch)
+    conn.close()
+
+
+def _write(conn, batch):
+    conn.executemany("""
+        INSERT INTO responses (
+            id, model, response_json, duration_ms, datetime_utc, input_tokens, output_tokens
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, batch)
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic llm logs.db')
+    parser.add_argument('out', help='path of the database to create (overwritten)')
+    parser.add_argument('--rows', type=parse_rows, default=SCALES['10k'],
+                        help='number of responses, or one of: ' + ', '.join(SCALES))
+    parser.add_argument('--days', type=int, default=365, help='days the responses are spread over')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    generate(args.out, args.rows, args.days, args.seed)
+    size = os.path.getsize(args.out)
+    print(f"Wrote {args.rows:,} responses to {args.out} ({size / 1024 / 1024:,.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+import os
+import re
+import logging
+from datetime import datetime, timezone
+from functools import lru_cache
+
+from log import get_logger, log_event, log_sampled, count
+
+logger = get_logger('dates')
+
+# Set LLM_DASHBOARD_DEBUG_DATES=1 (or LLM_DASHBOARD_LOG_LEVEL=DEBUG) to log a
+# sample of the dates that get parsed. Read once here, so format_date pays a
+# single global lookup for it while debugging is off.
+if os.environ.get('LLM_DASHBOARD_DEBUG_DATES') == '1':
+    logger.setLevel(logging.DEBUG)
+DEBUG_DATES = logger.isEnabledFor(logging.DEBUG)
+
+# Leading YYYY-MM-DD, which every ISO-8601 timestamp llm writes starts with
+ISO_DAY_RE = re.compile(r'\d{4}-\d{2}-\d{2}', re.ASCII)
+
+# Any YYYY-MM-DD inside the string, used as the last resort
+ANY_DAY_RE = re.compile(r'(\d{4}-\d{2}-\d{2})')
+
+# Formats tried in order by the slow path
+DATE_FORMATS = [
+    '%Y-%m-%dT%H:%M:%S.%f',  # With microseconds
+    '%Y-%m-%dT%H:%M:%S.%f+00:00',  # With timezone
+    '%Y-%m-%dT%H:%M:%S.%fZ',  # With Z timezone
+    '%Y-%m-%dT%H:%M:%S',  # Without microseconds
+    '%Y-%m-%d %H:%M:%S.%f',  # Space separator with microseconds
+    '%Y-%m-%d %H:%M:%S'  # Space separator without microseconds
+]
+
+# Helper function to format dates for display
+def format_date(date_str):
+    """Return the YYYY-MM-DD day of a stored datetime string, or None."""
+    if date_str is None:
+        return None
+
+    if DEBUG_DATES:
+        log_sampled(logger, logging.DEBUG, 'dates_parsed', 'parsing date', date=date_str)
+
+    # Fast path: a zero-padded ISO date prefix is exactly what every format
+    # below would have produced, so there is nothing more to parse
+    if ISO_DAY_RE.match(date_str):
+        return date_str[:10]
+
+    return _format_date_slow(date_str)
+
+# Unusual formats are memoised, since a database that uses one uses it a lot
+@lru_cache(maxsize=4096)
+def _format_date_slow(date_str):
+    try:
+        # Remove timezone if present (we'll handle it separately)
+        if '+' in date_str:
+            cleaned_date = date_str.split('+')[0]
+        elif 'Z' in date_str:
+            cleaned_date = date_str.replace('Z', '')
+        else:
+            cleaned_date = date_str
+        
+        # Try each format
+        for fmt in DATE_FORMATS:
+            try:
+                dt = datetime.strptime(cleaned_date, fmt)
+                return dt.strftime('%Y-%m-%d')
+            except ValueError:
+                continue
+                
+        # If all formats fail, try to extract just the date part
+        if 'T' in date_str:
+            date_part = date_str.split('T')[0]
+            try:
+                dt = datetime.strptime(date_part, '%Y-%m-%d')
+                return date_part
+            except ValueError:
+                pass
+        
+        # Last resort - match any YYYY-MM-DD pattern
+        match = ANY_DAY_RE.search(date_str)
+        if match:
+            return match.group(1)
+        
+        # If all formats fail, return None. Results are memoised, so this
+        # counts each distinct unparseable string once
+        count('date_parse_failures')
+        if DEBUG_DATES:
+            log_event(logger, logging.DEBUG, 'could not parse date', date=date_str)
+        return None
+    except Exception as e:
+        log_sampled(logger, logging.WARNING, 'date_format_errors', 'error formatting date',
+                    date=date_str, error=str(e))
+        return None
+
+# Helper function to turn a stored datetime into a sortable UTC timestamp
+def normalize_timestamp(date_str):
+    """Return date_str as 'YYYY-MM-DDTHH:MM:SS.ffffff' in UTC, or None.
+
+    The fixed-width form sorts lexically in time order, so it can be indexed
+    and range-filtered directly in SQL.
+    """
+    if date_str is None:
+        return None
+
+    try:
+        dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+        if dt.tzinfo is not None:
+            dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+        return dt.isoformat(timespec='microseconds')
+    except ValueError:
+        pass
+
+    # Fall back to the day alone for anything fromisoformat rejects
+    day = format_date(date_str)
+    if day:
+        return f"{day}T00:00:00.000000"
+    return None
+
+
+# Helper function to turn an inclusive day range into timestamp bounds
+def day_range_bounds(start_date, end_date):
+    """Return (first, last) normalized timestamps covering both days."""
+    return f"{start_date}T00:00:00.000000", f"{end_date}T23:59:59.999999"
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Pooled read-only SQLite connections for the dashboard.
+
+Request handlers borrow a connection with
+
+    with readonly_connection(path) as conn:
+        ...
+
+and it is handed back to the pool however the block exits, including early
+returns and exceptions. Connections are opened with a mode=ro URI and
+query_only, so the dashboard can never take a write lock on a database the
+llm CLI is logging into.
+
+A connection stays on the file it opened even if that path is later
+replaced, as copying a database in with a temp file and a rename does. Each
+pool therefore checks the file's inode when a connection is borrowed and
+drops its connections once the path points at a different file.
+"""
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
+
+# Idle connections kept per database file
+POOL_SIZE = int(os.environ.get('LLM_DASHBOARD_POOL_SIZE', '8'))
+
+# Per-connection tuning: memory-map up to 256 MB, 16 MB page cache
+MMAP_SIZE = int(os.environ.get('LLM_DASHBOARD_MMAP_SIZE', str(256 * 1024 * 1024)))
+CACHE_SIZE_KB = int(os.environ.get('LLM_DASHBOARD_CACHE_SIZE_KB', '16000'))
+
+
+def connect_readonly(path):
+    """Open a tuned, read-only connection to the SQLite file at path."""
+    uri = f"file:{quote(os.path.abspath(path))}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA query_only = ON")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    return conn
+
+
+def file_signature(path):
+    """Return (st_ino, st_mtime_ns, st_size) of path, or None if it is missing.
+
+    The inode changes when the path is replaced by a rename; the mtime and
+    size change with any write to the main database file.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def file_inode(path):
+    """Return the inode path currently points at, or None if it is missing."""
+    signature = file_signature(path)
+    return signature[0] if signature else None
+
+
+class ConnectionPool:
+    """A bounded LIFO pool of connections to one database file.
+
+    When path is given, connections opened before the path was replaced by
+    another file are closed instead of being handed out again.
+    """
+
+    def __init__(self, factory, max_size=POOL_SIZE, path=None):
+        self.factory = factory
+        self.max_size = max_size
+        self.path = path
+        self._idle = queue.LifoQueue(maxsize=max_size)
+        self._inode = file_inode(path) if path else None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        generation = self._check_file()
+        try:
+            conn_generation, conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+        if conn is not None and conn_generation != generation:
+            conn.close()
+            conn = None
+        if conn is None:
+            conn = self.factory()
+
+        healthy = True
+        try:
+            yield conn
+        except sqlite3.DatabaseError:
+            # Don't hand a connection in an unknown state to the next request
+            healthy = False
+            raise
+        finally:
+            self._release(conn, generation, healthy)
+
+    def _check_file(self):
+        """Return the current generation, starting a new one if the file was replaced."""
+        if self.path is None:
+            return self._generation
+        inode = file_inode(self.path)
+        with self._lock:
+            replaced = inode != self._inode
+            if replaced:
+                self._inode = inode
+                self._generation += 1
+            generation = self._generation
+        if replaced:
+            self.close()
+        return generation
+
+    def _release(self, conn, generation, healthy):
+        try:
+            # End any read transaction so it can't pin an old snapshot
+            if healthy and conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            healthy = False
+
+        # A connection to a file that has since been replaced is dropped
+        if healthy and generation == self._generation:
+            try:
+                self._idle.put_nowait((generation, conn))
+                return
+            except queue.Full:
+                pass
+        conn.close()
+
+    def close(self):
+        """Close every idle connection."""
+        while True:
+            try:
+                self._idle.get_nowait()[1].close()
+            except queue.Empty:
+                return
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path, factory=None):
+    """Return the shared pool for path, creating it on first use."""
+    key = os.path.abspath(path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(factory or (lambda: connect_readonly(key)), path=key)
+            _pools[key] = pool
+        return pool
+
+
+def readonly_connection(path):
+    """Borrow a read-only connection to path for the duration of a with block."""
+    return get_pool(path).connection()
@@ -66,7 +66,7 @@ if [ ! -d "venv" ]; then
     echo -e "${YELLOW}Creating virtual environment...${NC}"
     python -m venv venv
     source venv/bin/activate
-    pip install flask pandas
+    pip install flask
 else
     source venv/bin/activate
 fi
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Structured, level-gated logging for the dashboard.
+
+Every module logs through get_logger('<module>') instead of print(). Records
+go to stderr, one line each, as text or as JSON objects
+(LLM_DASHBOARD_LOG_FORMAT=json), at LLM_DASHBOARD_LOG_LEVEL and above
+(INFO by default). Context is passed as keyword fields:
+
+    log_event(logger, logging.INFO, 'facts ingested', added=120)
+
+log_event checks the level first, so a disabled message costs one cached
+lookup and never formats its fields. Hot loops go one step further and
+read a module-level flag such as dates.DEBUG_DATES once at import.
+
+Messages that could fire once per row are either sampled, logging the
+first occurrences and then one in LOG_SAMPLE_EVERY with a running total,
+or not logged at all and only counted with count(). Counters are exposed
+by /metrics and /api/debug-info, so a stream of bad rows shows up as one
+number instead of thousands of lines.
+"""
+import os
+import sys
+import json
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+
+# Root of every logger the dashboard creates
+ROOT_LOGGER = 'llm_dashboard'
+
+LOG_LEVEL = os.environ.get('LLM_DASHBOARD_LOG_LEVEL', 'INFO').upper()
+
+# text or json
+LOG_FORMAT = os.environ.get('LLM_DASHBOARD_LOG_FORMAT', 'text')
+
+# A sampled message is logged for its first LOG_SAMPLE_FIRST occurrences,
+# then once per LOG_SAMPLE_EVERY
+LOG_SAMPLE_FIRST = 10
+LOG_SAMPLE_EVERY = int(os.environ.get('LLM_DASHBOARD_LOG_SAMPLE_EVERY', '1000'))
+
+
+class TextFormatter(logging.Formatter):
+    """time LEVEL logger: message key=value ..."""
+
+    def format(self, record):
+        line = (f"{self.formatTime(record, '%Y-%m-%d %H:%M:%S')} {record.levelname:<7} "
+                f"{record.name}: {record.getMessage()}")
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, fields merged in at the top level."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def _configure():
+    root = logging.getLogger(ROOT_LOGGER)
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JSONFormatter() if LOG_FORMAT == 'json' else TextFormatter())
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+    # Records stop here rather than reaching Flask's or the root handlers twice
+    root.propagate = False
+
+
+_configure()
+
+
+def get_logger(name):
+    """Return the dashboard logger for a module name."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def log_event(logger, level, message, exc_info=None, **fields):
+    """Log message with structured fields if level is enabled."""
+    if logger.isEnabledFor(level):
+        logger.log(level, message, exc_info=exc_info, extra={'fields': fields})
+
+
+_counters = Counter()
+_counters_lock = threading.Lock()
+
+
+def count(name, n=1):
+    """Add n to a named event counter and return the new total."""
+    with _counters_lock:
+        _counters[name] += n
+        return _counters[name]
+
+
+def counters():
+    """Return a snapshot of every event counter."""
+    with _counters_lock:
+        return dict(_counters)
+
+
+def log_sampled(logger, level, key, message, every=LOG_SAMPLE_EVERY, **fields):
+    """Count an event under key and log it only now and then.
+
+    The first LOG_SAMPLE_FIRST occurrences are logged, then one in every,
+    each with the running total in a count field. Nothing is logged, and
+    only the counter moves, when level is disabled.
+    """
+    total = count(key)
+    if not logger.isEnabledFor(level):
+        return
+    if total <= LOG_SAMPLE_FIRST or total % every == 0:
+        logger.log(level, message, extra={'fields': dict(fields, count=total)})
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Local per-model prices for responses that don't report a cost.
+
+Most providers return token counts but no usage.cost, so their responses
+would chart as free. pricing.json (LLM_DASHBOARD_PRICING) lists what each
+model costs per million prompt and completion tokens, optionally limited to
+a range of UTC days:
+
+    {"models": [
+        {"model": "gpt-4o", "prompt": 5.0, "completion": 15.0, "until": "2024-10-02"},
+        {"model": "gpt-4o", "prompt": 2.5, "completion": 10.0, "from": "2024-10-02"},
+        {"model": "*claude-3.5-sonnet*", "prompt": 3.0, "completion": 15.0}
+    ]}
+
+"from" is inclusive and "until" exclusive; either may be left out. A model
+may be a glob (SQLite GLOB rules). An exact name beats a pattern, and of the
+entries covering a day the one with the latest "from" wins. A reported
+usage.cost always takes precedence over the table.
+
+usage_facts prices each response once, when it is ingested, from the copy of
+the table stored in the facts database. When the file changes, the next sync
+stores the new table and reprices the history in bulk with SQL over the
+facts, rollups and cost sketches; no response_json is read again.
+
+    python pricing.py
+
+applies the current file straight away and prints what it priced.
+"""
+import os
+import json
+import logging
+import hashlib
+import threading
+from fnmatch import fnmatchcase
+from functools import lru_cache
+
+from log import get_logger, log_event
+
+logger = get_logger('pricing')
+
+# The pricing table
+PRICING_PATH = os.environ.get(
+    'LLM_DASHBOARD_PRICING',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pricing.json')
+)
+
+# Stand-in for a missing "from", before any real day
+FIRST_DAY = '0000-01-01'
+
+# Cost of a usage_facts row from the stored table, or NULL when no price
+# covers its model and day; the ordering mirrors PriceTable.rate. A matching
+# entry without GLOB wildcards can only be the exact name, and testing for
+# that keeps outer columns out of ORDER BY, which older SQLite rejects in a
+# correlated subquery of an UPDATE.
+PRICE_SQL = """
+    (SELECT (usage_facts.prompt_tokens * p.prompt_per_million
+             + usage_facts.completion_tokens * p.completion_per_million) / 1000000.0
+     FROM model_prices p
+     WHERE usage_facts.model GLOB p.model
+       AND usage_facts.day >= p.effective_from
+       AND (p.effective_until IS NULL OR usage_facts.day < p.effective_until)
+     ORDER BY p.model GLOB '*[*?[]*' ASC, p.effective_from DESC
+     LIMIT 1)
+"""
+
+
+class PriceTable:
+    """Prices by model and day, as (model, from, until, prompt, completion) entries."""
+
+    def __init__(self, entries):
+        self.entries = [tuple(entry) for entry in entries]
+        self.rate = lru_cache(maxsize=4096)(self._rate)
+
+    def _rate(self, model, day):
+        """Return (prompt, completion) per million tokens on day, or None."""
+        best = None
+        for pattern, effective_from, effective_until, prompt, completion in self.entries:
+            if not (effective_from <= day and (effective_until is None or day < effective_until)):
+                continue
+            if model != pattern and not fnmatchcase(model, pattern):
+                continue
+            rank = (not any(c in pattern for c in '*?['), effective_from)
+            if best is None or rank > best[0]:
+                best = (rank, (prompt, completion))
+        return best[1] if best else None
+
+    def cost(self, model, day, prompt_tokens, completion_tokens):
+        """Return the cost of a response, or None if no price covers it."""
+        if model is None:
+            return None
+        rate = self.rate(model, day)
+        if rate is None:
+            return None
+        # Same arithmetic as PRICE_SQL, so ingestion and repricing agree
+        return (prompt_tokens * rate[0] + completion_tokens * rate[1]) / 1000000.0
+
+
+def parse_price_file(data):
+    """Return the (model, from, until, prompt, completion) entries of a pricing document."""
+    entries = []
+    for item in data.get('models', []):
+        if not isinstance(item.get('model'), str):
+            raise ValueError(f"pricing entry without a model name: {item!r}")
+        entries.append((
+            item['model'],
+            item.get('from') or FIRST_DAY,
+            item.get('until'),
+            float(item.get('prompt', 0)),
+            float(item.get('completion', 0)),
+        ))
+    return entries
+
+
+_file_cache = {}
+_file_cache_lock = threading.Lock()
+
+
+def load_price_file(path=None):
+    """Return (digest, entries, modified_at) for the pricing file.
+
+    The file is re-read only when its size or mtime changes. A missing file
+    is an empty table with an empty digest. If an edited file is invalid,
+    the last valid version keeps being used and the error is logged, so a
+    typo can't reprice the history to zero; with no valid version yet, the
+    error is raised.
+    """
+    path = os.path.abspath(path or PRICING_PATH)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return '', [], 0
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    with _file_cache_lock:
+        cached = _file_cache.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+    try:
+        with open(path, 'r') as f:
+            entries = parse_price_file(json.load(f))
+    except (OSError, ValueError, TypeError, AttributeError) as e:
+        if not cached:
+            raise ValueError(f"invalid pricing file {path}: {e}") from e
+        log_event(logger, logging.ERROR, 'invalid pricing file, keeping the previous prices',
+                  path=path, error=str(e))
+        with _file_cache_lock:
+            _file_cache[path] = (signature, cached[1])
+        return cached[1]
+    canonical = json.dumps(sorted(entries, key=lambda entry: (entry[0], entry[1])))
+    result = (hashlib.sha1(canonical.encode('utf-8')).hexdigest(), entries, stat.st_mtime)
+
+    with _file_cache_lock:
+        _file_cache[path] = (signature, result)
+    return result
+
+
+def pricing_version(path=None):
+    """Return (digest, modified_at) of the pricing file, for cache versions."""
+    digest, _, modified_at = load_price_file(path)
+    return digest, modified_at
+
+
+if __name__ == '__main__':
+    from app import get_db_paths
+    from usage_facts import sync_usage_facts, reprice_usage_facts
+
+    sync_usage_facts(get_db_paths())
+    summary = reprice_usage_facts()
+    print(f"{summary['entries']} price entries from {PRICING_PATH}")
+    print(f"{summary['priced']} of {summary['unreported']} responses without a reported cost were priced")
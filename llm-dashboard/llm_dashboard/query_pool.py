@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Bounded worker pool for the dashboard's heavy SQLite work.
+
+Aggregations like /api/token-data can take seconds on a large logs database.
+Views marked with @offload hand their body to a fixed set of worker threads,
+so at most LLM_DASHBOARD_WORKERS of them scan SQLite at once.
+
+At most LLM_DASHBOARD_QUEUE_DEPTH offloaded requests may wait for a worker.
+Past that the request is turned away straight away with a 503 and a
+Retry-After header, instead of piling up behind a slow scan.
+
+The server thread that accepted an offloaded request stays blocked while it
+waits and runs, so workers + queue depth server threads can be tied up by
+heavy requests. Cheap endpoints such as /api/models only stay responsive if
+the server has threads beyond that; serve.py refuses to start otherwise.
+"""
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from flask import copy_current_request_context, jsonify
+
+from timing import record
+
+# Threads running offloaded views
+WORKER_COUNT = int(os.environ.get('LLM_DASHBOARD_WORKERS', '4'))
+
+# Offloaded requests allowed to wait for a free worker
+QUEUE_DEPTH = int(os.environ.get('LLM_DASHBOARD_QUEUE_DEPTH', '8'))
+
+# Seconds a client turned away with a 503 is asked to wait
+RETRY_AFTER = int(os.environ.get('LLM_DASHBOARD_RETRY_AFTER', '1'))
+
+
+class PoolBusy(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+class QueryPool:
+    """A fixed number of worker threads with a bounded wait queue."""
+
+    def __init__(self, workers=WORKER_COUNT, queue_depth=QUEUE_DEPTH):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='query')
+        # One slot per running or waiting task
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def run(self, fn, *args, **kwargs):
+        """Run fn in a worker thread and return its result.
+
+        Blocks the calling thread while fn waits for a worker and while it
+        runs. Raises PoolBusy straight away if no worker or queue slot is
+        free.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise PoolBusy()
+
+        with self._lock:
+            self._pending += 1
+        try:
+            return self._executor.submit(fn, *args, **kwargs).result()
+        finally:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+
+    def stats(self):
+        """Return the pool's size and how many tasks are running or waiting."""
+        with self._lock:
+            pending = self._pending
+        return {
+            'workers': self.workers,
+            'queue_depth': self.queue_depth,
+            'running': min(pending, self.workers),
+            'queued': max(pending - self.workers, 0)
+        }
+
+
+query_pool = QueryPool()
+
+
+def offload(view):
+    """Run a Flask view in the query pool instead of the server thread."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        submitted = time.perf_counter()
+
+        # Time spent waiting for a free worker shows up as its own phase
+        def run_view(*args, **kwargs):
+            record('queue', time.perf_counter() - submitted)
+            return view(*args, **kwargs)
+
+        try:
+            return query_pool.run(copy_current_request_context(run_view), *args, **kwargs)
+        except PoolBusy:
+            response = jsonify({
+                'error': 'Server is busy, try again shortly',
+                'success': False
+            })
+            response.status_code = 503
+            response.headers['Retry-After'] = str(RETRY_AFTER)
+            return response
+    return wrapper
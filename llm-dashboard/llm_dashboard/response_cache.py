@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""Server-side cache for computed API responses.
+
+Entries are keyed on the request filters and tagged with a data version
+taken from the llm logs database. An entry is only served while the version
+it was computed at is still current, so new responses invalidate everything
+automatically. The version also feeds ETag / Last-Modified headers, which
+lets browsers revalidate with a 304 instead of downloading the body again.
+
+Entries live in an in-memory LRU and, when LLM_DASHBOARD_CACHE_DIR is set,
+are also written to disk so they survive a restart.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from db_pool import connect_readonly, file_signature
+from log import get_logger, log_event
+
+logger = get_logger('response_cache')
+
+# Number of responses kept in memory
+CACHE_MAX_ENTRIES = int(os.environ.get('LLM_DASHBOARD_CACHE_ENTRIES', '256'))
+
+# Optional directory for the on-disk copy of the cache
+CACHE_DIR = os.environ.get('LLM_DASHBOARD_CACHE_DIR')
+
+
+class DataVersion:
+    """Tracks a version token for a logs database.
+
+    The token combines MAX(rowid) of responses, which moves whenever llm
+    appends, with a generation counter bumped when PRAGMA data_version
+    reports a commit that did not append (an update or delete). data_version
+    is only meaningful on a single connection, so one is kept open here.
+
+    The file's (inode, mtime, size) is part of the token too. A copy
+    refreshed by writing a temp file and renaming it over the old one is a
+    new inode, which the open connection would never see; the connection is
+    reopened on the new file when that happens.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()
+        self._signature = None
+        self._data_version = None
+        self._max_rowid = None
+        self._generation = 0
+        self._modified_at = time.time()
+
+    def current(self):
+        """Return (token, modified_at) for the database as it is now."""
+        with self._lock:
+            signature = file_signature(self.db_path)
+            if signature is None:
+                raise FileNotFoundError(self.db_path)
+            if self._conn is not None and signature[0] != self._signature[0]:
+                # Replaced by another file; data_version of a new connection
+                # can't be compared with the old one's
+                self._conn.close()
+                self._conn = None
+                self._data_version = None
+                self._modified_at = time.time()
+            if self._conn is None:
+                self._conn = connect_readonly(self.db_path)
+            elif signature != self._signature:
+                self._modified_at = time.time()
+            self._signature = signature
+
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self._data_version:
+                max_rowid = self._conn.execute(
+                    "SELECT COALESCE(MAX(rowid), 0) FROM responses"
+                ).fetchone()[0]
+                if self._data_version is not None:
+                    if max_rowid == self._max_rowid:
+                        self._generation += 1
+                    self._modified_at = time.time()
+                self._data_version = data_version
+                self._max_rowid = max_rowid
+            ino, mtime_ns, size = signature
+            return f"{self._max_rowid}.{self._generation}.{ino}-{mtime_ns}-{size}", self._modified_at
+
+
+_data_versions = {}
+_data_versions_lock = threading.Lock()
+
+
+def get_data_version(db_path):
+    """Return the shared DataVersion tracker for db_path."""
+    key = os.path.abspath(db_path)
+    with _data_versions_lock:
+        tracker = _data_versions.get(key)
+        if tracker is None:
+            tracker = _data_versions[key] = DataVersion(key)
+        return tracker
+
+
+def combined_data_version(db_paths):
+    """Return (token, modified_at) covering every database in db_paths.
+
+    The token changes when any of the databases changes, or when the set of
+    databases itself does.
+    """
+    tokens = []
+    modified_at = 0
+    for path in db_paths:
+        try:
+            token, path_modified_at = get_data_version(path).current()
+        except (sqlite3.Error, OSError):
+            # Missing, unreadable, or not an llm database; nothing to version
+            token, path_modified_at = 'none', 0
+        tokens.append(f"{os.path.abspath(path)}={token}")
+        modified_at = max(modified_at, path_modified_at)
+    if len(tokens) == 1:
+        return tokens[0].rpartition('=')[2], modified_at
+    return hashlib.sha1(';'.join(tokens).encode('utf-8')).hexdigest(), modified_at
+
+
+class CachedResponse:
+    """A serialized JSON body plus the validators sent with it."""
+
+    def __init__(self, version, body, modified_at):
+        self.version = version
+        self.body = body
+        self.modified_at = modified_at
+
+
+class ResponseCache:
+    """An LRU of CachedResponse objects, optionally mirrored to disk."""
+
+    def __init__(self, name, max_entries=CACHE_MAX_ENTRIES, cache_dir=CACHE_DIR):
+        self.name = name
+        self.max_entries = max_entries
+        self.cache_dir = os.path.join(cache_dir, name) if cache_dir else None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def etag(self, key, version):
+        """Return the ETag for key at version, without computing the body."""
+        raw = json.dumps([self.name, list(key), version])
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key, version):
+        """Return the CachedResponse for key if it was computed at version."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.version == version:
+                    self._entries.move_to_end(key)
+                    return entry
+                del self._entries[key]
+
+        entry = self._read_disk(key)
+        if entry is not None and entry.version == version:
+            self._remember(key, entry)
+            return entry
+        return None
+
+    def put(self, key, version, body, modified_at):
+        """Store a serialized body for key at version and return the entry."""
+        entry = CachedResponse(version, body, modified_at)
+        self._remember(key, entry)
+        self._write_disk(key, entry)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_path(self, key):
+        digest = hashlib.sha1(json.dumps(list(key)).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(key), 'r') as f:
+                stored = json.load(f)
+            return CachedResponse(stored['version'], stored['body'].encode('utf-8'), stored['modified_at'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_disk(self, key, entry):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    'version': entry.version,
+                    'modified_at': entry.modified_at,
+                    'body': entry.body.decode('utf-8')
+                }, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log_event(logger, logging.WARNING, 'could not write cache file', path=path, error=str(e))
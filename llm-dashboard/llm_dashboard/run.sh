@@ -5,7 +5,7 @@ if [ ! -d "venv" ]; then
     echo "Creating virtual environment..."
     python -m venv venv
     source venv/bin/activate
-    pip install flask pandas
+    pip install flask
 else
     source venv/bin/activate
 fi
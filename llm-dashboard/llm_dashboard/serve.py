@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Run the dashboard on a production server instead of the Flask dev server.
+
+    python serve.py [--server waitress|asgi|werkzeug] [--host HOST] [--port PORT]
+
+waitress (pip install waitress) is used when it is installed, otherwise the
+threaded werkzeug server without the debugger or reloader. --server asgi
+wraps the app with asgiref and serves it with uvicorn (pip install uvicorn
+asgiref).
+
+Whichever server is used, heavy aggregations run in the bounded query pool
+(see query_pool.py), so the server's own threads stay free for the cheap
+endpoints. LLM_DASHBOARD_SERVER_THREADS sets how many connections the server
+handles at once; LLM_DASHBOARD_WORKERS and LLM_DASHBOARD_QUEUE_DEPTH size the
+query pool.
+"""
+import os
+import logging
+import argparse
+
+from app import app, get_db_paths, LIVE_STREAMS
+from assets import current_build
+from log import get_logger, log_event
+from query_pool import query_pool
+from usage_facts import start_ingestion_thread
+
+logger = get_logger('serve')
+
+# Threads the HTTP server uses to accept and answer requests
+SERVER_THREADS = int(os.environ.get('LLM_DASHBOARD_SERVER_THREADS', '16'))
+
+# Server threads that must stay free for the cheap endpoints however many
+# heavy requests are running or queued
+FREE_THREADS = 2
+
+
+def thread_budget_error():
+    """Return why the pool can starve the server's threads, or None.
+
+    An offloaded request holds its server thread while it waits in the
+    queue and while it runs, and an open /api/live stream holds one for its
+    whole lifetime, so together they have to be fewer than the server's
+    threads for /api/models and the page itself to keep answering.
+    """
+    held = query_pool.workers + query_pool.queue_depth + LIVE_STREAMS
+    if held + FREE_THREADS <= SERVER_THREADS:
+        return None
+    return (f"LLM_DASHBOARD_WORKERS + LLM_DASHBOARD_QUEUE_DEPTH + LLM_DASHBOARD_LIVE_STREAMS "
+            f"({held}) must leave {FREE_THREADS} of LLM_DASHBOARD_SERVER_THREADS "
+            f"({SERVER_THREADS}) free")
+
+
+def default_server():
+    try:
+        import waitress
+        return 'waitress'
+    except ImportError:
+        return 'werkzeug'
+
+
+def serve(server, host, port):
+    # The werkzeug server starts a thread per connection, so only the pooled
+    # servers can run out
+    if server != 'werkzeug':
+        error = thread_budget_error()
+        if error:
+            raise SystemExit(error)
+    log_event(logger, logging.INFO, 'starting LLM Dashboard', host=host, port=port, server=server,
+              server_threads=SERVER_THREADS, query_workers=query_pool.workers,
+              queue_depth=query_pool.queue_depth)
+    start_ingestion_thread(get_db_paths)
+    # Build the frontend bundles now rather than on the first page load
+    current_build()
+
+    if server == 'waitress':
+        from waitress import serve as waitress_serve
+        waitress_serve(app, host=host, port=port, threads=SERVER_THREADS)
+    elif server == 'asgi':
+        # asgiref runs each WSGI call in a thread; size that pool to match
+        os.environ.setdefault('ASGI_THREADS', str(SERVER_THREADS))
+        import uvicorn
+        from asgiref.wsgi import WsgiToAsgi
+        uvicorn.run(WsgiToAsgi(app), host=host, port=port)
+    else:
+        # Without the debugger and reloader, one thread per connection
+        app.run(debug=False, host=host, port=port, threaded=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the LLM Dashboard')
+    parser.add_argument('--server', choices=['waitress', 'asgi', 'werkzeug'], default=default_server())
+    parser.add_argument('--host', default=os.environ.get('LLM_DASHBOARD_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('LLM_DASHBOARD_PORT', '5000')))
+    args = parser.parse_args()
+    serve(args.server, args.host, args.port)
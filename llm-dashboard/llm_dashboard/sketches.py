@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Mergeable log-bucket histograms for usage distributions.
+
+Each value is counted in a logarithmic bucket whose width grows with the
+value, in the manner of DDSketch: bucket i holds values in
+(GAMMA ** (i - 1), GAMMA ** i], where GAMMA = (1 + a) / (1 - a) for a
+relative accuracy a. Any quantile read back from the counts is within a of
+the true value, for costs of a fraction of a cent and for token counts in
+the hundreds of thousands alike.
+
+Sketches of different days or models merge exactly by adding the counts of
+equal buckets. That lets usage_facts store one sketch per (day, model,
+metric) next to the daily rollups, and answer percentiles for any date range
+with a GROUP BY over those rows instead of rescanning the raw facts.
+
+A sketch here is just a list of (bucket, count) pairs sorted by bucket.
+"""
+import math
+
+# Relative accuracy of quantiles read from a sketch. Stored sketches are
+# only comparable at one accuracy, so changing this needs a facts rebuild
+# (bump usage_facts.SCHEMA_VERSION).
+HISTOGRAM_ACCURACY = 0.01
+
+GAMMA = (1 + HISTOGRAM_ACCURACY) / (1 - HISTOGRAM_ACCURACY)
+_LOG_GAMMA = math.log(GAMMA)
+
+# Bucket for zero (and negative) values, below every real bucket
+ZERO_BUCKET = -(2 ** 31)
+
+
+def bucket_index(value):
+    """Return the sketch bucket holding value."""
+    if value <= 0:
+        return ZERO_BUCKET
+    return math.ceil(math.log(value) / _LOG_GAMMA)
+
+
+def bucket_value(index):
+    """Return the value a bucket stands for, within the accuracy of any member."""
+    if index == ZERO_BUCKET:
+        return 0.0
+    return 2 * GAMMA ** index / (GAMMA + 1)
+
+
+def quantiles(sketch, percentiles):
+    """Read percentiles (0-100) off a sorted [(bucket, count), ...] sketch.
+
+    Returns {percentile: value}, with None for every percentile of an empty
+    sketch. The whole sketch is walked once for all percentiles.
+    """
+    total = sum(count for _, count in sketch)
+    if not total:
+        return {p: None for p in percentiles}
+
+    results = {}
+    # Rank of each percentile among the total values, lowest first
+    targets = sorted((p / 100 * (total - 1), p) for p in percentiles)
+    seen = 0
+    position = 0
+    for bucket, count in sketch:
+        seen += count
+        while position < len(targets) and targets[position][0] < seen:
+            results[targets[position][1]] = bucket_value(bucket)
+            position += 1
+        if position == len(targets):
+            break
+    # Rounding can leave the top percentiles unassigned; they are the maximum
+    for _, p in targets[position:]:
+        results[p] = bucket_value(sketch[-1][0])
+    return results
+
+
+def _fixed_bin(value):
+    """Return the 1-2-5 series bin [lower, upper) that value falls in."""
+    exponent = math.floor(math.log10(value))
+    scale = 10.0 ** exponent
+    mantissa = value / scale
+    if mantissa >= 5:
+        lower, upper = 5, 10
+    elif mantissa >= 2:
+        lower, upper = 2, 5
+    else:
+        lower, upper = 1, 2
+    return round(lower * scale, 12), round(upper * scale, 12)
+
+
+def fixed_histogram(sketch):
+    """Coarsen a sketch into readable 1-2-5 bins (..., 1, 2, 5, 10, 20, ...).
+
+    Returns [{'lower', 'upper', 'count'}, ...] in ascending order, with
+    zeros in a [0, 0] bin of their own. Bins follow each bucket's
+    representative value, so a value within the sketch accuracy of a bin
+    edge may be counted on either side of it.
+    """
+    bins = {}
+    for bucket, count in sketch:
+        value = bucket_value(bucket)
+        edges = (0.0, 0.0) if value <= 0 else _fixed_bin(value)
+        bins[edges] = bins.get(edges, 0) + count
+    return [
+        {'lower': lower, 'upper': upper, 'count': count}
+        for (lower, upper), count in sorted(bins.items())
+    ]
+
+
+def merge(sketches):
+    """Add several sketches together into one sorted sketch."""
+    counts = {}
+    for sketch in sketches:
+        for bucket, count in sketch:
+            counts[bucket] = counts.get(bucket, 0) + count
+    return sorted(counts.items())
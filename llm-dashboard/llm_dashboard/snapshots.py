@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""Monthly columnar snapshots of the usage facts.
+
+    python snapshots.py [--parquet] [--force]
+
+writes every complete month of usage_facts to
+LLM_DASHBOARD_SNAPSHOT_DIR/month=YYYY-MM/usage.arrow, an uncompressed Arrow
+IPC file. With --parquet a usage.parquet copy is written next to it for
+tools like DuckDB or pandas. The current month is left to SQLite, which is
+where new responses land.
+
+Readers open the Arrow files with a memory map, so a historical range is
+scanned straight from the page cache without parsing or copying rows into
+Python first. iter_usage_history() combines the two stores: months with a
+valid snapshot come from Arrow, everything else (the recent tail, or a
+month that gained rows since it was snapshotted) from SQLite.
+
+pyarrow is optional (pip install pyarrow); without it no snapshots are
+written and every read goes to SQLite.
+"""
+import os
+import sys
+import json
+import logging
+import argparse
+import calendar
+from datetime import date, datetime, timedelta, timezone
+
+from log import get_logger, log_event
+from usage_facts import (
+    EXPORT_COLUMNS, SYNC_BATCH_SIZE, iter_usage_facts, facts_connection
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc
+    SNAPSHOTS_AVAILABLE = True
+except ImportError:
+    pa = None
+    SNAPSHOTS_AVAILABLE = False
+
+logger = get_logger('snapshots')
+
+# Where monthly snapshot files and their manifest are kept
+SNAPSHOT_DIR = os.environ.get(
+    'LLM_DASHBOARD_SNAPSHOT_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snapshots')
+)
+
+MANIFEST_NAME = 'manifest.json'
+
+if SNAPSHOTS_AVAILABLE:
+    SNAPSHOT_SCHEMA = pa.schema([
+        ('id', pa.string()),
+        ('model', pa.string()),
+        ('datetime_utc', pa.string()),
+        ('ts', pa.string()),
+        ('day', pa.string()),
+        ('prompt_tokens', pa.int64()),
+        ('completion_tokens', pa.int64()),
+        ('total_tokens', pa.int64()),
+        ('cost', pa.float64()),
+        ('duration_ms', pa.int64()),
+    ])
+
+
+def month_bounds(month):
+    """Return the first and last day (YYYY-MM-DD) of a YYYY-MM month."""
+    year, number = map(int, month.split('-'))
+    return f"{month}-01", f"{month}-{calendar.monthrange(year, number)[1]:02d}"
+
+
+def check_range(start_date, end_date):
+    """Return start_date and end_date as YYYY-MM-DD, or raise ValueError.
+
+    Both have to be real days, and start_date no later than end_date.
+    """
+    start, end = (datetime.strptime(day, '%Y-%m-%d').date() for day in (start_date, end_date))
+    if start > end:
+        raise ValueError(f"start_date {start_date} is after end_date {end_date}")
+    return start.isoformat(), end.isoformat()
+
+
+def split_by_snapshots(start_date, end_date, months):
+    """Split a day range into (month, start, end) spans, oldest first.
+
+    Each of months (YYYY-MM, with a usable snapshot) that overlaps the range
+    gets a span of its own; the days around them become spans with month
+    None, each read from SQLite as one range. The number of spans follows
+    the number of snapshots, however long the range is.
+    """
+    spans = []
+    day = start_date
+    for month in sorted(months):
+        first, last = month_bounds(month)
+        first, last = max(first, day), min(last, end_date)
+        if first > last:
+            continue
+        if day < first:
+            spans.append((None, day, (date.fromisoformat(first) - timedelta(days=1)).isoformat()))
+        spans.append((month, first, last))
+        if last == end_date:
+            return spans
+        day = (date.fromisoformat(last) + timedelta(days=1)).isoformat()
+    spans.append((None, day, end_date))
+    return spans
+
+
+def monthly_totals(first_month, last_month, facts_path=None):
+    """Return {month: (requests, cost)} from first_month to last_month.
+
+    One grouped query over the daily rollups covers the whole range;
+    months without usage are left out.
+    """
+    first, _ = month_bounds(first_month)
+    _, last = month_bounds(last_month)
+    with facts_connection(facts_path) as conn:
+        return {row[0]: (row[1], row[2]) for row in conn.execute(
+            "SELECT substr(day, 1, 7), SUM(requests), SUM(cost) "
+            "FROM daily_rollups WHERE day BETWEEN ? AND ? GROUP BY 1",
+            (first, last)
+        )}
+
+
+def load_manifest(snapshot_dir=SNAPSHOT_DIR):
+    try:
+        with open(os.path.join(snapshot_dir, MANIFEST_NAME), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'months': {}}
+
+
+def _write_manifest(manifest, snapshot_dir):
+    path = os.path.join(snapshot_dir, MANIFEST_NAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _month_path(month, snapshot_dir, extension='arrow'):
+    return os.path.join(snapshot_dir, f"month={month}", f"usage.{extension}")
+
+
+def write_month(month, snapshot_dir=SNAPSHOT_DIR, parquet=False, facts_path=None):
+    """Write one month of facts to its Arrow file; return the row count.
+
+    Rows are streamed from SQLite a batch at a time into the IPC writer in
+    (ts, id) order, so memory stays flat however big the month is.
+    """
+    first, last = month_bounds(month)
+    path = _month_path(month, snapshot_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    rows = 0
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, SNAPSHOT_SCHEMA) as writer:
+            for batch in iter_usage_facts(first, last, facts_path=facts_path):
+                columns = list(zip(*batch))
+                writer.write_batch(pa.record_batch(
+                    [pa.array(column, type=field.type) for column, field in zip(columns, SNAPSHOT_SCHEMA)],
+                    schema=SNAPSHOT_SCHEMA
+                ))
+                rows += len(batch)
+    os.replace(tmp_path, path)
+
+    if parquet:
+        import pyarrow.parquet as pq
+        pq.write_table(read_month(month, snapshot_dir), _month_path(month, snapshot_dir, 'parquet'))
+    return rows
+
+
+def write_snapshots(snapshot_dir=SNAPSHOT_DIR, parquet=False, force=False, facts_path=None):
+    """Snapshot every complete month that is missing or out of date.
+
+    A month is rewritten when its totals in the daily rollups no longer
+    match the manifest, for example after a backfill from another host.
+    Returns the list of months written.
+    """
+    if not SNAPSHOTS_AVAILABLE:
+        raise RuntimeError('pyarrow is required for snapshots: pip install pyarrow')
+
+    os.makedirs(snapshot_dir, exist_ok=True)
+    manifest = load_manifest(snapshot_dir)
+    current_month = datetime.now(timezone.utc).strftime('%Y-%m')
+
+    with facts_connection(facts_path) as conn:
+        months = [row[0] for row in conn.execute(
+            "SELECT DISTINCT substr(day, 1, 7) FROM daily_rollups ORDER BY 1"
+        )]
+
+    # Totals are read before the rows: if a fact lands in between, the
+    # recorded totals are already stale and readers fall back to SQLite
+    totals = monthly_totals(months[0], months[-1], facts_path) if months else {}
+
+    written = []
+    for month in months:
+        if month >= current_month:
+            continue
+        requests, cost = totals[month]
+        entry = manifest['months'].get(month)
+        if not force and entry and entry['requests'] == requests and entry['cost'] == cost:
+            continue
+        rows = write_month(month, snapshot_dir, parquet, facts_path)
+        manifest['months'][month] = {
+            'requests': requests,
+            'cost': cost,
+            'rows': rows,
+            'written_at': datetime.now(timezone.utc).isoformat(timespec='seconds')
+        }
+        written.append(month)
+        log_event(logger, logging.INFO, 'wrote snapshot', month=month, rows=rows)
+
+    _write_manifest(manifest, snapshot_dir)
+    return written
+
+
+def read_month(month, snapshot_dir=SNAPSHOT_DIR):
+    """Return a month's snapshot as an Arrow table backed by a memory map."""
+    source = pa.memory_map(_month_path(month, snapshot_dir), 'r')
+    return pa.ipc.open_file(source).read_all()
+
+
+def valid_snapshot_months(months, snapshot_dir=SNAPSHOT_DIR, facts_path=None):
+    """Return those of months whose snapshot still matches the daily rollups."""
+    if not SNAPSHOTS_AVAILABLE:
+        return set()
+    manifest = load_manifest(snapshot_dir)['months']
+    candidates = [
+        month for month in months
+        if month in manifest and os.path.exists(_month_path(month, snapshot_dir))
+    ]
+    if not candidates:
+        return set()
+    totals = monthly_totals(min(candidates), max(candidates), facts_path)
+    return {
+        month for month in candidates
+        if (manifest[month]['requests'], manifest[month]['cost']) == totals.get(month, (0, 0))
+    }
+
+
+def iter_usage_history(start_date, end_date, model='all', batch_size=SYNC_BATCH_SIZE,
+                       snapshot_dir=SNAPSHOT_DIR, facts_path=None):
+    """Yield batches of fact tuples (EXPORT_COLUMNS order) in time order.
+
+    A drop-in replacement for usage_facts.iter_usage_facts that reads each
+    month from its memory-mapped snapshot when one is valid, and from
+    SQLite otherwise. The range is checked and the snapshots validated
+    before anything is yielded, so a bad range raises ValueError here
+    rather than partway through a response.
+    """
+    start_date, end_date = check_range(start_date, end_date)
+    months = [
+        month for month in load_manifest(snapshot_dir)['months']
+        if start_date[:7] <= month <= end_date[:7]
+    ]
+    valid = valid_snapshot_months(months, snapshot_dir, facts_path)
+    spans = split_by_snapshots(start_date, end_date, valid)
+    return _iter_spans(spans, model, batch_size, snapshot_dir, facts_path)
+
+
+def _iter_spans(spans, model, batch_size, snapshot_dir, facts_path):
+    """Generator behind iter_usage_history(); month is None for SQLite spans."""
+    for month, first, last in spans:
+        if month is None:
+            yield from iter_usage_facts(first, last, model, batch_size, facts_path)
+            continue
+
+        table = read_month(month, snapshot_dir)
+        # The SQLite path selects whole UTC days too, so filtering on the
+        # day column covers exactly the same rows
+        mask = pc.and_(pc.greater_equal(table['day'], first), pc.less_equal(table['day'], last))
+        if model != 'all':
+            mask = pc.and_(mask, pc.equal(table['model'], model))
+        for batch in table.filter(mask).to_batches(max_chunksize=batch_size):
+            columns = [batch.column(name).to_pylist() for name in EXPORT_COLUMNS]
+            yield list(zip(*columns))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write monthly Arrow snapshots of the usage facts')
+    parser.add_argument('--dir', default=SNAPSHOT_DIR, help='snapshot directory')
+    parser.add_argument('--parquet', action='store_true', help='also write a Parquet copy of each month')
+    parser.add_argument('--force', action='store_true', help='rewrite months that are already up to date')
+    args = parser.parse_args()
+
+    if not SNAPSHOTS_AVAILABLE:
+        print('pyarrow is required for snapshots: pip install pyarrow', file=sys.stderr)
+        sys.exit(1)
+
+    # Bring the facts up to date with every configured logs database first
+    from app import get_db_paths
+    from usage_facts import sync_usage_facts
+    sync_usage_facts(get_db_paths())
+
+    written = write_snapshots(args.dir, parquet=args.parquet, force=args.force)
+    print(f"Wrote {len(written)} month(s) to {args.dir}")
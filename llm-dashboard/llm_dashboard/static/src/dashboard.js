@@ -0,0 +1,1148 @@
+// Charts instances (declare globally)
+let tokenUsageChart, costChart, tokenDistributionChart, costEfficiencyChart;
+let dailyTokenChart, dailyCostChart, dailyRequestChart;
+let latencyChart, throughputChart;
+
+// Line colours for per-model series
+const MODEL_COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf'];
+
+// DOM elements (declare globally)
+let dateRangePicker, modelFilter, applyFiltersBtn, loadingOverlay, loadingMessage, errorAlert, errorMessage;
+let totalRequestsEl, totalTokensEl, totalCostEl, avgCostEl;
+let tableBody, highCostTableBody, liveStatusEl;
+
+// Last /api/token-data response, kept so live deltas can be added to it
+let currentData = null;
+let liveSource = null;
+let liveRetryTimer = null;
+// Wait before reopening a live stream the server refused
+const LIVE_RETRY_MS = 30000;
+
+// Date range for filtering (declare globally)
+let startDate = moment().subtract(7, 'days').format('YYYY-MM-DD');
+let endDate = moment().format('YYYY-MM-DD');
+
+// Initialize Charts (Keep this definition here)
+function initCharts() {
+    // Get references to DOM elements inside the function after DOM is loaded
+    const tokenUsageCanvas = document.getElementById('tokenUsageChart');
+    const costCanvas = document.getElementById('costChart');
+    const tokenDistributionCanvas = document.getElementById('tokenDistributionChart');
+    const costEfficiencyCanvas = document.getElementById('costEfficiencyChart');
+    const dailyTokenCanvas = document.getElementById('dailyTokenChart');
+    const dailyCostCanvas = document.getElementById('dailyCostChart');
+    const dailyRequestCanvas = document.getElementById('dailyRequestChart');
+
+    // Check if canvas elements exist before creating charts
+    if (tokenUsageCanvas) {
+        tokenUsageChart = new Chart(tokenUsageCanvas, {
+            type: 'bar',
+            data: {
+                labels: [],
+                datasets: [
+                    {
+                        label: 'Prompt Tokens',
+                        backgroundColor: '#4a6fa5',
+                        data: []
+                    },
+                    {
+                        label: 'Completion Tokens',
+                        backgroundColor: '#ff9642',
+                        data: []
+                    }
+                ]
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                plugins: {
+                    title: {
+                        display: true,
+                        text: 'Token Usage by Model'
+                    },
+                    tooltip: {
+                        callbacks: {
+                            label: function(context) {
+                                let label = context.dataset.label || '';
+                                if (label) {
+                                    label += ': ';
+                                }
+                                if (context.parsed.y !== null) {
+                                    label += new Intl.NumberFormat().format(context.parsed.y);
+                                }
+                                return label;
+                            }
+                        }
+                    }
+                },
+                scales: {
+                    x: {
+                        stacked: true,
+                        title: {
+                            display: true,
+                            text: 'Model'
+                        }
+                    },
+                    y: {
+                        stacked: true,
+                        title: {
+                            display: true,
+                            text: 'Number of Tokens'
+                        },
+                        ticks: {
+                            callback: function(value) {
+                                return new Intl.NumberFormat().format(value);
+                            }
+                        }
+                    }
+                }
+            }
+        });
+    } else { console.error("Canvas element 'tokenUsageChart' not found."); }
+
+    if (costCanvas) {
+        costChart = new Chart(costCanvas, {
+            type: 'bar',
+            data: {
+                labels: [],
+                datasets: [{
+                    label: 'Total Cost ($)',
+                    backgroundColor: '#2ca02c',
+                    data: []
+                }]
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                plugins: {
+                    title: {
+                        display: true,
+                        text: 'Cost by Model'
+                    },
+                    tooltip: {
+                        callbacks: {
+                            label: function(context) {
+                                let label = context.dataset.label || '';
+                                if (label) {
+                                    label += ': $';
+                                }
+                                if (context.parsed.y !== null) {
+                                    label += context.parsed.y.toFixed(2);
+                                }
+                                return label;
+                            }
+                        }
+                    }
+                },
+                scales: {
+                    y: {
+                        title: {
+                            display: true,
+                            text: 'Cost ($)'
+                        },
+                        ticks: {
+                            callback: function(value) {
+                                return '$' + value.toFixed(2);
+                            }
+                        }
+                    }
+                }
+            }
+        });
+    } else { console.error("Canvas element 'costChart' not found."); }
+
+    if (tokenDistributionCanvas) {
+        tokenDistributionChart = new Chart(tokenDistributionCanvas, {
+            type: 'pie',
+            data: {
+                labels: ['Prompt Tokens', 'Completion Tokens'],
+                datasets: [{
+                    label: 'Tokens',
+                    backgroundColor: ['#4a6fa5', '#ff9642'],
+                    data: [0, 0]
+                }]
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                plugins: {
+                    title: {
+                        display: true,
+                        text: 'Token Distribution'
+                    },
+                    tooltip: {
+                        callbacks: {
+                            label: function(context) {
+                                const label = context.label || '';
+                                const value = context.raw;
+                                const total = context.chart.data.datasets[0].data.reduce((a, b) => a + b, 0);
+                                const percentage = Math.round((value / total) * 100);
+                                return `${label}: ${new Intl.NumberFormat().format(value)} (${percentage}%)`;
+                            }
+                        }
+                    }
+                }
+            }
+        });
+    } else { console.error("Canvas element 'tokenDistributionChart' not found."); }
+
+    if (costEfficiencyCanvas) {
+        costEfficiencyChart = new Chart(costEfficiencyCanvas, {
+            type: 'bar',
+            data: {
+                labels: [],
+                datasets: [{
+                    label: 'Cost per 1K Tokens ($)',
+                    backgroundColor: '#d62728',
+                    data: []
+                }]
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                plugins: {
+                    title: {
+                        display: true,
+                        text: 'Cost per 1K Tokens by Model'
+                    },
+                    tooltip: {
+                        callbacks: {
+                            label: function(context) {
+                                let label = context.dataset.label || '';
+                                if (label) {
+                                    label += ': $';
+                                }
+                                if (context.parsed.y !== null) {
+                                    label += context.parsed.y.toFixed(6);
+                                }
+                                return label;
+                            }
+                        }
+                    }
+                },
+                scales: {
+                    y: {
+                        title: {
+                            display: true,
+                            text: 'Cost per 1K Tokens ($)'
+                        },
+                        ticks: {
+                            callback: function(value) {
+                                return '$' + value.toFixed(6);
+                            }
+                        }
+                    }
+                }
+            }
+        });
+    } else { console.error("Canvas element 'costEfficiencyChart' not found."); }
+
+    if (dailyTokenCanvas) {
+        dailyTokenChart = new Chart(dailyTokenCanvas, {
+            type: 'bar',
+            data: {
+                labels: [],
+                datasets: [
+                    {
+                        label: 'Prompt Tokens',
+                        backgroundColor: '#4a6fa5',
+                        data: [],
+                        order: 1
+                    },
+                    {
+                        label: 'Completion Tokens',
+                        backgroundColor: '#ff9642',
+                        data: [],
+                        order: 1
+                    }
+                ]
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                plugins: {
+                    title: {
+                        display: true,
+                        text: 'Daily Token Usage'
+                    },
+                    tooltip: {
+                        callbacks: {
+                            label: function(context) {
+                                let label = context.dataset.label || '';
+                                if (label) {
+                                    label += ': ';
+                                }
+                                if (context.parsed.y !== null) {
+                                    label += new Intl.NumberFormat().format(context.parsed.y);
+                                }
+                                return label;
+                            }
+                        }
+                    }
+                },
+                scales: {
+                    x: {
+                        stacked: true,
+                        title: {
+                            display: true,
+                            text: 'Date'
+                        }
+                    },
+                    y: {
+                        stacked: true,
+                        title: {
+                            display: true,
+                            text: 'Number of Tokens'
+                        },
+                        ticks: {
+                            callback: function(value) {
+                                return new Intl.NumberFormat().format(value);
+                            }
+                        }
+                    }
+                }
+            }
+        });
+    } else { console.error("Canvas element 'dailyTokenChart' not found."); }
+
+    if (dailyCostCanvas) {
+        dailyCostChart = new Chart(dailyCostCanvas, {
+            type: 'line',
+            data: {
+                labels: [],
+                datasets: [{
+                    label: 'Total Cost ($)',
+                    borderColor: '#2ca02c',
+                    backgroundColor: 'rgba(44, 160, 44, 0.2)',
+                    data: [],
+                    tension: 0.1,
+                    fill: true
+                }]
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                plugins: {
+                    title: {
+                        display: true,
+                        text: 'Daily Cost'
+                    },
+                    tooltip: {
+                        callbacks: {
+                            label: function(context) {
+                                let label = context.dataset.label || '';
+                                if (label) {
+                                    label += ': $';
+                                }
+                                if (context.parsed.y !== null) {
+                                    label += context.parsed.y.toFixed(2);
+                                }
+                                return label;
+                            }
+                        }
+                    }
+                },
+                scales: {
+                    y: {
+                        title: {
+                            display: true,
+                            text: 'Cost ($)'
+                        },
+                        ticks: {
+                            callback: function(value) {
+                                return '$' + value.toFixed(2);
+                            }
+                        }
+                    }
+                }
+            }
+        });
+    } else { console.error("Canvas element 'dailyCostChart' not found."); }
+
+    if (dailyRequestCanvas) {
+        dailyRequestChart = new Chart(dailyRequestCanvas, {
+            type: 'line',
+            data: {
+                labels: [],
+                datasets: [{
+                    label: 'Number of Requests',
+                    borderColor: '#9467bd',
+                    backgroundColor: 'rgba(148, 103, 189, 0.2)',
+                    data: [],
+                    tension: 0.1,
+                    fill: true
+                }]
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                plugins: {
+                    title: {
+                        display: true,
+                        text: 'Daily Requests'
+                    }
+                },
+                scales: {
+                    y: {
+                        title: {
+                            display: true,
+                            text: 'Number of Requests'
+                        },
+                        beginAtZero: true
+                    }
+                }
+            }
+        });
+    } else { console.error("Canvas element 'dailyRequestChart' not found."); }
+
+    const latencyCanvas = document.getElementById('latencyChart');
+    if (latencyCanvas) {
+        latencyChart = new Chart(latencyCanvas, {
+            type: 'line',
+            data: { labels: [], datasets: [] },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                spanGaps: true,
+                plugins: {
+                    title: {
+                        display: true,
+                        text: 'p50 Latency by Model'
+                    }
+                },
+                scales: {
+                    y: {
+                        title: {
+                            display: true,
+                            text: 'Milliseconds'
+                        },
+                        beginAtZero: true
+                    }
+                }
+            }
+        });
+    } else { console.error("Canvas element 'latencyChart' not found."); }
+
+    const throughputCanvas = document.getElementById('throughputChart');
+    if (throughputCanvas) {
+        throughputChart = new Chart(throughputCanvas, {
+            type: 'line',
+            data: { labels: [], datasets: [] },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                spanGaps: true,
+                plugins: {
+                    title: {
+                        display: true,
+                        text: 'Tokens per Second by Model'
+                    }
+                },
+                scales: {
+                    y: {
+                        title: {
+                            display: true,
+                            text: 'Tokens/sec'
+                        },
+                        beginAtZero: true
+                    }
+                }
+            }
+        });
+    } else { console.error("Canvas element 'throughputChart' not found."); }
+}
+
+// Format numbers for display
+function formatNumber(num) {
+    // Handle null/undefined/NaN safely
+    const number = Number(num);
+    return isNaN(number) ? '0' : new Intl.NumberFormat().format(Math.round(number));
+}
+
+function formatCurrency(num) {
+    // Handle null/undefined/NaN safely
+    const number = Number(num);
+    return isNaN(number) ? '$0.00' : '$' + number.toFixed(2);
+}
+
+// Update summary stats
+function updateSummaryStats(stats) {
+    if (!stats) return; // Add safety check
+    totalRequestsEl.textContent = formatNumber(stats.total_requests);
+    totalTokensEl.textContent = formatNumber(stats.total_tokens);
+    totalCostEl.textContent = formatCurrency(stats.total_cost);
+    avgCostEl.textContent = formatCurrency(stats.avg_cost_per_request);
+}
+
+// Update token usage chart
+function updateTokenUsageChart(data) {
+    if (!tokenUsageChart || !data) return; // Add safety check
+    const models = data.map(item => {
+        const parts = item.model.split('/');
+        return parts.length > 1 ? parts[parts.length - 1] : item.model;
+    });
+    const promptTokens = data.map(item => item.prompt_tokens);
+    const completionTokens = data.map(item => item.completion_tokens);
+
+    tokenUsageChart.data.labels = models;
+    tokenUsageChart.data.datasets[0].data = promptTokens;
+    tokenUsageChart.data.datasets[1].data = completionTokens;
+    tokenUsageChart.update();
+}
+
+// Update cost chart
+function updateCostChart(data) {
+    if (!costChart || !data) return; // Add safety check
+    const models = data.map(item => {
+        const parts = item.model.split('/');
+        return parts.length > 1 ? parts[parts.length - 1] : item.model;
+    });
+    const costs = data.map(item => item.total_cost);
+
+    costChart.data.labels = models;
+    costChart.data.datasets[0].data = costs;
+    costChart.update();
+}
+
+// Update token distribution chart
+function updateTokenDistributionChart(stats) {
+    if (!tokenDistributionChart || !stats) return; // Add safety check
+    tokenDistributionChart.data.datasets[0].data = [
+        stats.total_prompt_tokens || 0, // Add default values
+        stats.total_completion_tokens || 0
+    ];
+    tokenDistributionChart.update();
+}
+
+// Update cost efficiency chart
+function updateCostEfficiencyChart(data) {
+    if (!costEfficiencyChart || !data) return; // Add safety check
+    const models = data.map(item => {
+        const parts = item.model.split('/');
+        return parts.length > 1 ? parts[parts.length - 1] : item.model;
+    });
+    const costPer1kTokens = data.map(item => item.cost_per_1k_tokens);
+
+    costEfficiencyChart.data.labels = models;
+    costEfficiencyChart.data.datasets[0].data = costPer1kTokens;
+    costEfficiencyChart.update();
+}
+
+// Update daily charts
+function updateDailyCharts(data) {
+    if (!data || data.length === 0) return; // Add safety check
+    const dates = data.map(item => item.date);
+    const promptTokens = data.map(item => item.prompt_tokens);
+    const completionTokens = data.map(item => item.completion_tokens);
+    const costs = data.map(item => item.total_cost);
+    const requests = data.map(item => item.requests);
+
+    // Update token chart
+    if (dailyTokenChart) {
+        dailyTokenChart.data.labels = dates;
+        dailyTokenChart.data.datasets[0].data = promptTokens;
+        dailyTokenChart.data.datasets[1].data = completionTokens;
+        dailyTokenChart.update();
+    }
+
+    // Update cost chart
+    if (dailyCostChart) {
+        dailyCostChart.data.labels = dates;
+        dailyCostChart.data.datasets[0].data = costs;
+        dailyCostChart.update();
+    }
+
+    // Update request chart
+    if (dailyRequestChart) {
+        dailyRequestChart.data.labels = dates;
+        dailyRequestChart.data.datasets[0].data = requests;
+        dailyRequestChart.update();
+    }
+}
+
+// Update latency and throughput charts from /api/latency series rows
+function updateLatencyCharts(series) {
+    if (!series) return; // Add safety check
+    const dates = [...new Set(series.map(item => item.date))].sort();
+    const models = [...new Set(series.map(item => item.model))].sort();
+
+    // One line per model, with gaps on dates it has no timed requests
+    function datasetsFor(valueOf) {
+        return models.map((model, i) => {
+            const byDate = {};
+            series.filter(item => item.model === model).forEach(item => {
+                byDate[item.date] = valueOf(item);
+            });
+            const parts = model.split('/');
+            return {
+                label: parts.length > 1 ? parts[parts.length - 1] : model,
+                borderColor: MODEL_COLORS[i % MODEL_COLORS.length],
+                backgroundColor: MODEL_COLORS[i % MODEL_COLORS.length],
+                data: dates.map(date => date in byDate ? byDate[date] : null),
+                tension: 0.1,
+                fill: false
+            };
+        });
+    }
+
+    if (latencyChart) {
+        latencyChart.data.labels = dates;
+        latencyChart.data.datasets = datasetsFor(item => item.duration_percentiles.p50);
+        latencyChart.update();
+    }
+
+    if (throughputChart) {
+        throughputChart.data.labels = dates;
+        throughputChart.data.datasets = datasetsFor(item => item.tokens_per_second);
+        throughputChart.update();
+    }
+}
+
+// Update data table
+function updateDataTable(data) {
+    if (!tableBody || !data) return; // Add safety check
+    tableBody.innerHTML = '';
+
+    data.forEach(item => {
+        const row = document.createElement('tr');
+
+        row.innerHTML = `
+            <td>${item.model || 'N/A'}</td>
+            <td>${formatNumber(item.requests)}</td>
+            <td>${formatNumber(item.prompt_tokens)}</td>
+            <td>${formatNumber(item.completion_tokens)}</td>
+            <td>${formatNumber(item.total_tokens)}</td>
+            <td>${formatCurrency(item.total_cost)}</td>
+            <td>${formatCurrency(item.avg_cost_per_request)}</td>
+            <td>${formatCurrency(item.cost_per_1k_tokens)}</td>
+        `;
+
+        tableBody.appendChild(row);
+    });
+}
+
+// Update high cost table
+function updateHighCostTable(data) {
+    if (!highCostTableBody || !data) return; // Add safety check
+    highCostTableBody.innerHTML = '';
+
+    data.forEach(item => {
+        const row = document.createElement('tr');
+
+        row.innerHTML = `
+            <td>${item.id || 'N/A'}</td>
+            <td>${item.model || 'N/A'}</td>
+            <td>${formatNumber(item.prompt_tokens)}</td>
+            <td>${formatNumber(item.completion_tokens)}</td>
+            <td>${formatNumber(item.total_tokens)}</td>
+            <td>${formatCurrency(item.cost)}</td>
+            <td>${item.datetime || 'N/A'}</td>
+        `;
+
+        highCostTableBody.appendChild(row);
+    });
+}
+
+// Update all visualizations
+function updateVisualizations(data) {
+    if (!data) return; // Add safety check
+    const modelData = data.model_data || [];
+    const overallStats = data.overall_stats || {};
+    const dateData = data.date_data || [];
+
+    updateSummaryStats(overallStats);
+    updateTokenUsageChart(modelData);
+    updateCostChart(modelData);
+    updateTokenDistributionChart(overallStats);
+    updateCostEfficiencyChart(modelData);
+    updateDataTable(modelData);
+    updateDailyCharts(dateData);
+}
+
+// Show loading overlay
+function showLoading(message = 'Loading...') {
+    if (!loadingOverlay || !loadingMessage) return; // Add safety check
+    loadingMessage.textContent = message;
+    loadingOverlay.style.display = 'flex';
+}
+
+// Hide loading overlay
+function hideLoading() {
+    if (!loadingOverlay) return; // Add safety check
+    loadingOverlay.style.display = 'none';
+}
+
+// Show error message
+function showError(message) {
+    if (!errorAlert || !errorMessage) return; // Add safety check
+    errorMessage.textContent = message;
+    // Use Bootstrap's API to show the alert if available, otherwise fallback
+    const bsAlert = bootstrap.Alert.getInstance(errorAlert);
+    if (bsAlert) {
+        // If it's already shown, just update text. If not, need to re-enable it.
+        // This part is tricky as Bootstrap removes the element on close.
+        // A simpler approach might be to just ensure it's visible.
+        errorAlert.classList.add('show');
+        errorAlert.style.display = 'block'; // Ensure visibility
+    } else {
+         // If bootstrap isn't initialized on it, manually show
+         errorAlert.classList.add('show');
+         errorAlert.style.display = 'block';
+         // Initialize Bootstrap alert for the close button to work
+         new bootstrap.Alert(errorAlert);
+    }
+
+    // Auto-hide after 5 seconds
+    setTimeout(() => {
+        const currentBsAlert = bootstrap.Alert.getInstance(errorAlert);
+        if (currentBsAlert) {
+            currentBsAlert.close();
+        } else {
+            errorAlert.classList.remove('show');
+            errorAlert.style.display = 'none';
+        }
+    }, 5000);
+}
+
+// Enhanced error handling for API calls
+function handleApiError(error, context) {
+    console.error(`${context} error:`, error);
+    let errorMsg = error.message || 'Unknown error';
+
+    // Additional debugging information
+    if (error.stack) {
+        console.error('Stack trace:', error.stack);
+    }
+
+    // Show user-friendly error
+    showError(`${context}: ${errorMsg}`);
+    hideLoading(); // Ensure loading is hidden on error
+}
+
+// More robust fetch wrapper that handles network errors and JSON parsing
+async function safeFetch(url, options = {}) {
+    try {
+        const response = await fetch(url, options);
+
+        if (!response.ok) {
+            // Try to get error message from response body
+            let serverErrorMsg = '';
+            try {
+                const errorData = await response.json();
+                serverErrorMsg = errorData.error || JSON.stringify(errorData);
+            } catch (e) {
+                serverErrorMsg = await response.text();
+            }
+            throw new Error(`Server returned ${response.status}: ${response.statusText}. ${serverErrorMsg}`);
+        }
+
+        try {
+            const data = await response.json();
+            return data;
+        } catch (jsonError) {
+            throw new Error(`Failed to parse JSON response: ${jsonError.message}`);
+        }
+    } catch (fetchError) {
+        // Catch network errors or errors thrown above
+        throw new Error(`Request failed: ${fetchError.message}`);
+    }
+}
+
+// Check database connection on page load
+async function checkDatabaseConnection() {
+    try {
+        // Use date-range endpoint as a proxy for DB connection check
+        const data = await safeFetch('/api/date-range');
+
+        if (!data.success) {
+            // Use the error from the API response if available
+            showError(`Database connection issue: ${data.error || 'Could not verify connection'}`);
+            return false;
+        }
+        console.log('Database connection check successful.');
+        return true;
+    } catch (error) {
+        // safeFetch will throw an error for network issues or bad responses
+        handleApiError(error, 'Database connection check');
+        return false;
+    }
+}
+
+// Definitive Date Range Picker Initialization
+async function initDateRangePicker() {
+    showLoading('Checking database connection...');
+
+    const dbConnected = await checkDatabaseConnection();
+
+    if (!dbConnected) {
+        hideLoading();
+        // Error message already shown by checkDatabaseConnection
+        return;
+    }
+
+    showLoading('Loading available date range...');
+
+    try {
+        const data = await safeFetch('/api/date-range');
+        hideLoading(); // Hide loading after fetch attempt
+
+        if (data.success) {
+            // Use defaults if no min/max dates found, or if they are invalid
+            const minDateMoment = data.min_date ? moment(data.min_date) : moment().subtract(30, 'days');
+            const maxDateMoment = data.max_date ? moment(data.max_date) : moment();
+
+            // Validate moments
+            const minDate = minDateMoment.isValid() ? minDateMoment : moment().subtract(30, 'days');
+            const maxDate = maxDateMoment.isValid() ? maxDateMoment : moment();
+
+            console.log('Database date range:', {minDate: minDate.format('YYYY-MM-DD'), maxDate: maxDate.format('YYYY-MM-DD')});
+
+            // Set default selection to last 7 days or available range if shorter
+            // Ensure start date is not after end date
+            let defaultStartDate = moment(maxDate).subtract(6, 'days'); // 7 days including today
+            if (defaultStartDate.isBefore(minDate)) {
+                defaultStartDate = minDate;
+            }
+
+            startDate = defaultStartDate.format('YYYY-MM-DD');
+            endDate = maxDate.format('YYYY-MM-DD');
+
+            // Initialize daterangepicker with more options
+            $(dateRangePicker).daterangepicker({
+                startDate: defaultStartDate, // Use moment object
+                endDate: maxDate,       // Use moment object
+                minDate: minDate,
+                maxDate: maxDate,
+                opens: 'left',
+                autoApply: true,
+                showDropdowns: true,
+                alwaysShowCalendars: true,
+                ranges: {
+                   'Today': [moment(), moment()],
+                   'Yesterday': [moment().subtract(1, 'days'), moment().subtract(1, 'days')],
+                   'Last 7 Days': [moment().subtract(6, 'days'), moment()],
+                   'Last 30 Days': [moment().subtract(29, 'days'), moment()],
+                   'This Month': [moment().startOf('month'), moment().endOf('month')],
+                   'Last Month': [moment().subtract(1, 'month').startOf('month'), moment().subtract(1, 'month').endOf('month')]
+                },
+                locale: {
+                    format: 'YYYY-MM-DD'
+                }
+            }, function(start, end) {
+                // Update global variables when selection changes
+                startDate = start.format('YYYY-MM-DD');
+                endDate = end.format('YYYY-MM-DD');
+                console.log('Date range selected:', {startDate, endDate});
+                // Optionally trigger data load on change, or rely on Apply button
+                // loadData(); // Uncomment if you want auto-refresh on date change
+            });
+
+            // Load models after date picker is ready
+            loadModels();
+        } else {
+            showError('Failed to load date range: ' + (data.error || 'Unknown error'));
+        }
+    } catch (error) {
+        handleApiError(error, 'Date range initialization');
+    }
+}
+
+// Definitive Load Models function
+async function loadModels() {
+    showLoading('Loading models...');
+
+    try {
+        const data = await safeFetch('/api/models');
+        hideLoading(); // Hide loading after fetch attempt
+
+        if (data.success && data.models) {
+            modelFilter.innerHTML = '<option value="all">All Models</option>'; // Reset options
+
+            data.models.forEach(model => {
+                const option = document.createElement('option');
+                option.value = model;
+                option.textContent = model;
+                modelFilter.appendChild(option);
+            });
+
+            // Initial data load now that models and date range are ready
+            loadData();
+        } else {
+            showError('Failed to load models: ' + (data.error || 'No models found'));
+        }
+    } catch (error) {
+        handleApiError(error, 'Model loading');
+    }
+}
+
+// Definitive Load Data function
+async function loadData() {
+    showLoading('Loading token usage data...');
+
+    // Ensure modelFilter has a value, default to 'all' if not
+    const modelSelection = modelFilter ? modelFilter.value : 'all';
+
+    // Ensure dates are valid
+    if (!startDate || !endDate) {
+         showError('Invalid date range selected.');
+         hideLoading();
+         return;
+    }
+
+    const url = `/api/token-data?start_date=${encodeURIComponent(startDate)}&end_date=${encodeURIComponent(endDate)}&model=${encodeURIComponent(modelSelection)}`;
+    console.log('Loading data with URL:', url);
+
+    try {
+        const data = await safeFetch(url);
+
+        if (data.success) {
+            console.log('API data loaded successfully:', {
+                modelDataCount: data.model_data ? data.model_data.length : 0,
+                overallStats: data.overall_stats,
+                dateDataCount: data.date_data ? data.date_data.length : 0
+            });
+
+            // Update visualizations with potentially empty data if API returns success but no data
+            currentData = data;
+            updateVisualizations(data);
+
+            // Keep the charts current as new responses are logged, from
+            // exactly the facts these totals include
+            startLiveUpdates(data.cursor);
+
+            // Latency charts load alongside, without holding the overlay
+            loadLatencyData();
+
+            // Load high cost records after main data is processed
+            loadHighCostRecords(); // This will call hideLoading() when done
+        } else {
+            hideLoading(); // Hide loading if success is false
+            showError('Failed to load data: ' + (data.error || 'Unknown error'));
+            // Clear visualizations on data load failure? Optional.
+            // updateVisualizations({ model_data: [], overall_stats: {}, date_data: [] });
+        }
+    } catch (error) {
+        // safeFetch handles error reporting via handleApiError
+        handleApiError(error, 'Data loading');
+        // Clear visualizations on critical error? Optional.
+        // updateVisualizations({ model_data: [], overall_stats: {}, date_data: [] });
+    }
+}
+
+// Load latency and throughput trends for the current filters
+async function loadLatencyData() {
+    const modelSelection = modelFilter ? modelFilter.value : 'all';
+    const url = `/api/latency?start_date=${encodeURIComponent(startDate)}&end_date=${encodeURIComponent(endDate)}&model=${encodeURIComponent(modelSelection)}`;
+
+    try {
+        const data = await safeFetch(url);
+        if (data.success) {
+            updateLatencyCharts(data.series);
+        } else {
+            console.warn('Failed to load latency data: ' + (data.error || 'Unknown error'));
+            updateLatencyCharts([]);
+        }
+    } catch (error) {
+        console.error('Latency data loading error:', error);
+        updateLatencyCharts([]);
+    }
+}
+
+// Definitive Load High Cost Records function
+async function loadHighCostRecords() {
+    // Don't show separate loading message, assume it's part of main loadData flow
+    // showLoading('Loading high-cost records...'); 
+
+    const modelSelection = modelFilter ? modelFilter.value : 'all';
+
+    // Ensure dates are valid
+    if (!startDate || !endDate) {
+         console.warn('Skipping high-cost records load due to invalid date range.');
+         hideLoading(); // Ensure loading is hidden if we skip
+         return;
+    }
+
+    const url = `/api/sample-records?start_date=${encodeURIComponent(startDate)}&end_date=${encodeURIComponent(endDate)}&model=${encodeURIComponent(modelSelection)}`;
+    console.log('Loading high-cost records with URL:', url);
+
+    try {
+        const data = await safeFetch(url);
+        hideLoading(); // Hide loading after this final fetch in the sequence
+
+        if (data.success && data.records) {
+            updateHighCostTable(data.records);
+        } else {
+            // Don't necessarily show an error if high-cost records fail, could be less critical
+            console.warn('Failed to load high-cost records: ' + (data.error || 'No records found or error'));
+            updateHighCostTable([]); // Clear the table on failure
+        }
+    } catch (error) {
+        hideLoading(); // Ensure loading is hidden on error
+        // Don't necessarily show a blocking error, just log it
+        console.error('High-cost records loading error:', error);
+        updateHighCostTable([]); // Clear the table on error
+        // Optionally show a non-blocking warning:
+        // showError('Warning: Could not load high-cost records. ' + error.message);
+    }
+}
+
+// Add one live delta's counts to a model_data or date_data row
+function addUsage(row, delta) {
+    row.requests += delta.requests;
+    row.prompt_tokens += delta.prompt_tokens;
+    row.completion_tokens += delta.completion_tokens;
+    row.total_tokens += delta.total_tokens;
+    row.total_cost += delta.total_cost;
+}
+
+// Recompute overall stats from per-model totals, as the API does
+function computeOverallStats(modelData) {
+    const stats = {
+        total_requests: 0,
+        total_prompt_tokens: 0,
+        total_completion_tokens: 0,
+        total_tokens: 0,
+        total_cost: 0
+    };
+    modelData.forEach(item => {
+        stats.total_requests += item.requests;
+        stats.total_prompt_tokens += item.prompt_tokens;
+        stats.total_completion_tokens += item.completion_tokens;
+        stats.total_tokens += item.total_tokens;
+        stats.total_cost += item.total_cost;
+    });
+    stats.avg_cost_per_request = stats.total_requests ? stats.total_cost / stats.total_requests : 0;
+    return stats;
+}
+
+// Fold per (day, model) deltas from /api/live into the loaded data
+// and redraw, without refetching the aggregates
+function applyLiveDeltas(deltas) {
+    if (!currentData || !deltas) return;
+    const modelSelection = modelFilter ? modelFilter.value : 'all';
+    const modelData = currentData.model_data = currentData.model_data || [];
+    const dateData = currentData.date_data = currentData.date_data || [];
+    let changed = false;
+
+    deltas.forEach(delta => {
+        // Skip usage outside the filters currently on screen
+        if (delta.day < startDate || delta.day > endDate) return;
+        if (modelSelection !== 'all' && delta.model !== modelSelection) return;
+
+        let modelRow = modelData.find(item => item.model === delta.model);
+        if (!modelRow) {
+            modelRow = { model: delta.model, requests: 0, prompt_tokens: 0, completion_tokens: 0, total_tokens: 0, total_cost: 0 };
+            modelData.push(modelRow);
+            modelData.sort((a, b) => a.model.localeCompare(b.model));
+        }
+        addUsage(modelRow, delta);
+        modelRow.avg_cost_per_request = modelRow.requests ? modelRow.total_cost / modelRow.requests : 0;
+        modelRow.cost_per_1k_tokens = modelRow.total_tokens ? modelRow.total_cost * 1000 / modelRow.total_tokens : 0;
+
+        let dateRow = dateData.find(item => item.date === delta.day);
+        if (!dateRow) {
+            dateRow = { date: delta.day, requests: 0, prompt_tokens: 0, completion_tokens: 0, total_tokens: 0, total_cost: 0 };
+            dateData.push(dateRow);
+            dateData.sort((a, b) => a.date.localeCompare(b.date));
+        }
+        addUsage(dateRow, delta);
+        changed = true;
+    });
+
+    if (!changed) return;
+    currentData.overall_stats = computeOverallStats(modelData);
+    updateVisualizations(currentData);
+}
+
+// Show the state of the live connection in the header badge
+function setLiveStatus(text, style) {
+    if (!liveStatusEl) return;
+    liveStatusEl.textContent = text;
+    liveStatusEl.className = 'badge bg-' + style;
+}
+
+// Subscribe to /api/live from the cursor of the totals on screen, so each
+// fact is added exactly once. EventSource reconnects by itself and resumes
+// from the last event id it received; a refused stream is retried later.
+function startLiveUpdates(cursor) {
+    if (!window.EventSource) return;
+    if (liveSource) liveSource.close();
+    clearTimeout(liveRetryTimer);
+    // A body cached before cursors were added has none; start from the newest fact
+    const query = cursor == null ? '' : '?after=' + encodeURIComponent(cursor);
+    const source = liveSource = new EventSource('/api/live' + query);
+
+    source.addEventListener('ready', function() {
+        setLiveStatus('Live', 'success');
+    });
+    source.addEventListener('usage', function(event) {
+        const message = JSON.parse(event.data);
+        console.log('Live usage deltas:', message.deltas);
+        cursor = message.cursor;
+        applyLiveDeltas(message.deltas);
+    });
+    source.addEventListener('reset', function() {
+        // Server-side totals were rebuilt; start again from a full load
+        source.close();
+        loadData();
+    });
+    source.onerror = function() {
+        if (source.readyState !== EventSource.CLOSED) {
+            setLiveStatus('Reconnecting...', 'warning');
+            return;
+        }
+        // Refused (e.g. 503 when too many streams are open); EventSource
+        // won't retry that by itself
+        setLiveStatus('Live updates paused', 'secondary');
+        if (source === liveSource) {
+            liveRetryTimer = setTimeout(() => startLiveUpdates(cursor), LIVE_RETRY_MS);
+        }
+    };
+}
+
+// Initialize Application on DOMContentLoaded
+document.addEventListener('DOMContentLoaded', function() {
+    console.log('DOM fully loaded and parsed');
+
+    // Get references to DOM elements
+    dateRangePicker = document.getElementById('dateRangePicker');
+    modelFilter = document.getElementById('modelFilter');
+    applyFiltersBtn = document.getElementById('applyFilters');
+    loadingOverlay = document.getElementById('loadingOverlay');
+    loadingMessage = document.getElementById('loadingMessage');
+    errorAlert = document.getElementById('errorAlert');
+    errorMessage = document.getElementById('errorMessage');
+    totalRequestsEl = document.getElementById('totalRequests');
+    totalTokensEl = document.getElementById('totalTokens');
+    totalCostEl = document.getElementById('totalCost');
+    avgCostEl = document.getElementById('avgCost');
+    tableBody = document.getElementById('tableBody');
+    highCostTableBody = document.getElementById('highCostTableBody');
+    liveStatusEl = document.getElementById('liveStatus');
+
+    // Check if all essential elements were found
+    if (!dateRangePicker || !modelFilter || !applyFiltersBtn || !loadingOverlay || !errorAlert) {
+        console.error('Essential UI elements not found! Dashboard may not function correctly.');
+        // Display a critical error message to the user
+        const body = document.querySelector('body');
+        if (body) {
+            body.innerHTML = '<div class="alert alert-danger" role="alert">Critical Error: Dashboard UI elements are missing. Please check the HTML structure or contact support.</div>' + body.innerHTML;
+        }
+        return; // Stop initialization
+    }
+
+    // Initialize charts
+    initCharts();
+
+    // Setup Apply Filters button listener
+    applyFiltersBtn.addEventListener('click', function() {
+        console.log('Apply Filters button clicked');
+        // Date range is updated by the daterangepicker callback
+        // Model is read directly from the select element
+        loadData(); // Trigger data reload with current filter values
+    });
+
+    // Initialize date range picker (which triggers model load and initial data load)
+    // Use a small timeout to ensure libraries are fully ready
+    setTimeout(initDateRangePicker, 100); 
+});
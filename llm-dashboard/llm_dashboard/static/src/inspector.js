@@ -1,5 +1,9 @@
-// Add console inspector for network requests
+// Console inspector for network requests and chart updates. It logs every
+// response body and deep-copies chart data on each update, so it only runs
+// when the page is opened with ?inspect
 (function() {
+    if (!new URLSearchParams(window.location.search).has('inspect')) return;
+    
     console.log('%c🔍 Request Inspector Activated', 'background: #222; color: #bada55; font-size: 16px; padding: 5px;');
     
     // Monitor fetch calls
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import requests
 import json
+import re
 import sys
 from datetime import datetime, timedelta
 
@@ -65,6 +66,7 @@ def test_token_data_api(start_date, end_date, model='all'):
     if response.status_code == 200:
         data = response.json()
         print(f"Status: {response.status_code} ({response.reason})")
+        print(f"Server-Timing: {response.headers.get('Server-Timing')}")
         
         # Show abbreviated response to avoid huge output
         abbreviated_data = data.copy()
@@ -91,6 +93,147 @@ def test_token_data_api(start_date, end_date, model='all'):
         print(f"Error: Could not get token data")
         return False
 
+def test_export_api(start_date, end_date, export_format='ndjson'):
+    """Test the streaming export endpoint"""
+    print(f"Testing /api/export API with start_date={start_date}, end_date={end_date}, format={export_format}...")
+    
+    params = {
+        'start_date': start_date,
+        'end_date': end_date,
+        'format': export_format
+    }
+    
+    response = requests.get(f"{BASE_URL}/api/export", params=params, stream=True)
+    print(f"Status: {response.status_code} ({response.reason})")
+    
+    if response.status_code == 200:
+        # Only read the first few lines; the export can be very large
+        lines = []
+        for line in response.iter_lines(decode_unicode=True):
+            lines.append(line)
+            if len(lines) >= 3:
+                break
+        response.close()
+        
+        for line in lines:
+            print(f"Sample line: {line}")
+        print("Export API test: SUCCESS")
+        return True
+    else:
+        print(f"Error: Could not export usage")
+        return False
+
+def test_records_api(start_date, end_date, sort='time', order='desc'):
+    """Test the paginated records endpoint by following one cursor"""
+    print(f"Testing /api/records API with start_date={start_date}, end_date={end_date}, sort={sort}, order={order}...")
+    
+    params = {
+        'start_date': start_date,
+        'end_date': end_date,
+        'sort': sort,
+        'order': order,
+        'limit': 5
+    }
+    
+    response = requests.get(f"{BASE_URL}/api/records", params=params)
+    print(f"Status: {response.status_code} ({response.reason})")
+    
+    if response.status_code != 200:
+        print(f"Error: Could not list records")
+        return False
+    
+    data = response.json()
+    print(f"First page: {len(data.get('records', []))} records, next_cursor={data.get('next_cursor')}")
+    
+    if data.get('next_cursor'):
+        # Two pages of 5 must be exactly the first 10 rows of a single page
+        whole = requests.get(f"{BASE_URL}/api/records", params={**params, 'limit': 10}).json()
+        next_page = requests.get(f"{BASE_URL}/api/records", params={**params, 'cursor': data['next_cursor']}).json()
+        paged_ids = [record['id'] for record in data['records'] + next_page.get('records', [])]
+        expected_ids = [record['id'] for record in whole.get('records', [])]
+        overlap = sorted({id for id in paged_ids if paged_ids.count(id) > 1})
+        missing = [id for id in expected_ids if id not in paged_ids]
+        print(f"Second page: {len(next_page.get('records', []))} records, overlapping ids: {overlap}, missing ids: {missing}")
+        if overlap or missing or paged_ids != expected_ids:
+            print("Error: Pages overlap, skip rows or are out of order")
+            return False
+        
+        # A cursor only means something under the sort and order it came from
+        other_order = 'asc' if order == 'desc' else 'desc'
+        other_sort = 'cost' if sort != 'cost' else 'time'
+        for mismatch in ({'order': other_order}, {'sort': other_sort}):
+            wrong = requests.get(f"{BASE_URL}/api/records", params={**params, **mismatch, 'cursor': data['next_cursor']})
+            print(f"Cursor reused with {mismatch}: {wrong.status_code} ({wrong.reason})")
+            if wrong.status_code != 400:
+                print("Error: A cursor was accepted for a different sort or order")
+                return False
+    
+    print("Records API test: SUCCESS")
+    return True
+
+def test_distribution_api(start_date, end_date, metric='cost', by='model'):
+    """Test the percentile/histogram endpoint"""
+    print(f"Testing /api/distribution API with metric={metric}, by={by}...")
+    
+    params = {
+        'start_date': start_date,
+        'end_date': end_date,
+        'metric': metric,
+        'by': by
+    }
+    
+    response = requests.get(f"{BASE_URL}/api/distribution", params=params)
+    print(f"Status: {response.status_code} ({response.reason})")
+    
+    if response.status_code == 200:
+        data = response.json()
+        print(f"Overall: {json.dumps(data.get('overall', {}).get('percentiles'))}")
+        for group in data.get('groups', [])[:5]:
+            print(f"{group.get('model', group.get('date'))}: count={group['count']} {json.dumps(group['percentiles'])}")
+        print("Distribution API test: SUCCESS")
+        return True
+    else:
+        print(f"Error: Could not get distribution")
+        return False
+
+def test_metrics_api():
+    """Test the Prometheus metrics endpoint"""
+    print("Testing /metrics API...")
+    
+    response = requests.get(f"{BASE_URL}/metrics")
+    print(f"Status: {response.status_code} ({response.reason})")
+    
+    if response.status_code == 200:
+        lines = [line for line in response.text.splitlines() if '_count{' in line]
+        print(f"{len(lines)} timing series")
+        for line in lines[:10]:
+            print(line)
+        print("Metrics API test: SUCCESS")
+        return True
+    else:
+        print(f"Error: Could not get metrics")
+        return False
+
+def test_frontend_assets():
+    """Test that the page loads its bundles compressed and cacheable"""
+    print("Testing frontend bundles...")
+    
+    response = requests.get(f"{BASE_URL}/")
+    print(f"Status: {response.status_code} ({response.reason})")
+    urls = re.findall(r'/assets/[\w.]+', response.text)
+    print(f"Bundles: {urls}")
+    
+    for url in urls:
+        asset = requests.get(f"{BASE_URL}{url}", headers={'Accept-Encoding': 'br, gzip'})
+        print(f"{url}: {asset.status_code}, {asset.headers.get('Content-Encoding')}, "
+              f"{asset.headers.get('Content-Length')} bytes, {asset.headers.get('Cache-Control')}")
+        if asset.status_code != 200:
+            print(f"Error: Could not get {url}")
+            return False
+    
+    print("Frontend bundles test: SUCCESS")
+    return True
+
 def main():
     print_separator()
     print("API TEST SCRIPT")
@@ -120,6 +263,33 @@ def main():
         test_token_data_api(min_date, max_date, models[0])
         print_separator()
     
+    # Test streaming export in both formats
+    test_export_api(min_date, max_date, 'ndjson')
+    print_separator()
+    test_export_api(min_date, max_date, 'csv')
+    print_separator()
+    
+    # Test paginated records with each sort key
+    for sort in ('time', 'cost', 'tokens'):
+        test_records_api(min_date, max_date, sort)
+        print_separator()
+    test_records_api(min_date, max_date, 'cost', 'asc')
+    print_separator()
+    
+    # Test distributions per model and per day
+    test_distribution_api(min_date, max_date, 'cost', 'model')
+    print_separator()
+    test_distribution_api(min_date, max_date, 'total_tokens', 'day')
+    print_separator()
+    
+    # Test the timing histograms collected by the requests above
+    test_metrics_api()
+    print_separator()
+    
+    # Test the bundled frontend
+    test_frontend_assets()
+    print_separator()
+    
     # Test debug info API
     print("Testing /api/debug-info API...")
     response = requests.get(f"{BASE_URL}/api/debug-info")
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""Per-request phase timing, Prometheus metrics and opt-in profiling.
+
+Handlers wrap the parts of a request worth telling apart in phase() blocks:
+
+    with phase('sync'):
+        sync_usage_facts(get_db_paths())
+
+The durations collected for a request are sent back in a Server-Timing
+header (shown per request in the browser's network panel) and added to
+histograms per endpoint and phase, which /metrics exposes in the Prometheus
+text format. Phases are kept on the WSGI environ rather than flask.g, so
+spans recorded by a view running in the query pool land on the same request.
+
+With LLM_DASHBOARD_PROFILING=1, adding ?profile=1 to a request to a
+@profiled view runs it under cProfile and writes the profile to
+LLM_DASHBOARD_PROFILE_DIR; ?profile=pyinstrument writes a pyinstrument HTML
+report instead when pyinstrument is installed (cProfile otherwise). The
+file name is returned in an X-Profile header.
+"""
+import os
+import time
+import cProfile
+import logging
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import has_request_context, make_response, request
+
+from log import get_logger, log_event
+
+logger = get_logger('timing')
+
+try:
+    import pyinstrument
+    PYINSTRUMENT_AVAILABLE = True
+except ImportError:
+    pyinstrument = None
+    PYINSTRUMENT_AVAILABLE = False
+
+# Whether ?profile= is honoured at all; profiling is too costly to leave open
+PROFILING_ENABLED = os.environ.get('LLM_DASHBOARD_PROFILING', '') not in ('', '0')
+
+# Where request profiles are written
+PROFILE_DIR = os.environ.get(
+    'LLM_DASHBOARD_PROFILE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles')
+)
+
+# Upper bounds, in seconds, of the latency histogram buckets
+HISTOGRAM_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_ENVIRON_KEY = 'llm_dashboard.phases'
+_STARTED_KEY = 'llm_dashboard.started'
+
+
+def _request_phases():
+    """Return the current request's {phase: seconds}, or None outside a request."""
+    if not has_request_context():
+        return None
+    return request.environ.setdefault(_ENVIRON_KEY, {})
+
+
+def record(name, seconds):
+    """Add seconds to a phase of the current request (a no-op outside one)."""
+    phases = _request_phases()
+    if phases is not None:
+        phases[name] = phases.get(name, 0.0) + seconds
+
+
+@contextmanager
+def phase(name):
+    """Time the enclosed block as a phase of the current request.
+
+    Repeated phases of the same name add up, so a phase can be spread over
+    several blocks.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+class Histogram:
+    """A cumulative Prometheus histogram per label set."""
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS):
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                labels: {'counts': list(series['counts']), 'sum': series['sum'], 'count': series['count']}
+                for labels, series in self._series.items()
+            }
+
+
+phase_seconds = Histogram()
+request_seconds = Histogram()
+
+
+def start_request():
+    """Note when the current request began (a before_request hook)."""
+    request.environ[_STARTED_KEY] = time.perf_counter()
+
+
+def finish_request(response):
+    """Add Server-Timing and record metrics for the request (an after_request hook)."""
+    started = request.environ.get(_STARTED_KEY)
+    if started is None or request.url_rule is None:
+        return response
+    total = time.perf_counter() - started
+    phases = request.environ.get(_ENVIRON_KEY, {})
+
+    endpoint = request.url_rule.rule
+    for name, seconds in phases.items():
+        phase_seconds.observe((endpoint, name), seconds)
+    request_seconds.observe((endpoint, str(response.status_code)), total)
+
+    timings = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in phases.items()]
+    timings.append(f"total;dur={total * 1000:.2f}")
+    response.headers['Server-Timing'] = ', '.join(timings)
+    return response
+
+
+def _format_labels(labels):
+    return ','.join(f'{key}="{value}"' for key, value in labels)
+
+
+def _render_histogram(lines, name, help_text, histogram, label_names):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for values, series in sorted(histogram.snapshot().items()):
+        labels = list(zip(label_names, values))
+        for bound, count in zip(histogram.buckets, series['counts']):
+            lines.append(f"{name}_bucket{{{_format_labels(labels + [('le', f'{bound:g}')])}}} {count}")
+        lines.append(f"{name}_bucket{{{_format_labels(labels + [('le', '+Inf')])}}} {series['count']}")
+        lines.append(f"{name}_sum{{{_format_labels(labels)}}} {series['sum']:.6f}")
+        lines.append(f"{name}_count{{{_format_labels(labels)}}} {series['count']}")
+
+
+def render_metrics(gauges=(), events=None):
+    """Return the collected metrics in the Prometheus text exposition format.
+
+    gauges is an iterable of (name, help, value) and events a dict of event
+    counters (see log.counters), both added after the histograms.
+    """
+    lines = []
+    _render_histogram(lines, 'llm_dashboard_request_duration_seconds',
+                      'Time to produce a response, by endpoint and status.',
+                      request_seconds, ('endpoint', 'status'))
+    _render_histogram(lines, 'llm_dashboard_phase_duration_seconds',
+                      'Time spent in each phase of a request, by endpoint.',
+                      phase_seconds, ('endpoint', 'phase'))
+    for name, help_text, value in gauges:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    if events:
+        lines.append("# HELP llm_dashboard_events_total Counted events such as rows that failed to parse.")
+        lines.append("# TYPE llm_dashboard_events_total counter")
+        for event, total in sorted(events.items()):
+            lines.append(f"llm_dashboard_events_total{{{_format_labels([('event', event)])}}} {total}")
+    return '\n'.join(lines) + '\n'
+
+
+def _profile_path(extension):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = request.path.strip('/').replace('/', '-') or 'index'
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    return os.path.join(PROFILE_DIR, f"{name}-{stamp}-{os.getpid()}-{threading.get_ident()}.{extension}")
+
+
+def profiled(view):
+    """Profile a view when the request asks for it with ?profile=.
+
+    Apply it below @offload, so the profiler runs in the thread that does
+    the work.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        mode = request.args.get('profile') if PROFILING_ENABLED else None
+        if not mode:
+            return view(*args, **kwargs)
+
+        if mode == 'pyinstrument' and PYINSTRUMENT_AVAILABLE:
+            profiler = pyinstrument.Profiler()
+            profiler.start()
+            try:
+                response = view(*args, **kwargs)
+            finally:
+                profiler.stop()
+                path = _profile_path('html')
+                with open(path, 'w') as f:
+                    f.write(profiler.output_html())
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                response = view(*args, **kwargs)
+            finally:
+                profiler.disable()
+                path = _profile_path('prof')
+                profiler.dump_stats(path)
+
+        log_event(logger, logging.INFO, 'profile written', path=path)
+        response = make_response(response)
+        response.headers['X-Profile'] = os.path.basename(path)
+        return response
+    return wrapper
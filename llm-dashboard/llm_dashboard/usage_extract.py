@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Single place where response_json blobs are decoded.
+
+Everything that needs usage numbers out of a response (fact ingestion, the
+debug endpoint) goes through extract_usage(), which parses each blob once
+and caches the small extracted record by response id. Responses in the llm
+logs database are never rewritten, so a cached record stays valid.
+
+On the ingestion path fetch_usage() goes further and asks SQLite for just
+the usage.* numbers with json_extract, so streamed bodies are never turned
+into Python objects at all. It falls back to the Python parser for a batch
+that contains malformed JSON, or when SQLite lacks the JSON functions.
+KIND_SQL classifies each response (streamed chunk, completion, ...) so the
+classification can be stored once instead of re-running LIKE scans.
+
+The JSON parser is picked at import time: orjson, then pysimdjson, then the
+standard library. Set LLM_DASHBOARD_JSON_PARSER to force one of them.
+"""
+import os
+import json
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict, namedtuple
+
+from log import get_logger, log_sampled, count
+
+logger = get_logger('usage_extract')
+
+# Extracted records kept in the id cache
+EXTRACT_CACHE_SIZE = int(os.environ.get('LLM_DASHBOARD_EXTRACT_CACHE_SIZE', '10000'))
+
+UsageRecord = namedtuple('UsageRecord', [
+    'id', 'model', 'prompt_tokens', 'completion_tokens', 'total_tokens', 'cost'
+])
+
+
+def _load_parser(preferred=None):
+    """Return (name, loads) for the fastest available JSON parser."""
+    candidates = [preferred] if preferred else ['orjson', 'simdjson', 'json']
+    for name in candidates:
+        try:
+            if name == 'orjson':
+                import orjson
+                return name, orjson.loads
+            if name == 'simdjson':
+                import simdjson
+                return name, simdjson.loads
+            if name == 'json':
+                return name, json.loads
+        except ImportError:
+            continue
+    # A forced parser that isn't installed falls back to the stdlib
+    return 'json', json.loads
+
+
+JSON_PARSER, _loads = _load_parser(os.environ.get('LLM_DASHBOARD_JSON_PARSER'))
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+# Columns that read only usage.* out of response_json. SQLite caches the
+# parsed document across the calls on one row, so each body is parsed once.
+USAGE_SQL = """
+    COALESCE(json_extract(response_json, '$.usage.prompt_tokens'), 0),
+    COALESCE(json_extract(response_json, '$.usage.completion_tokens'), 0),
+    COALESCE(json_extract(response_json, '$.usage.total_tokens'), 0),
+    json_extract(response_json, '$.usage.cost')
+"""
+
+# Kind given to streamed chat responses, the ones the dashboard charts
+CHUNK_KIND = 'chat.completion.chunk'
+
+
+def _sqlite_has_json():
+    """Return True if this SQLite build has the JSON functions."""
+    try:
+        sqlite3.connect(':memory:').execute("SELECT json_valid('{}')")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+# Whether usage and kinds can be read with SQLite's JSON functions
+_sql_extraction = _sqlite_has_json()
+
+# Expression classifying a responses row by the shape of its response_json:
+# streamed chat chunks as before, otherwise the body's "object" field
+# ('chat.completion', 'embedding', 'list', ...), falling back to 'other'.
+# The leading LIKE keeps the original chunk test, so chunk rows never pay
+# for a JSON parse here.
+if _sql_extraction:
+    KIND_SQL = f"""
+    CASE WHEN response_json LIKE '%{CHUNK_KIND}%' THEN '{CHUNK_KIND}'
+         WHEN json_valid(response_json)
+              THEN COALESCE(json_extract(response_json, '$.object'), 'other')
+         ELSE 'other' END
+    """
+else:
+    KIND_SQL = f"""
+    CASE WHEN response_json LIKE '%{CHUNK_KIND}%' THEN '{CHUNK_KIND}' ELSE 'other' END
+    """
+
+
+def parse_usage(id, model, response_json_str):
+    """Decode response_json and pull out its usage block, without caching."""
+    response_json = _loads(response_json_str)
+    usage = response_json.get('usage') or {}
+    return UsageRecord(
+        id,
+        model,
+        usage.get('prompt_tokens') or 0,
+        usage.get('completion_tokens') or 0,
+        usage.get('total_tokens') or 0,
+        usage.get('cost'),
+    )
+
+
+def extract_usage(id, model, response_json_str):
+    """Return the UsageRecord for a response, or None if it can't be decoded.
+
+    Records are cached by id, so a response that several callers look at is
+    only decoded once.
+    """
+    with _cache_lock:
+        record = _cache.get(id)
+        if record is not None:
+            _cache.move_to_end(id)
+            return record
+
+    try:
+        record = parse_usage(id, model, response_json_str)
+    except (TypeError, AttributeError, ValueError):
+        # Every parser's decode error subclasses ValueError
+        log_sampled(logger, logging.WARNING, 'json_parse_failures',
+                    'could not decode response_json', id=id)
+        return None
+
+    with _cache_lock:
+        _cache[id] = record
+        if len(_cache) > EXTRACT_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return record
+
+
+def fetch_usage(conn, rows):
+    """Return {rowid: UsageRecord} for (rowid, id, model) rows of responses.
+
+    conn is a connection to the logs database. Rows whose JSON can't be
+    decoded are left out.
+    """
+    if not rows:
+        return {}
+
+    by_rowid = {rowid: (id, model) for rowid, id, model in rows}
+    placeholders = ','.join('?' * len(by_rowid))
+    rowids = list(by_rowid)
+
+    if _sql_extraction:
+        try:
+            return {
+                rowid: UsageRecord(*by_rowid[rowid], *usage)
+                for rowid, *usage in conn.execute(
+                    f"SELECT rowid, {USAGE_SQL} FROM responses WHERE rowid IN ({placeholders})",
+                    rowids
+                )
+            }
+        except sqlite3.OperationalError:
+            # A body in this batch is malformed JSON; decode the batch in
+            # Python, which skips just the bad rows
+            count('sql_extraction_fallbacks')
+
+    usage_records = {}
+    for rowid, response_json_str in conn.execute(
+        f"SELECT rowid, response_json FROM responses WHERE rowid IN ({placeholders})",
+        rowids
+    ):
+        record = extract_usage(*by_rowid[rowid], response_json_str)
+        if record is not None:
+            usage_records[rowid] = record
+    return usage_records
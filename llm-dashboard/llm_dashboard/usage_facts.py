@@ -0,0 +1,1147 @@
+#!/usr/bin/env python3
+"""Derived usage_facts table for the dashboard.
+
+Every chat.completion.chunk response in the llm logs database is parsed once
+and stored as a single row (id, model, normalized UTC timestamp and day, token
+counts, cost) in a separate SQLite file. The API endpoints then answer with
+indexed (ts, model) range queries against this table instead of scanning and
+re-parsing every response_json. The same ingestion also keeps a daily_rollups
+cube of per (day, model) totals, so chart queries only sum one row per model
+per day however many responses exist, and daily_histograms, mergeable
+distribution sketches (see sketches.py) that percentile queries combine the
+same way. Responses that report no cost are priced from the local pricing
+table (see pricing.py) as they are ingested.
+
+The facts live in their own database so the dashboard never writes into the
+llm logs database. Any number of logs databases (for example copies
+gathered from several hosts) can feed the same facts. A sync_state table
+records, per logs database, the last rowid and datetime_utc ingested; a
+background thread watches each database's data_version and only processes
+rows past its watermark.
+"""
+import os
+import sqlite3
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from operator import itemgetter
+
+from dates import normalize_timestamp, day_range_bounds
+from db_pool import connect_readonly, readonly_connection, file_inode
+from log import get_logger, log_event
+from pricing import PriceTable, PRICE_SQL, load_price_file
+from usage_extract import fetch_usage, KIND_SQL, CHUNK_KIND
+from sketches import bucket_index
+
+logger = get_logger('usage_facts')
+
+# Location of the derived facts database
+FACTS_DB_PATH = os.environ.get(
+    'LLM_DASHBOARD_FACTS_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'usage_facts.db')
+)
+
+# Number of source rows processed per batch while syncing; kept under
+# SQLite's default limit of 999 bound parameters per statement
+SYNC_BATCH_SIZE = 500
+
+# Logs databases scanned concurrently when syncing several at once
+SYNC_WORKERS = int(os.environ.get('LLM_DASHBOARD_SYNC_WORKERS', '4'))
+
+# Seconds between background checks for new responses
+INGEST_POLL_INTERVAL = float(os.environ.get('LLM_DASHBOARD_POLL_INTERVAL', '2'))
+
+def _tokens_per_second(fact):
+    """Completion tokens per second of a fact, or None if it wasn't timed."""
+    if not fact[10]:
+        return None
+    return fact[7] * 1000.0 / fact[10]
+
+
+# Per-fact values kept as per (day, model) distribution sketches in
+# daily_histograms; a metric that returns None skips that fact
+HISTOGRAM_METRICS = {
+    'prompt_tokens': itemgetter(6),
+    'completion_tokens': itemgetter(7),
+    'total_tokens': itemgetter(8),
+    'cost': itemgetter(9),
+    'duration_ms': itemgetter(10),
+    'tokens_per_second': _tokens_per_second,
+}
+
+# Bump whenever an existing table's layout changes; older facts databases
+# are then rebuilt from scratch. New tables and indexes only need adding to
+# SCHEMA, which is re-applied (IF NOT EXISTS) on every writer connection.
+SCHEMA_VERSION = 7
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage_facts (
+    id TEXT PRIMARY KEY,
+    source_rowid INTEGER NOT NULL,
+    model TEXT,
+    ts TEXT NOT NULL,
+    day TEXT NOT NULL,
+    datetime_utc TEXT,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    total_tokens INTEGER NOT NULL DEFAULT 0,
+    cost REAL NOT NULL DEFAULT 0,
+    duration_ms INTEGER,
+    reported_cost REAL
+);
+CREATE INDEX IF NOT EXISTS idx_usage_facts_ts_model ON usage_facts (ts, model);
+CREATE INDEX IF NOT EXISTS idx_usage_facts_model_ts ON usage_facts (model, ts);
+CREATE INDEX IF NOT EXISTS idx_usage_facts_cost ON usage_facts (cost DESC, id);
+CREATE INDEX IF NOT EXISTS idx_usage_facts_tokens ON usage_facts (total_tokens DESC, id);
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    day TEXT NOT NULL,
+    model TEXT NOT NULL,
+    requests INTEGER NOT NULL DEFAULT 0,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    total_tokens INTEGER NOT NULL DEFAULT 0,
+    cost REAL NOT NULL DEFAULT 0,
+    timed_requests INTEGER NOT NULL DEFAULT 0,
+    duration_ms INTEGER NOT NULL DEFAULT 0,
+    timed_completion_tokens INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, model)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS daily_histograms (
+    day TEXT NOT NULL,
+    model TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (metric, day, model, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS response_kinds (
+    id TEXT PRIMARY KEY,
+    model TEXT,
+    kind TEXT NOT NULL,
+    ts TEXT,
+    datetime_utc TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_response_kinds_kind_model ON response_kinds (kind, model);
+CREATE INDEX IF NOT EXISTS idx_response_kinds_kind_ts ON response_kinds (kind, ts);
+CREATE TABLE IF NOT EXISTS model_prices (
+    model TEXT NOT NULL,
+    effective_from TEXT NOT NULL,
+    effective_until TEXT,
+    prompt_per_million REAL NOT NULL,
+    completion_per_million REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS price_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    digest TEXT NOT NULL,
+    applied_at TEXT
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    source TEXT PRIMARY KEY,
+    last_rowid INTEGER NOT NULL DEFAULT 0,
+    last_datetime_utc TEXT,
+    updated_at TEXT
+);
+"""
+
+# Serialises use of the facts writer (watermark reads and batch writes)
+_sync_lock = threading.Lock()
+
+# Per-source locks, so concurrent requests don't scan the same rows twice
+_source_locks = {}
+_source_locks_lock = threading.Lock()
+
+# One writable connection per facts database, only used under _sync_lock
+_writers = {}
+
+# Logs databases already reported as having no responses table; each is
+# only touched under its own source lock
+_skipped_sources = set()
+
+# Facts databases whose schema has been checked by this process
+_ready_paths = set()
+
+
+def get_facts_connection(path=None):
+    """Open a writable connection to the facts database, migrating if needed."""
+    conn = sqlite3.connect(
+        path or FACTS_DB_PATH, timeout=30, isolation_level=None, check_same_thread=False
+    )
+    conn.row_factory = sqlite3.Row
+
+    if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        # WAL lets request threads keep reading while ingestion writes
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-check under the write lock in case another process migrated
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                # Everything here is derived from the logs database, so an
+                # outdated layout is simply dropped and re-ingested
+                conn.execute("DROP TABLE IF EXISTS usage_facts")
+                conn.execute("DROP TABLE IF EXISTS daily_rollups")
+                conn.execute("DROP TABLE IF EXISTS daily_histograms")
+                conn.execute("DROP TABLE IF EXISTS response_kinds")
+                conn.execute("DROP TABLE IF EXISTS model_prices")
+                conn.execute("DROP TABLE IF EXISTS price_state")
+                conn.execute("DROP TABLE IF EXISTS sync_state")
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _get_writer(path):
+    """Return the cached writable connection for path (caller holds _sync_lock)."""
+    key = os.path.abspath(path or FACTS_DB_PATH)
+    conn = _writers.get(key)
+    if conn is None:
+        conn = _writers[key] = get_facts_connection(key)
+        _ready_paths.add(key)
+    return conn
+
+
+def facts_connection(path=None):
+    """Borrow a pooled read-only connection to the facts database."""
+    key = os.path.abspath(path or FACTS_DB_PATH)
+    if key not in _ready_paths:
+        # Make sure the schema exists before the first read-only open
+        with _sync_lock:
+            _get_writer(key)
+    return readonly_connection(key)
+
+
+def extract_facts(source, rows):
+    """Turn (rowid, id, model, datetime_utc, duration_ms) responses rows into facts.
+
+    Only the usage numbers are read from response_json, via the shared
+    extraction layer. Rows with an unparseable date or body are dropped.
+    The cost is the reported one, or None until price_facts fills it in.
+    """
+    timestamps = {}
+    for rowid, id, model, datetime_utc, _ in rows:
+        ts = normalize_timestamp(datetime_utc)
+        if ts:
+            timestamps[rowid] = ts
+
+    usage_records = fetch_usage(
+        source, [(rowid, id, model) for rowid, id, model, _, _ in rows if rowid in timestamps]
+    )
+
+    facts = []
+    for rowid, id, model, datetime_utc, duration_ms in rows:
+        usage = usage_records.get(rowid)
+        if usage is None:
+            continue
+        ts = timestamps[rowid]
+        facts.append((
+            id,
+            rowid,
+            model,
+            ts,
+            ts[:10],
+            datetime_utc,
+            usage.prompt_tokens,
+            usage.completion_tokens,
+            usage.total_tokens,
+            usage.cost,
+            duration_ms,
+            usage.cost,
+        ))
+    return facts
+
+
+def price_facts(batch, prices):
+    """Fill in the cost of facts that reported none from a PriceTable.
+
+    Facts no price covers cost 0, as they did before pricing existed.
+    """
+    priced = []
+    for fact in batch:
+        if fact[9] is None:
+            cost = prices.cost(fact[2], fact[4], fact[6], fact[7])
+            fact = fact[:9] + (cost or 0,) + fact[10:]
+        priced.append(fact)
+    return priced
+
+
+def store_facts(facts, batch):
+    """Insert new facts and fold them into daily_rollups and daily_histograms.
+
+    Must run inside the caller's write transaction. Facts whose id is
+    already stored are skipped so the rollups never count a response twice.
+    Returns the number of facts stored.
+    """
+    if not batch:
+        return 0
+
+    placeholders = ','.join('?' * len(batch))
+    existing = {
+        row[0] for row in facts.execute(
+            f"SELECT id FROM usage_facts WHERE id IN ({placeholders})",
+            [fact[0] for fact in batch]
+        )
+    }
+    new_facts = [fact for fact in batch if fact[0] not in existing]
+
+    facts.executemany("""
+        INSERT INTO usage_facts (
+            id, source_rowid, model, ts, day, datetime_utc,
+            prompt_tokens, completion_tokens, total_tokens, cost, duration_ms, reported_cost
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, new_facts)
+
+    # Sum the batch per (day, model) first so each rollup row is written once
+    rollups = {}
+    for fact in new_facts:
+        key = (fact[4], fact[2] or '')
+        totals = rollups.setdefault(key, [0, 0, 0, 0, 0, 0, 0, 0])
+        totals[0] += 1
+        totals[1] += fact[6]
+        totals[2] += fact[7]
+        totals[3] += fact[8]
+        totals[4] += fact[9]
+        # Latency totals only cover responses llm recorded a duration for
+        if fact[10]:
+            totals[5] += 1
+            totals[6] += fact[10]
+            totals[7] += fact[7]
+
+    facts.executemany("""
+        INSERT INTO daily_rollups (
+            day, model, requests, prompt_tokens, completion_tokens, total_tokens, cost,
+            timed_requests, duration_ms, timed_completion_tokens
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (day, model) DO UPDATE SET
+            requests = requests + excluded.requests,
+            prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+            completion_tokens = completion_tokens + excluded.completion_tokens,
+            total_tokens = total_tokens + excluded.total_tokens,
+            cost = cost + excluded.cost,
+            timed_requests = timed_requests + excluded.timed_requests,
+            duration_ms = duration_ms + excluded.duration_ms,
+            timed_completion_tokens = timed_completion_tokens + excluded.timed_completion_tokens
+    """, [key + tuple(totals) for key, totals in rollups.items()])
+
+    # Likewise count each batch into its histogram buckets before writing
+    histograms = {}
+    for fact in new_facts:
+        for metric, value_of in HISTOGRAM_METRICS.items():
+            value = value_of(fact)
+            if value is None:
+                continue
+            key = (metric, fact[4], fact[2] or '', bucket_index(value))
+            histograms[key] = histograms.get(key, 0) + 1
+
+    facts.executemany("""
+        INSERT INTO daily_histograms (metric, day, model, bucket, count)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (metric, day, model, bucket) DO UPDATE SET
+            count = count + excluded.count
+    """, [key + (count,) for key, count in histograms.items()])
+
+    return len(new_facts)
+
+
+def store_kinds(facts, rows):
+    """Record the kind of each (rowid, id, model, datetime_utc, kind, ...) row."""
+    facts.executemany("""
+        INSERT OR IGNORE INTO response_kinds (id, model, kind, ts, datetime_utc)
+        VALUES (?, ?, ?, ?, ?)
+    """, [
+        (row[1], row[2], row[4], normalize_timestamp(row[3]), row[3])
+        for row in rows
+    ])
+
+
+# PriceTables built from the model_prices of a facts database, by digest
+_price_tables = {}
+
+# Pricing digest this process last applied to each facts database
+_applied_digests = {}
+
+
+def stored_prices(facts):
+    """Return the PriceTable stored in the facts database.
+
+    Ingestion prices from this copy, never from the file directly, so a
+    batch written after a reprice can't use the prices it replaced.
+    """
+    row = facts.execute("SELECT digest FROM price_state WHERE id = 1").fetchone()
+    digest = row[0] if row else ''
+    table = _price_tables.get(digest)
+    if table is None:
+        table = _price_tables[digest] = PriceTable(facts.execute("""
+            SELECT model, effective_from, effective_until, prompt_per_million, completion_per_million
+            FROM model_prices
+        """).fetchall())
+    return table
+
+
+def apply_prices(facts, digest, entries, force=False):
+    """Store a pricing table and reprice every fact that reported no cost.
+
+    Must run inside the caller's write transaction. Nothing happens when
+    digest is already the stored one, unless force is set. Facts, daily
+    rollup costs and the cost sketches are all recomputed with set-based
+    SQL over the facts table. Returns (unreported, priced) fact counts, or
+    None if the table was already current.
+    """
+    row = facts.execute("SELECT digest FROM price_state WHERE id = 1").fetchone()
+    if not force and (row[0] if row else '') == digest:
+        return None
+
+    facts.execute("DELETE FROM model_prices")
+    facts.executemany("""
+        INSERT INTO model_prices (
+            model, effective_from, effective_until, prompt_per_million, completion_per_million
+        ) VALUES (?, ?, ?, ?, ?)
+    """, entries)
+
+    facts.execute(f"""
+        UPDATE usage_facts SET cost = COALESCE({PRICE_SQL}, 0)
+        WHERE reported_cost IS NULL
+    """)
+
+    # Rebuild each (day, model) cost from the repriced facts
+    facts.execute("DROP TABLE IF EXISTS temp.repriced_rollups")
+    facts.execute("""
+        CREATE TEMP TABLE repriced_rollups (
+            day TEXT NOT NULL, model TEXT NOT NULL, cost REAL NOT NULL,
+            PRIMARY KEY (day, model)
+        ) WITHOUT ROWID
+    """)
+    facts.execute("""
+        INSERT INTO temp.repriced_rollups (day, model, cost)
+        SELECT day, COALESCE(model, ''), SUM(cost) FROM usage_facts
+        GROUP BY day, COALESCE(model, '')
+    """)
+    facts.execute("""
+        UPDATE daily_rollups SET cost = COALESCE((
+            SELECT cost FROM temp.repriced_rollups r
+            WHERE r.day = daily_rollups.day AND r.model = daily_rollups.model
+        ), 0)
+    """)
+    facts.execute("DROP TABLE temp.repriced_rollups")
+
+    # And the cost sketches, bucketing in SQL with the same bucket function
+    facts.create_function('sketch_bucket', 1, bucket_index, deterministic=True)
+    facts.execute("DELETE FROM daily_histograms WHERE metric = 'cost'")
+    facts.execute("""
+        INSERT INTO daily_histograms (metric, day, model, bucket, count)
+        SELECT 'cost', day, COALESCE(model, ''), sketch_bucket(cost), COUNT(*)
+        FROM usage_facts
+        GROUP BY day, COALESCE(model, ''), sketch_bucket(cost)
+    """)
+
+    facts.execute("""
+        INSERT OR REPLACE INTO price_state (id, digest, applied_at)
+        VALUES (1, ?, datetime('now'))
+    """, (digest,))
+
+    unreported, priced = facts.execute(f"""
+        SELECT COUNT(*), COALESCE(SUM({PRICE_SQL} IS NOT NULL), 0)
+        FROM usage_facts WHERE reported_cost IS NULL
+    """).fetchone()
+    return unreported, priced
+
+
+def reprice_usage_facts(facts_path=None, pricing_path=None, force=True, wait=True):
+    """Apply the pricing file to the facts database.
+
+    Called by every sync with force=False, which only does work when the
+    file has changed since it was last applied. With wait=False nothing
+    happens if the facts writer is busy; a later sync applies the file.
+    Returns a summary dict, or None if there was nothing to do.
+    """
+    digest, entries, _ = load_price_file(pricing_path)
+    key = os.path.abspath(facts_path or FACTS_DB_PATH)
+    if not force and _applied_digests.get(key) == digest:
+        return None
+
+    if not _sync_lock.acquire(blocking=wait):
+        return None
+    try:
+        facts = _get_writer(facts_path)
+        facts.execute("BEGIN IMMEDIATE")
+        try:
+            counts = apply_prices(facts, digest, entries, force)
+            facts.commit()
+        except Exception:
+            facts.rollback()
+            raise
+        _applied_digests[key] = digest
+    finally:
+        _sync_lock.release()
+
+    if counts is None:
+        return None
+    log_event(logger, logging.INFO, 'repriced usage facts', entries=len(entries),
+              unreported=counts[0], priced=counts[1])
+    return {'entries': len(entries), 'unreported': counts[0], 'priced': counts[1]}
+
+
+def _duration_sql(source):
+    """Return the select expression for duration_ms in a logs database.
+
+    Very old llm databases have no duration_ms column; their responses are
+    simply untimed.
+    """
+    columns = {row[1] for row in source.execute("PRAGMA table_info(responses)")}
+    return 'duration_ms' if 'duration_ms' in columns else 'NULL'
+
+
+def get_watermark(facts, source):
+    """Return (last_rowid, last_datetime_utc) already ingested from source."""
+    row = facts.execute(
+        "SELECT last_rowid, last_datetime_utc FROM sync_state WHERE source = ?",
+        (source,)
+    ).fetchone()
+    if row:
+        return row['last_rowid'], row['last_datetime_utc']
+    return 0, None
+
+
+def _source_lock(source_key):
+    """Return the lock that stops two threads syncing one source at once."""
+    with _source_locks_lock:
+        return _source_locks.setdefault(source_key, threading.Lock())
+
+
+def _sync_source(db_path, facts_path, wait=True):
+    """Ingest responses added to one logs database since its watermark.
+
+    Reading and extracting a batch happens without holding _sync_lock, so
+    several sources can be scanned at once; only the short write of each
+    finished batch is serialised. The watermark is re-read inside the write
+    transaction and a batch is dropped if another process got there first.
+    With wait=False a source that another thread is already syncing is
+    skipped instead of waited for.
+    """
+    source_key = os.path.abspath(db_path)
+    lock = _source_lock(source_key)
+    if not lock.acquire(blocking=wait):
+        return 0
+    try:
+        return _sync_source_locked(db_path, source_key, facts_path)
+    finally:
+        lock.release()
+
+
+def _skip_source(source_key, message, **fields):
+    """Log that a source is being skipped, once until it next syncs.
+
+    Every sync checks each source again, so without this a bad file in a
+    glob would log on every poll.
+    """
+    if source_key not in _skipped_sources:
+        _skipped_sources.add(source_key)
+        log_event(logger, logging.WARNING, message, **fields)
+
+
+def _source_duration_sql(db_path):
+    """Return _duration_sql() for a logs database, or None if it has no responses table."""
+    with readonly_connection(db_path) as source:
+        if not source.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='responses'"
+        ).fetchone():
+            return None
+        return _duration_sql(source)
+
+
+def _read_batch(db_path, last_rowid, duration_sql):
+    """Return the next responses rows after last_rowid and the facts among them."""
+    with readonly_connection(db_path) as source:
+        # Every response is classified once here; only chunk responses
+        # carry usage we chart, so usage is extracted for those alone
+        rows = source.execute(f"""
+            SELECT rowid, id, model, datetime_utc, {KIND_SQL}, {duration_sql}
+            FROM responses
+            WHERE rowid > ?
+            ORDER BY rowid
+            LIMIT ?
+        """, (last_rowid, SYNC_BATCH_SIZE)).fetchall()
+        batch = extract_facts(source, [
+            tuple(row[:4]) + (row[5],) for row in rows if row[4] == CHUNK_KIND
+        ])
+    return rows, batch
+
+
+def _sync_source_locked(db_path, source_key, facts_path):
+    """Body of _sync_source, run while holding the source's lock.
+
+    A file that isn't an SQLite database, or is only half copied, is
+    skipped until it reads cleanly; the other sources still sync. Only
+    reads of the source are caught, so errors writing the facts still
+    propagate.
+    """
+    added = 0
+
+    try:
+        duration_sql = _source_duration_sql(db_path)
+    except sqlite3.DatabaseError as e:
+        _skip_source(source_key, 'skipping unreadable database', path=db_path, error=str(e))
+        return 0
+    if duration_sql is None:
+        _skip_source(source_key, 'skipping database without a responses table', path=db_path)
+        return 0
+    _skipped_sources.discard(source_key)
+
+    while True:
+        with _sync_lock:
+            last_rowid, _ = get_watermark(_get_writer(facts_path), source_key)
+
+        try:
+            rows, batch = _read_batch(db_path, last_rowid, duration_sql)
+        except sqlite3.DatabaseError as e:
+            # Keep what was stored so far; the rest is retried next sync
+            _skip_source(source_key, 'skipping unreadable database', path=db_path, error=str(e))
+            return added
+
+        if not rows:
+            return added
+
+        with _sync_lock:
+            facts = _get_writer(facts_path)
+            facts.execute("BEGIN IMMEDIATE")
+            try:
+                current_rowid, last_datetime = get_watermark(facts, source_key)
+                if current_rowid != last_rowid:
+                    # Another process ingested these rows meanwhile
+                    facts.rollback()
+                    continue
+
+                store_kinds(facts, rows)
+                stored = store_facts(facts, price_facts(batch, stored_prices(facts)))
+
+                facts.execute("""
+                    INSERT OR REPLACE INTO sync_state (
+                        source, last_rowid, last_datetime_utc, updated_at
+                    ) VALUES (?, ?, ?, datetime('now'))
+                """, (source_key, rows[-1][0], rows[-1][3] or last_datetime))
+                facts.commit()
+            except Exception:
+                facts.rollback()
+                raise
+        added += stored
+
+
+def sync_usage_facts(db_paths, facts_path=None, wait=True):
+    """Ingest responses added to one or more logs databases since the last sync.
+
+    db_paths is a path or a list of paths; all of them feed the same facts,
+    rollups and sketches, so every query aggregates across them. Each file
+    has its own rowid watermark in sync_state. The first sync of a file
+    reads its whole history; later ones only read rows above the watermark,
+    so an unchanged file costs one indexed probe. With several files the
+    per-file scans run concurrently in a thread pool (SQLite releases the
+    GIL while it reads and runs json_extract), and only the writes of
+    finished batches take turns. A changed pricing file is applied before
+    any new rows are read.
+
+    With wait=False, sources another thread is already syncing are left to
+    it, so a caller that only needs the facts stored so far never waits
+    behind a long backlog sync.
+
+    Returns the number of facts added.
+    """
+    if isinstance(db_paths, str):
+        db_paths = [db_paths]
+
+    # Reprice the history first if the pricing file changed
+    reprice_usage_facts(facts_path, force=False, wait=wait)
+
+    if not db_paths:
+        # e.g. an LLM_DASHBOARD_DBS glob that matches no files yet
+        return 0
+    if len(db_paths) == 1:
+        added = _sync_source(db_paths[0], facts_path, wait)
+    else:
+        workers = min(SYNC_WORKERS, len(db_paths))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sync') as executor:
+            added = sum(executor.map(lambda path: _sync_source(path, facts_path, wait), db_paths))
+
+    if added:
+        log_event(logger, logging.INFO, 'ingested usage facts', added=added)
+    return added
+
+
+def _ingestion_loop(db_paths, poll_interval, facts_path):
+    """Poll the logs databases and sync the ones that have been written to.
+
+    db_paths is a list of paths or a callable returning one, so files that
+    appear later (for example matching a glob) are picked up.
+    """
+    conns = {}
+    inodes = {}
+    last_versions = {}
+    while True:
+        paths = db_paths() if callable(db_paths) else db_paths
+        changed = []
+        for path in paths:
+            try:
+                # A copy refreshed by renaming a new file over the old one
+                # needs a new connection; the old one still sees the old file
+                inode = file_inode(path)
+                if path in conns and inode != inodes.get(path):
+                    conns.pop(path).close()
+                    last_versions.pop(path, None)
+                conn = conns.get(path)
+                if conn is None:
+                    conn = conns[path] = connect_readonly(path)
+                    inodes[path] = inode
+                # data_version changes whenever another connection commits,
+                # so an idle database costs a single pragma per poll
+                version = conn.execute("PRAGMA data_version").fetchone()[0]
+                if version != last_versions.get(path):
+                    changed.append(path)
+                    last_versions[path] = version
+            except Exception as e:
+                if isinstance(e, sqlite3.DatabaseError):
+                    # Not an SQLite file, or still being copied in
+                    _skip_source(os.path.abspath(path), 'skipping unreadable database',
+                                 path=path, error=str(e))
+                else:
+                    log_event(logger, logging.ERROR, 'usage facts ingestion error', path=path, error=str(e))
+                if path in conns:
+                    conns.pop(path).close()
+        try:
+            if changed:
+                sync_usage_facts(changed, facts_path)
+        except Exception as e:
+            log_event(logger, logging.ERROR, 'usage facts ingestion error', exc_info=True)
+            # Look at the same files again on the next poll
+            for path in changed:
+                last_versions.pop(path, None)
+        time.sleep(poll_interval)
+
+
+def start_ingestion_thread(db_paths, poll_interval=None, facts_path=None):
+    """Start a daemon thread that keeps usage_facts in step with db_paths.
+
+    db_paths is a path, a list of paths, or a callable returning a list.
+    """
+    if isinstance(db_paths, str):
+        db_paths = [db_paths]
+    if poll_interval is None:
+        poll_interval = INGEST_POLL_INTERVAL
+    thread = threading.Thread(
+        target=_ingestion_loop,
+        args=(db_paths, poll_interval, facts_path),
+        name='usage-facts-ingestion',
+        daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def top_usage_facts(start_date, end_date, model='all', limit=10, offset=0,
+                    after=None, facts_path=None):
+    """Return the most expensive facts in the range, highest cost first.
+
+    Ties are broken by id so the order is stable. Pass after=(cost, id) of
+    the last row of the previous page for keyset paging, or an offset. When
+    the range holds enough of the facts, the query walks the (cost DESC, id)
+    index from the cursor and stops after limit + offset matches; otherwise
+    it reads the range off the ts index and SQLite keeps only limit + offset
+    rows while sorting. Either way memory does not grow with the range.
+    """
+    with facts_connection(facts_path) as conn:
+        by_cost = _sort_index_pays(conn, start_date, end_date, model, limit + offset)
+        where, params = _range_filter(start_date, end_date, model, unindexed=by_cost)
+        if after is not None:
+            where += " AND cost <= ? AND (cost < ? OR id > ?)"
+            params.extend([after[0], after[0], after[1]])
+        query = f"""
+        SELECT id, model, day, datetime_utc,
+               prompt_tokens, completion_tokens, total_tokens, cost
+        FROM usage_facts
+        WHERE {where}
+        ORDER BY cost DESC, id
+        LIMIT ? OFFSET ?
+        """
+        params.extend([limit, offset])
+        return conn.execute(query, params).fetchall()
+
+
+# Sort keys accepted by list_usage_facts and the usage_facts column behind each
+RECORD_SORTS = {
+    'time': 'ts',
+    'cost': 'cost',
+    'tokens': 'total_tokens',
+}
+
+
+def list_usage_facts(start_date, end_date, model='all', min_cost=None, sort='time',
+                     descending=True, limit=50, after=None, facts_path=None):
+    """Return one page of facts ordered by a RECORD_SORTS key, then id.
+
+    Paging is keyset only: after is the (sort value, id) of the last row of
+    the previous page. A time-sorted page seeks past the cursor on the ts
+    index. A cost or tokens page walks the (cost DESC, id) or
+    (total_tokens DESC, id) index from the cursor when the range holds
+    enough of the facts for that to find limit rows quickly, so a deep page
+    costs about the same as the first. For a narrow range it reads the range
+    off the ts index and keeps only limit rows while sorting.
+    """
+    column = RECORD_SORTS[sort]
+    with facts_connection(facts_path) as conn:
+        by_sort_index = column != 'ts' and _sort_index_pays(conn, start_date, end_date, model, limit)
+        where, params = _range_filter(start_date, end_date, model, unindexed=by_sort_index)
+        if min_cost is not None:
+            where += " AND cost >= ?"
+            params.append(min_cost)
+        if after is not None:
+            # The plain bound lets SQLite seek to the cursor on the index
+            op = '<' if descending else '>'
+            where += f" AND {column} {op}= ? AND ({column} {op} ? OR id > ?)"
+            params.extend([after[0], after[0], after[1]])
+        query = f"""
+        SELECT id, model, day, ts, datetime_utc,
+               prompt_tokens, completion_tokens, total_tokens, cost
+        FROM usage_facts
+        WHERE {where}
+        ORDER BY {column} {'DESC' if descending else 'ASC'}, id
+        LIMIT ?
+        """
+        params.append(limit)
+        return conn.execute(query, params).fetchall()
+
+
+# Columns written by the raw usage export, in order
+EXPORT_COLUMNS = [
+    'id', 'model', 'datetime_utc', 'ts', 'day',
+    'prompt_tokens', 'completion_tokens', 'total_tokens', 'cost', 'duration_ms'
+]
+
+
+def iter_usage_facts(start_date, end_date, model='all', batch_size=SYNC_BATCH_SIZE,
+                     facts_path=None):
+    """Yield batches of fact tuples (EXPORT_COLUMNS order) in time order.
+
+    Rows are fetched batch_size at a time from a single cursor, so memory
+    stays constant however many rows the range holds. The pooled connection
+    is released when the generator finishes or is closed early.
+    """
+    where, params = _range_filter(start_date, end_date, model)
+    query = f"""
+    SELECT {', '.join(EXPORT_COLUMNS)}
+    FROM usage_facts
+    WHERE {where}
+    ORDER BY ts, id
+    """
+    with facts_connection(facts_path) as conn:
+        cursor = conn.execute(query, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield [tuple(row) for row in rows]
+        finally:
+            cursor.close()
+
+
+def _range_filter(start_date, end_date, model, unindexed=False):
+    """Return the WHERE clause and params shared by the range queries.
+
+    With unindexed, the ts and model terms are written as +ts and +model,
+    which keeps SQLite from answering them with the ts or model index so a
+    query ordered by another indexed column can walk that index instead.
+    """
+    prefix = '+' if unindexed else ''
+    where = f"{prefix}ts BETWEEN ? AND ?"
+    params = list(day_range_bounds(start_date, end_date))
+    if model != 'all':
+        where += f" AND {prefix}model = ?"
+        params.append(model)
+    return where, params
+
+
+def _sort_index_pays(conn, start_date, end_date, model, rows):
+    """Return True if walking a sort index beats sorting the whole range.
+
+    Walking the index reads about rows * total / matching facts before it
+    has found rows matches, while sorting reads every matching fact, so the
+    index wins once matching squared exceeds rows * total. The counts come
+    from daily_rollups, which is one row per day and model.
+    """
+    where, params = _rollup_filter(start_date, end_date, model)
+    matching, total = conn.execute(f"""
+        SELECT COALESCE(SUM(CASE WHEN {where} THEN requests END), 0),
+               COALESCE(SUM(requests), 0)
+        FROM daily_rollups
+    """, params).fetchone()
+    return matching > 0 and matching * matching > rows * total
+
+
+# SQL expressions mapping a rollup day onto the first day of its period
+PERIOD_EXPRESSIONS = {
+    'day': "day",
+    'week': "date(day, '-6 days', 'weekday 1')",
+    'month': "strftime('%Y-%m-01', day)",
+}
+
+
+def _rollup_filter(start_date, end_date, model):
+    """Return the WHERE clause and params for a daily_rollups window."""
+    where = "day BETWEEN ? AND ?"
+    params = [start_date, end_date]
+    if model != 'all':
+        where += " AND model = ?"
+        params.append(model)
+    return where, params
+
+
+def _reading(facts_path, conn):
+    """Use conn when the caller already holds one, else borrow a pooled one."""
+    if conn is not None:
+        return nullcontext(conn)
+    return facts_connection(facts_path)
+
+
+def summarize_usage_by_model(start_date, end_date, model='all', facts_path=None, conn=None):
+    """Per-model totals for the range, summed from the daily rollups."""
+    where, params = _rollup_filter(start_date, end_date, model)
+    query = f"""
+    SELECT model,
+           SUM(requests) AS requests,
+           SUM(prompt_tokens) AS prompt_tokens,
+           SUM(completion_tokens) AS completion_tokens,
+           SUM(total_tokens) AS total_tokens,
+           SUM(cost) AS total_cost,
+           SUM(cost) / SUM(requests) AS avg_cost_per_request,
+           CASE WHEN SUM(total_tokens) > 0
+                THEN SUM(cost) * 1000.0 / SUM(total_tokens)
+                ELSE 0 END AS cost_per_1k_tokens
+    FROM daily_rollups
+    WHERE {where}
+    GROUP BY model
+    ORDER BY model
+    """
+    with _reading(facts_path, conn) as conn:
+        return [dict(row) for row in conn.execute(query, params)]
+
+
+def summarize_usage_by_period(start_date, end_date, model='all', granularity='day',
+                              facts_path=None, conn=None):
+    """Totals per day, ISO week or month, summed from the daily rollups.
+
+    Each period is labelled with its first day (weeks start on Monday).
+    """
+    period = PERIOD_EXPRESSIONS[granularity]
+    where, params = _rollup_filter(start_date, end_date, model)
+    query = f"""
+    SELECT {period} AS date,
+           SUM(requests) AS requests,
+           SUM(prompt_tokens) AS prompt_tokens,
+           SUM(completion_tokens) AS completion_tokens,
+           SUM(total_tokens) AS total_tokens,
+           SUM(cost) AS total_cost
+    FROM daily_rollups
+    WHERE {where}
+    GROUP BY 1
+    ORDER BY 1
+    """
+    with _reading(facts_path, conn) as conn:
+        return [dict(row) for row in conn.execute(query, params)]
+
+
+def overall_usage_stats(model_data):
+    """Fold per-model totals into the dashboard's overall stats."""
+    total_requests = sum(row['requests'] for row in model_data)
+    total_cost = float(sum(row['total_cost'] for row in model_data))
+    return {
+        'total_requests': total_requests,
+        'total_prompt_tokens': sum(row['prompt_tokens'] for row in model_data),
+        'total_completion_tokens': sum(row['completion_tokens'] for row in model_data),
+        'total_tokens': sum(row['total_tokens'] for row in model_data),
+        'total_cost': total_cost,
+        'avg_cost_per_request': total_cost / total_requests if total_requests else 0
+    }
+
+
+def list_models(kind=CHUNK_KIND, facts_path=None):
+    """Distinct models seen for a response kind, from the (kind, model) index."""
+    with facts_connection(facts_path) as conn:
+        return [row[0] for row in conn.execute(
+            "SELECT DISTINCT model FROM response_kinds WHERE kind = ? ORDER BY model",
+            (kind,)
+        )]
+
+
+def kind_time_bounds(kind=CHUNK_KIND, facts_path=None):
+    """Return the raw datetime_utc of the first and last response of a kind.
+
+    Both ends are single probes of the (kind, ts) index.
+    """
+    with facts_connection(facts_path) as conn:
+        first = conn.execute(
+            "SELECT datetime_utc FROM response_kinds WHERE kind = ? AND ts IS NOT NULL ORDER BY ts LIMIT 1",
+            (kind,)
+        ).fetchone()
+        last = conn.execute(
+            "SELECT datetime_utc FROM response_kinds WHERE kind = ? ORDER BY ts DESC LIMIT 1",
+            (kind,)
+        ).fetchone()
+    return (first[0] if first else None), (last[0] if last else None)
+
+
+def count_kinds(facts_path=None):
+    """Return {kind: number of responses} over everything ingested."""
+    with facts_connection(facts_path) as conn:
+        return {row[0]: row[1] for row in conn.execute(
+            "SELECT kind, COUNT(*) FROM response_kinds GROUP BY kind ORDER BY kind"
+        )}
+
+
+def first_response_id(kind=CHUNK_KIND, facts_path=None):
+    """Return the id of one response of the given kind, or None."""
+    with facts_connection(facts_path) as conn:
+        row = conn.execute(
+            "SELECT id FROM response_kinds WHERE kind = ? LIMIT 1", (kind,)
+        ).fetchone()
+    return row[0] if row else None
+
+
+def latest_fact_rowid(facts_path=None, conn=None):
+    """Return the rowid of the newest stored fact, or 0 if there are none.
+
+    Facts are only ever appended, so this works as a cursor: every fact
+    stored later has a higher rowid.
+    """
+    with _reading(facts_path, conn) as conn:
+        return conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM usage_facts").fetchone()[0]
+
+
+def usage_summary(start_date, end_date, model='all', granularity='day', facts_path=None):
+    """Return (cursor, model_data, date_data) read from one snapshot of the facts.
+
+    The cursor is the latest_fact_rowid() the totals include, so a live
+    stream started after it neither repeats nor misses a fact, even while
+    ingestion is writing.
+    """
+    with facts_connection(facts_path) as conn:
+        # Under WAL the first read pins the snapshot for the whole transaction
+        conn.execute("BEGIN")
+        cursor = latest_fact_rowid(conn=conn)
+        model_data = summarize_usage_by_model(start_date, end_date, model, conn=conn)
+        date_data = summarize_usage_by_period(start_date, end_date, model, granularity, conn=conn)
+    return cursor, model_data, date_data
+
+
+def usage_deltas_since(after_rowid, facts_path=None):
+    """Return (cursor, deltas) for facts stored after the rowid cursor.
+
+    deltas holds per (day, model) totals of just the new facts, and cursor
+    is the rowid to pass next time. The rowid range is read straight off
+    the table's b-tree, so the cost follows the number of new facts.
+    """
+    with facts_connection(facts_path) as conn:
+        rows = conn.execute("""
+            SELECT day, model,
+                   COUNT(*) AS requests,
+                   SUM(prompt_tokens) AS prompt_tokens,
+                   SUM(completion_tokens) AS completion_tokens,
+                   SUM(total_tokens) AS total_tokens,
+                   SUM(cost) AS total_cost,
+                   MAX(rowid) AS last_rowid
+            FROM usage_facts
+            WHERE rowid > ?
+            GROUP BY day, model
+            ORDER BY day, model
+        """, (after_rowid,)).fetchall()
+
+    cursor = max([after_rowid] + [row['last_rowid'] for row in rows])
+    deltas = []
+    for row in rows:
+        delta = dict(row)
+        del delta['last_rowid']
+        delta['model'] = delta['model'] or ''
+        deltas.append(delta)
+    return cursor, deltas
+
+
+# Latency columns summed from daily_rollups; throughput is completion
+# tokens over total duration, both counted over timed responses only
+LATENCY_COLUMNS = """
+           SUM(timed_requests) AS timed_requests,
+           CASE WHEN SUM(timed_requests) > 0
+                THEN SUM(duration_ms) * 1.0 / SUM(timed_requests)
+                ELSE NULL END AS avg_duration_ms,
+           CASE WHEN SUM(duration_ms) > 0
+                THEN SUM(timed_completion_tokens) * 1000.0 / SUM(duration_ms)
+                ELSE NULL END AS tokens_per_second
+"""
+
+
+def summarize_latency(start_date, end_date, model='all', granularity=None,
+                      facts_path=None):
+    """Per-model latency totals, or per (period, model) when granularity is set.
+
+    Summed from the daily rollups, so a 90-day trend reads 90 rows per model.
+    """
+    where, params = _rollup_filter(start_date, end_date, model)
+    if granularity is None:
+        group = "model"
+    else:
+        group = f"{PERIOD_EXPRESSIONS[granularity]} AS date, model"
+    query = f"""
+    SELECT {group}, {LATENCY_COLUMNS}
+    FROM daily_rollups
+    WHERE {where}
+    GROUP BY {'1' if granularity is None else '1, 2'}
+    HAVING SUM(timed_requests) > 0
+    ORDER BY {'1' if granularity is None else '1, 2'}
+    """
+    with facts_connection(facts_path) as conn:
+        return [dict(row) for row in conn.execute(query, params)]
+
+
+def usage_distribution_series(start_date, end_date, metric, model='all', granularity='day',
+                              facts_path=None):
+    """Return {(period, model): sketch} for a HISTOGRAM_METRICS metric."""
+    period = PERIOD_EXPRESSIONS[granularity]
+    where, params = _rollup_filter(start_date, end_date, model)
+    query = f"""
+    SELECT {period} AS date, model, bucket, SUM(count) AS count
+    FROM daily_histograms
+    WHERE metric = ? AND {where}
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3
+    """
+    sketches = {}
+    with facts_connection(facts_path) as conn:
+        for row in conn.execute(query, [metric] + params):
+            sketches.setdefault((row['date'], row['model']), []).append((row['bucket'], row['count']))
+    return sketches
+
+
+def usage_distribution(start_date, end_date, metric, model='all', by='model',
+                       facts_path=None):
+    """Return {group: sketch} for a HISTOGRAM_METRICS metric over the range.
+
+    by is 'model' or a PERIOD_EXPRESSIONS granularity. Each sketch is a
+    sorted [(bucket, count), ...] list merged from the stored daily
+    sketches, so the cost follows the number of days and buckets, not the
+    number of responses in the range.
+    """
+    group = 'model' if by == 'model' else PERIOD_EXPRESSIONS[by]
+    where, params = _rollup_filter(start_date, end_date, model)
+    query = f"""
+    SELECT {group} AS grp, bucket, SUM(count) AS count
+    FROM daily_histograms
+    WHERE metric = ? AND {where}
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+    """
+    sketches = {}
+    with facts_connection(facts_path) as conn:
+        for row in conn.execute(query, [metric] + params):
+            sketches.setdefault(row['grp'], []).append((row['bucket'], row['count']))
+    return sketches